@@ -1,17 +1,555 @@
+import abc
 import random
 import sys
 import time
 import json
 import os
-from typing import Dict, List, Tuple, Optional
+import argparse
+import asyncio
+import struct
+import hashlib
+import marshal
+import mmap
+import heapq
+import functools
+import cProfile
+import pstats
+import gc
+import tempfile
+import traceback
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Dict, Generator, List, Mapping, Sequence, Tuple, Optional
+
+try:
+    import numpy as np
+except ImportError:  # Only the headless simulator needs NumPy
+    np = None
 
 # --- Constants ---
 VERSION = "1.1.1"
 SAVE_FILE = "bonfires_echo_save.json"
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_COMPACT_EVERY = 100  # Journal records kept before folding them into the snapshot
 SOUND_ENABLED = False 
+START_ROOM = 'ruined_atrium'
+VICTORY_ROOM = 'relic_vault'
+VICTORY_ITEM = 'relic_of_ages'  # Carried into VICTORY_ROOM, it ends the game
+
+# --- Combat Rules ---
+CRIT_CHANCE = 0.15
+BLEED_CHANCE = 0.3
+BLEED_TURNS = 3
+BLEED_DAMAGE = 2
+BLEED_MAX_STACKS = 3
+BURN_MAX_STACKS = 3
+SLOW_TURNS = 2
+SLOW_AMOUNT = 2  # Attack lost per stack of ice slow
+SLOW_MAX_STACKS = 3
+WARDEN_DRAIN_CHANCE = 0.2
+WARDEN_DRAIN = 10
+AI_SPECIAL_CHANCE = {'basic': 0.0, 'tank': 0.2, 'aggressive': 0.0, 'caster': 0.5, 'stealth': 0.3, 'boss': 0.4}
+
+# --- Combatants ---
+class Combatant:
+    """One live foe, stamped from an ENEMY_TEMPLATES row.
+
+    Slotted so each encounter allocates one small object rather than copying
+    a nine-key dict, and the combat loop reads fields as attributes.
+    """
+
+    FIELDS = ('name', 'health', 'attack', 'defense', 'xp', 'souls', 'description', 'ai')  # Template order
+    __slots__ = ('key',) + FIELDS + ('effects',)
+
+    def __init__(self, key: str, name: str, health: int, attack: int, defense: int, xp: int, souls: int,
+                 description: str, ai: str) -> None:
+        self.key = key
+        self.name = name
+        self.health = health
+        self.attack = attack
+        self.defense = defense
+        self.xp = xp
+        self.souls = souls
+        self.description = description
+        self.ai = ai
+        self.effects: Dict[str, List['Effect']] = {}
+
+    @classmethod
+    def spawn(cls, key: str) -> 'Combatant':
+        """A fresh foe for an enemies key, built straight from its template row."""
+        return cls(key, *ENEMY_TEMPLATES[key])
+
+    def invalidate(self) -> None:
+        """Foes keep no derived stats; effect bonuses are summed where they are used."""
+
+    def as_dict(self) -> Dict:
+        """The foe in the same shape as its enemies entry."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"Combatant({self.key!r}, health={self.health})"
+
+class Inventory:
+    """A multiset of item names: an insertion-ordered counter behind a list-like face.
+
+    Membership, count, append and remove are O(1) whatever the pack holds.
+    Iterating yields every copy, grouped by the order each item first
+    arrived, so joins and list() read like the plain list this replaced.
+    """
+
+    __slots__ = ('_counts', '_size')
+
+    def __init__(self, items=()) -> None:
+        self._counts: Dict[str, int] = {}
+        self._size = 0
+        for item in items:
+            self.append(item)
+
+    def append(self, item: str, count: int = 1) -> None:
+        """Add count copies of item."""
+        self._counts[item] = self._counts.get(item, 0) + count
+        self._size += count
+
+    def remove(self, item: str, count: int = 1) -> None:
+        """Take count copies of item; raises ValueError if there are fewer."""
+        held = self._counts.get(item, 0)
+        if held < count:
+            raise ValueError(f"{item!r} x{count} not in inventory")
+        if held == count:
+            del self._counts[item]
+        else:
+            self._counts[item] = held - count
+        self._size -= count
+
+    def count(self, item: str) -> int:
+        return self._counts.get(item, 0)
+
+    def counts(self) -> Dict[str, int]:
+        """Copies held per item, in first-arrival order."""
+        return dict(self._counts)
+
+    def copy(self) -> 'Inventory':
+        clone = Inventory()
+        clone._counts = dict(self._counts)
+        clone._size = self._size
+        return clone
+
+    def __contains__(self, item) -> bool:
+        return item in self._counts
+
+    def __iter__(self):
+        for item, count in self._counts.items():
+            for _ in range(count):
+                yield item
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Inventory):
+            return self._counts == other._counts
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Inventory({self._counts!r})"
+
+class PlayerState:
+    """The player's stats, gear and progress as slotted attributes.
+
+    Only base stats are stored; attack, defense, max_health and max_mana are
+    totals from the stat pipeline, cached until invalidate() is called after
+    gear, level or base stats change (effects invalidate it themselves).
+    Saves, the journal and recordings still deal in plain dicts: to_dict(),
+    from_dict(), items() and update() give that view, and indexing by key
+    still works for older callers. Timed effects live in effects and are
+    saved separately by the EffectEngine.
+    """
+
+    FIELDS = ('name', 'health', 'mana', 'base_health', 'base_mana', 'base_attack', 'base_defense', 'xp', 'level',
+              'spells', 'inventory', 'equipped_weapon', 'equipped_armor', 'trinkets', 'explored',
+              'souls', 'stealth', 'achievements', 'tallies')
+    __slots__ = FIELDS + ('effects', '_stats')
+
+    def __init__(self, name: str = "Nameless", health: Optional[int] = None, mana: Optional[int] = None,
+                 base_health: int = 100, base_mana: int = 50, base_attack: int = 0, base_defense: int = 0,
+                 xp: int = 0, level: int = 1, spells: Optional[List[str]] = None,
+                 inventory: Optional[List[str]] = None, equipped_weapon: Optional[str] = None,
+                 equipped_armor: Optional[str] = None, trinkets: Optional[List[str]] = None, explored=None,
+                 souls: int = 0, stealth: bool = False, achievements: Optional[List[str]] = None,
+                 tallies: Optional[Dict[str, int]] = None) -> None:
+        self.name = name
+        self.base_health, self.base_mana = base_health, base_mana
+        self.base_attack, self.base_defense = base_attack, base_defense
+        self.xp, self.level = xp, level
+        self.spells = list(spells or [])
+        self.inventory = Inventory(inventory or ())
+        self.equipped_weapon, self.equipped_armor = equipped_weapon, equipped_armor
+        self.trinkets = list(trinkets or [])
+        self.explored = set(explored or ())
+        self.souls = souls
+        self.stealth = stealth
+        self.achievements = list(achievements or [])
+        self.tallies = dict(tallies or {})  # Progress toward achievements still locked
+        self.effects: Dict[str, List['Effect']] = {}
+        self._stats: Optional[Dict[str, int]] = None
+        self.health = self.max_health if health is None else health  # Omitted means at full strength
+        self.mana = self.max_mana if mana is None else mana
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'PlayerState':
+        """Build from a saved player dict; keys this version does not know are dropped."""
+        player = cls(**{key: value for key, value in data.items() if key in cls.FIELDS})
+        if 'base_attack' not in data and 'attack' in data:
+            # Saves from before the stat pipeline held only totals: keep whatever of
+            # each total the gear and level do not explain as the base
+            player.base_health = player.base_mana = player.base_attack = player.base_defense = 0
+            player.invalidate()
+            gear = player.stats
+            for stat, base_field in BASE_STATS.items():
+                setattr(player, base_field, max(0, data[stat] - gear[stat]))
+            player.invalidate()
+        return player
+
+    def to_dict(self) -> Dict:
+        """JSON-ready copy, with explored as a sorted list and no lists or dicts shared with the live player."""
+        return {field: sorted(value) if isinstance(value, set) else list(value) if isinstance(value, (list, Inventory))
+                else dict(value) if isinstance(value, dict) else value for field, value in self.items()}
+
+    def items(self):
+        """(field, value) pairs in save order, as dict.items() would give."""
+        return ((field, getattr(self, field)) for field in self.FIELDS)
+
+    def update(self, fields: Mapping) -> None:
+        """Overwrite fields from a mapping, e.g. a journal 'stats' op."""
+        for key, value in fields.items():
+            if key == 'explored':
+                value = set(value)
+            elif key == 'inventory':
+                value = Inventory(value)
+            setattr(self, key, value)
+        self._stats = None
+
+    def invalidate(self) -> None:
+        """Drop the cached totals; call after changing gear, level or base stats."""
+        self._stats = None
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Totals for every pipeline stat, derived once and cached."""
+        stats = self._stats
+        if stats is None:
+            stats = self._stats = derive_stats(self)
+        return stats
+
+    @property
+    def attack(self) -> int:
+        return self.stats['attack']
+
+    @property
+    def defense(self) -> int:
+        return self.stats['defense']
+
+    @property
+    def max_health(self) -> int:
+        return self.stats['max_health']
+
+    @property
+    def max_mana(self) -> int:
+        return self.stats['max_mana']
+
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value) -> None:
+        setattr(self, key, value)
+        self._stats = None
+
+    def __repr__(self) -> str:
+        return f"PlayerState({self.name!r}, level={self.level}, health={self.health}/{self.max_health})"
+
+# --- Effects ---
+# stat: what an effect's amount adds to while it lasts; tick: its amount is
+# damage dealt each turn instead; stacks: records of one kind a combatant can
+# hold at once (at 1, reapplying refreshes); fade: said when the last one ends
+EFFECT_RULES = {
+    'strength': {'stat': 'attack', 'stacks': 1, 'fade': "Your strength fades."},
+    'barrier': {'stat': 'defense', 'stacks': 1, 'fade': "Your barrier fades."},
+    'endurance': {'stat': 'defense', 'stacks': 1, 'fade': "Your endurance fades."},
+    'stealth': {'stacks': 1, 'fade': "Your stealth fades."},
+    'blind': {'stacks': 1, 'fade': "The {name} blinks the ash from its eyes."},
+    'bleed': {'tick': True, 'stacks': BLEED_MAX_STACKS, 'fade': "The {name}'s bleeding stops."},
+    'burn': {'tick': True, 'stacks': BURN_MAX_STACKS, 'fade': "The flames on the {name} gutter out."},
+    'slow': {'stat': 'attack', 'stacks': SLOW_MAX_STACKS, 'fade': "The {name} shakes off the frost."}
+}
+STAT_EFFECTS = {stat: tuple(kind for kind, rule in EFFECT_RULES.items() if rule.get('stat') == stat)
+                for stat in ('attack', 'defense')}
+
+class Effect:
+    """One timed effect held by one combatant."""
+
+    __slots__ = ('kind', 'amount', 'expires', 'owner', 'live')
+
+    def __init__(self, kind: str, amount: int, expires: int, owner) -> None:
+        self.kind = kind
+        self.amount = amount
+        self.expires = expires
+        self.owner = owner
+        self.live = True
+
+class EffectEngine:
+    """Timed effects for one session, each held by the combatant it affects.
+
+    A combat clock counts turns across fights. Every effect sits in a min-heap
+    keyed by the turn it expires on, and damage-over-time effects are also kept
+    in a ticking list, so ending a turn touches only what ticks or expires
+    rather than scanning everything. Stacking kinds add up to their cap, with
+    the oldest record dropping out first.
+    """
+
+    def __init__(self) -> None:
+        self.turn = 0
+        self._heap: List[Tuple[int, int, Effect]] = []
+        self._ticking: List[Effect] = []
+        self._seq = 0
+
+    def apply(self, owner, kind: str, turns: int, amount: int = 0) -> Effect:
+        """Put an effect on owner for the given number of turns."""
+        rule = EFFECT_RULES[kind]
+        stack = owner.effects.get(kind)
+        if stack and len(stack) >= rule['stacks']:
+            self._end(stack[0])
+        effect = Effect(kind, amount, self.turn + turns, owner)
+        owner.effects.setdefault(kind, []).append(effect)
+        if 'stat' in rule:
+            owner.invalidate()
+        self._seq += 1
+        heapq.heappush(self._heap, (effect.expires, self._seq, effect))
+        if 'tick' in rule:
+            self._ticking.append(effect)
+        return effect
+
+    def _end(self, effect: Effect) -> None:
+        """Take one effect off its owner; heap and ticking entries are dropped lazily."""
+        effect.live = False
+        stack = effect.owner.effects[effect.kind]
+        stack.remove(effect)
+        if not stack:
+            del effect.owner.effects[effect.kind]
+        if 'stat' in EFFECT_RULES[effect.kind]:
+            effect.owner.invalidate()
+
+    @staticmethod
+    def bonus(owner, stat: str) -> int:
+        """Total that owner's effects add to a stat."""
+        effects = owner.effects
+        if not effects:
+            return 0
+        return sum(effect.amount for kind in STAT_EFFECTS[stat] if kind in effects for effect in effects[kind])
+
+    def advance(self) -> Tuple[List[Effect], List[Effect]]:
+        """End a turn: returns the effects that tick now and those that just expired."""
+        self.turn += 1
+        ticking = [effect for effect in self._ticking if effect.live]
+        self._ticking = ticking
+        expired = []
+        heap = self._heap
+        while heap and heap[0][0] <= self.turn:
+            effect = heapq.heappop(heap)[2]
+            if effect.live:
+                self._end(effect)
+                expired.append(effect)
+        return ticking, expired
+
+    def drop(self, owner) -> None:
+        """End every effect on owner, e.g. a foe that fell or was fled from."""
+        for stack in owner.effects.values():
+            for effect in stack:
+                effect.live = False
+        owner.effects.clear()
+        owner.invalidate()
+
+    def clear(self, owner) -> None:
+        """Forget every effect, leaving owner (the player) with none."""
+        self.drop(owner)
+        self._heap = []
+        self._ticking = []
+
+    def to_list(self, owner) -> List[Dict]:
+        """Owner's effects as JSON-ready records with turns remaining, oldest first."""
+        records = [effect for stack in owner.effects.values() for effect in stack]
+        records.sort(key=lambda effect: effect.expires)
+        return [{'kind': e.kind, 'turns': e.expires - self.turn, 'amount': e.amount} for e in records]
+
+    def load(self, owner, data) -> None:
+        """Replace owner's effects from to_list records or an older save's effect dict."""
+        self.clear(owner)
+        if isinstance(data, dict):  # Older saves kept one entry per effect name
+            data = [{'kind': kind, 'turns': entry['turns'], 'amount': entry.get('bonus', 0)}
+                    for kind, entry in data.items() if entry.get('target') != 'enemy']
+        for record in data:
+            if record['kind'] in EFFECT_RULES and record['turns'] > 0:
+                self.apply(owner, record['kind'], record['turns'], record.get('amount', 0))
+
+# --- Stat Pipeline ---
+LEVEL_GAINS = {'attack': 4, 'defense': 3, 'max_health': 25, 'max_mana': 20}  # Per level past the first
+BASE_STATS = {'attack': 'base_attack', 'defense': 'base_defense', 'max_health': 'base_health', 'max_mana': 'base_mana'}
+# Which keys of a weapons, armor or trinkets entry feed which stat
+GEAR_MODIFIERS = {
+    'weapon': {'attack': 'attack', 'mana_bonus': 'max_mana'},
+    'armor': {'defense': 'defense', 'mana_bonus': 'max_mana'},
+    'trinket': {'attack_bonus': 'attack', 'defense_bonus': 'defense', 'mana_bonus': 'max_mana'}
+}
+
+def stat_modifiers(player: PlayerState) -> List[Tuple[str, Dict[str, int]]]:
+    """Every source feeding the player's stats, in pipeline order, as (source, {stat: amount})."""
+    def gear(kind: str, data: Dict) -> Dict[str, int]:
+        return {stat: data[key] for key, stat in GEAR_MODIFIERS[kind].items() if key in data}
+
+    gains = player.level - 1
+    sources = [
+        ('base', {stat: getattr(player, field) for stat, field in BASE_STATS.items()}),
+        ('level', {stat: gain * gains for stat, gain in LEVEL_GAINS.items()}),
+        ('weapon', gear('weapon', weapons.get(player.equipped_weapon, {})))
+    ]
+    if player.equipped_armor:
+        sources.append(('armor', gear('armor', armor[player.equipped_armor])))
+    for trinket in player.trinkets:
+        sources.append((trinket, gear('trinket', trinkets[trinket])))
+    sources.append(('effects', {stat: EffectEngine.bonus(player, stat) for stat in STAT_EFFECTS}))
+    return sources
+
+def derive_stats(player: PlayerState) -> Dict[str, int]:
+    """Sum every modifier source into the player's stat totals."""
+    totals = dict.fromkeys(BASE_STATS, 0)
+    for _, modifiers in stat_modifiers(player):
+        for stat, amount in modifiers.items():
+            totals[stat] += amount
+    return totals
+
+# --- Instrumentation ---
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 50.0, float('inf'))
+PROFILE_FILE = "bonfires_echo.pstats"
+
+class Histogram:
+    """Latency counts in the fixed LATENCY_BUCKETS_MS buckets, plus count, total and max."""
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self) -> None:
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        ms = seconds * 1000
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound in ms of the bucket holding the given fraction of samples (the max for the last)."""
+        needed = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= needed and count:
+                return min(bound, self.max * 1000)
+        return self.max * 1000
+
+    def report(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.5), 3),
+            'p99_ms': round(self.percentile(0.99), 3),
+            'max_ms': round(self.max * 1000, 3),
+            'buckets_ms': dict(zip((str(b) for b in LATENCY_BUCKETS_MS), self.buckets))
+        }
+
+class Metrics:
+    """One session's timers and counters; recording is a no-op while disabled."""
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.timers: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        if self.enabled:
+            timer = self.timers.get(name)
+            if timer is None:
+                timer = self.timers[name] = Histogram()
+            timer.record(seconds)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self) -> None:
+        self.timers.clear()
+        self.counters.clear()
+
+    def report(self) -> Dict:
+        return {'timers': {name: timer.report() for name, timer in sorted(self.timers.items())},
+                'counters': dict(sorted(self.counters.items()))}
+
+    def summary_lines(self) -> List[str]:
+        """A table of every timer and counter for the perf command and --profile."""
+        lines = [f"{'Timer':<24} {'Count':>7} {'Mean ms':>9} {'p50 ms':>8} {'p99 ms':>8} {'Max ms':>8}"]
+        for name, timer in sorted(self.timers.items()):
+            row = timer.report()
+            lines.append(f"{name:<24} {row['count']:>7} {row['mean_ms']:>9.3f} {row['p50_ms']:>8.3f} "
+                         f"{row['p99_ms']:>8.3f} {row['max_ms']:>8.3f}")
+        if self.counters:
+            lines.append("Counters: " + ', '.join(f"{name} {value}" for name, value in sorted(self.counters.items())))
+        return lines
+
+def timed(name: str):
+    """Decorator timing a function of the session into its metrics."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def run(session: 'GameSession', *args, **kwargs):
+            metrics = session.metrics
+            if not metrics.enabled:
+                return fn(session, *args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(session, *args, **kwargs)
+            finally:
+                metrics.record(name, time.perf_counter() - started)
+        return run
+    return wrap
+
+def timed_script(name: str):
+    """Decorator timing a game sub-script, counting only its own work and not the waits for input."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def run(session: 'GameSession', *args, **kwargs):
+            metrics = session.metrics
+            script = fn(session, *args, **kwargs)
+            if not metrics.enabled:
+                return (yield from script)
+            elapsed, reply = 0.0, None
+            while True:
+                started = time.perf_counter()
+                try:
+                    prompt = script.send(reply)
+                except StopIteration as done:
+                    metrics.record(name, elapsed + time.perf_counter() - started)
+                    return done.value
+                elapsed += time.perf_counter() - started
+                reply = yield prompt
+        return run
+    return wrap
 
 # --- Lore Introduction ---
-def print_lore() -> None:
+def print_lore(session: 'GameSession') -> None:
     """Display the game's introductory lore with dramatic pacing."""
     lore_lines = [
         "\nThe Underground Empire once blazed with forbidden light, its spires clawing at the heavens, powered by the Relic of Ages—a shard of creation’s wrath.",
@@ -21,123 +559,81 @@ def print_lore() -> None:
         "Brace yourself. The dark craves your soul, and every step is a dance with ruin.\n"
     ]
     for line in lore_lines:
-        print(line)
-        time.sleep(1.5 if SOUND_ENABLED else 0.5)
+        session.say(line)
+        session.out.pause(1.5 if SOUND_ENABLED else 0.5)
     if SOUND_ENABLED:
-        print("[Sound: Distant wind howls, embers crackle]")
+        session.say("[Sound: Distant wind howls, embers crackle]")
 
 # --- Player Setup ---
-def setup_player() -> Dict:
+STARTING_WEAPONS = {
+    '1': ('sword', 10, 3, 50),
+    '2': ('staff', 5, 1, 80),
+    '3': ('bow', 12, 2, 50)
+}
+
+def new_player(name: str, choice: str) -> PlayerState:
+    """Build a fresh player from a name and a STARTING_WEAPONS choice."""
+    weapon, attack, defense, mana = STARTING_WEAPONS[choice]
+    return PlayerState(
+        name=name,
+        base_mana=mana,
+        base_attack=attack - weapons[weapon]['attack'],
+        base_defense=defense,
+        equipped_weapon=weapon,
+        explored={START_ROOM}
+    )
+
+def setup_player(session: 'GameSession') -> Generator[str, str, PlayerState]:
     """Initialize the player with name, weapon choice, and starting stats."""
-    print("\nWhat name do you bear into this cursed pit?")
-    player_name = input("Enter your name: ").strip() or "Nameless"
-    print(f"\n{player_name}, pick your starting edge—none will save you from the grind:")
-    print("1. Sword - Balanced grit (Attack: 10, Defense: 3, Mana: 50)")
-    print("2. Staff - Arcane bite (Attack: 5, Defense: 1, Mana: 80)")
-    print("3. Bow - Sharp sting (Attack: 12, Defense: 2, Mana: 50)")
+    session.say("\nWhat name do you bear into this cursed pit?")
+    player_name = (yield "Enter your name: ").strip() or "Nameless"
+    session.say(f"\n{player_name}, pick your starting edge—none will save you from the grind:")
+    session.say("1. Sword - Balanced grit (Attack: 10, Defense: 3, Mana: 50)")
+    session.say("2. Staff - Arcane bite (Attack: 5, Defense: 1, Mana: 80)")
+    session.say("3. Bow - Sharp sting (Attack: 12, Defense: 2, Mana: 50)")
     while True:
-        choice = input("Enter 1, 2, or 3: ").strip()
-        starting_weapons = {
-            '1': ('sword', 10, 3, 50),
-            '2': ('staff', 5, 1, 80),
-            '3': ('bow', 12, 2, 50)
-        }
-        if choice in starting_weapons:
-            weapon, attack, defense, mana = starting_weapons[choice]
-            print(f"\nYou clutch the {weapon}. It’s a start.")
+        choice = (yield "Enter 1, 2, or 3: ").strip()
+        if choice in STARTING_WEAPONS:
+            session.say(f"\nYou clutch the {STARTING_WEAPONS[choice][0]}. It’s a start.")
             break
-        print("Choose, or face the dark empty-handed.")
-    return {
-        'name': player_name,
-        'health': 100, 'max_health': 100,
-        'mana': mana, 'max_mana': mana,
-        'attack': attack, 'defense': defense,
-        'xp': 0, 'level': 1,
-        'spells': [],
-        'inventory': [],
-        'equipped_weapon': weapon,
-        'equipped_armor': None,
-        'trinkets': [],
-        'explored': {'ruined_atrium'},
-        'souls': 0,
-        'stealth': False,
-        'achievements': []
-    }
+        session.say("Choose, or face the dark empty-handed.")
+    return new_player(player_name, choice)
 
 # --- Player Stats Display ---
-def print_stats(player: Dict) -> None:
+def print_stats(session: 'GameSession') -> None:
     """Display the player's current stats with enhanced formatting."""
-    print(f"\n===== {player['name']}'s Toll =====")
-    print(f"Level: {player['level']} (XP: {player['xp']}/{player['level'] * 100})")
-    print(f"Health: {player['health']}/{player['max_health']}")
-    print(f"Mana: {player['mana']}/{player['max_mana']}")
-    print(f"Attack: {player['attack']}")
-    print(f"Defense: {player['defense']}")
-    print(f"Weapon: {player['equipped_weapon'].capitalize()}")
-    print(f"Armor: {player['equipped_armor'].capitalize() if player['equipped_armor'] else 'None'}")
-    print(f"Trinkets: {', '.join([t.capitalize() for t in player['trinkets']]) if player['trinkets'] else 'None'}")
-    print(f"Inventory: {', '.join([i.capitalize() for i in player['inventory']]) if player['inventory'] else 'Empty'}")
-    print(f"Spells: {', '.join([s.capitalize() for s in player['spells']]) if player['spells'] else 'None'}")
-    print(f"Souls: {player['souls']}")
-    print(f"Achievements: {', '.join(player['achievements']) if player['achievements'] else 'None'}")
-    print("=======================\n")
+    player = session.player
+    session.say(f"\n===== {player.name}'s Toll =====")
+    session.say(f"Level: {player.level} (XP: {player.xp}/{player.level * 100})")
+    session.say(f"Health: {player.health}/{player.max_health}")
+    session.say(f"Mana: {player.mana}/{player.max_mana}")
+    session.say(f"Attack: {player.attack}")
+    session.say(f"Defense: {player.defense}")
+    session.say(f"Weapon: {player.equipped_weapon.capitalize()}")
+    session.say(f"Armor: {player.equipped_armor.capitalize() if player.equipped_armor else 'None'}")
+    session.say(f"Trinkets: {', '.join([t.capitalize() for t in player.trinkets]) if player.trinkets else 'None'}")
+    session.say(f"Inventory: {', '.join([i.capitalize() for i in player.inventory]) if player.inventory else 'Empty'}")
+    session.say(f"Spells: {', '.join([s.capitalize() for s in player.spells]) if player.spells else 'None'}")
+    session.say(f"Souls: {player.souls}")
+    session.say(f"Achievements: {', '.join(player.achievements) if player.achievements else 'None'}")
+    session.say("=======================\n")
 
 # --- Map Display ---
-def print_map(player: Dict) -> None:
+@timed('map')
+def print_map(session: 'GameSession') -> None:
     """Display the explored portions of the map with directional context."""
-    print("\n--- The Empire’s Shattered Web ---")
-    layout = {
-        'ruined_atrium': {'north': 'grand_hall', 'east': 'windy_tunnel', 'west': 'shattered_vestibule'},
-        'grand_hall': {'south': 'ruined_atrium', 'north': 'throne_antechamber', 'west': 'dark_abyss', 'east': 'library'},
-        'windy_tunnel': {'west': 'ruined_atrium', 'east': 'crystal_cavern', 'north': 'ashen_gorge'},
-        'shattered_vestibule': {'east': 'ruined_atrium', 'north': 'echoing_crypt'},
-        'crystal_cavern': {'west': 'windy_tunnel', 'south': 'flooded_passage', 'north': 'ice_passage'},
-        'flooded_passage': {'north': 'crystal_cavern', 'east': 'sunken_chamber'},
-        'sunken_chamber': {'west': 'flooded_passage', 'up': 'secret_trove', 'north': 'labyrinth_of_echoes'},
-        'secret_trove': {'down': 'sunken_chamber'},
-        'dark_abyss': {'east': 'grand_hall', 'north': 'hidden_vault', 'south': 'relic_vault'},
-        'hidden_vault': {'south': 'dark_abyss', 'east': 'forge_of_the_ancients'},
-        'library': {'west': 'grand_hall', 'north': 'oracle_chamber', 'east': 'arcane_sanctum'},
-        'oracle_chamber': {'south': 'library', 'west': 'tower_of_the_mage'},
-        'throne_antechamber': {'south': 'grand_hall', 'north': 'throne_room'},
-        'throne_room': {'south': 'throne_antechamber', 'west': 'chamber_of_trials', 'north': 'relic_vault'},
-        'forge_of_the_ancients': {'west': 'hidden_vault', 'north': 'forgotten_mines', 'south': 'lava_chamber'},
-        'garden_of_shadows': {'west': 'crypt_of_the_fallen', 'south': 'deep_cavern'},
-        'crypt_of_the_fallen': {'south': 'grand_hall', 'east': 'garden_of_shadows'},
-        'tower_of_the_mage': {'down': 'oracle_chamber', 'up': 'labyrinth_of_echoes'},
-        'labyrinth_of_echoes': {'down': 'tower_of_the_mage', 'south': 'sunken_chamber'},
-        'chamber_of_trials': {'east': 'throne_room'},
-        'echoing_crypt': {'south': 'shattered_vestibule', 'west': 'shadow_vault'},
-        'shadow_vault': {'east': 'echoing_crypt', 'north': 'ice_passage'},
-        'ice_passage': {'south': 'shadow_vault', 'north': 'frozen_lair', 'west': 'crystal_cavern'},
-        'frozen_lair': {'south': 'ice_passage', 'east': 'lava_chamber', 'north': 'frosted_depths'},
-        'lava_chamber': {'west': 'frozen_lair', 'north': 'forge_of_the_ancients', 'east': 'cinder_halls'},
-        'arcane_sanctum': {'west': 'library', 'east': 'mana_well'},
-        'mana_well': {'west': 'arcane_sanctum', 'north': 'relic_vault'},
-        'forgotten_mines': {'south': 'forge_of_the_ancients', 'east': 'deep_cavern'},
-        'deep_cavern': {'west': 'forgotten_mines', 'north': 'garden_of_shadows', 'south': 'relic_vault', 'east': 'void_chasm'},
-        'relic_vault': {'south': 'throne_room', 'north': 'mana_well', 'east': 'deep_cavern', 'west': 'dark_abyss'},
-        'ashen_gorge': {'north': 'windy_tunnel', 'south': 'bleak_ruins'},
-        'bleak_ruins': {'north': 'ashen_gorge', 'east': 'wraith_spire'},
-        'wraith_spire': {'west': 'bleak_ruins', 'north': 'soul_pit'},
-        'soul_pit': {'south': 'wraith_spire', 'east': 'relic_vault'},
-        'cinder_halls': {'west': 'lava_chamber', 'north': 'ember_vault'},
-        'ember_vault': {'south': 'cinder_halls', 'east': 'relic_vault'},
-        'frosted_depths': {'south': 'frozen_lair', 'north': 'glacial_tomb'},
-        'glacial_tomb': {'south': 'frosted_depths', 'west': 'relic_vault'},
-        'void_chasm': {'east': 'deep_cavern', 'north': 'abyssal_rift'},
-        'abyssal_rift': {'south': 'void_chasm', 'west': 'relic_vault'}
-    }
-    for room in sorted(player['explored']):
-        exits = layout.get(room, {})
-        explored_exits = {d: dest for d, dest in exits.items() if dest in player['explored']}
-        print(f"{room.capitalize()}: {', '.join([f'{dir}: {dest}' for dir, dest in explored_exits.items()])}")
-    unexplored_count = len(layout) - len(player['explored'])
-    print(f"Unexplored realms: {unexplored_count}")
-    print("------------------------\n")
+    player = session.player
+    world = session.world.base
+    session.say("\n--- The Empire’s Shattered Web ---")
+    for room in sorted(player.explored):
+        explored_exits = {d: dest for d, dest in world[room]['exits'].items() if dest in player.explored}
+        session.say(f"{room.capitalize()}: {', '.join([f'{dir}: {dest}' for dir, dest in explored_exits.items()])}")
+    unexplored_count = len(world) - len(player.explored)
+    session.say(f"Unexplored realms: {unexplored_count}")
+    session.say("------------------------\n")
 
 # --- ASCII Art ---
-def print_ascii_art() -> None:
+def print_ascii_art(session: 'GameSession') -> None:
     """Display a dragon ASCII art as a dramatic intro."""
     dragon_art = r"""
                                              ,--,  ,.-.
@@ -164,9 +660,9 @@ def print_ascii_art() -> None:
 (_ \|`   _,/_  /  \_            ,--`
  \( `   <.,../`     `-.._   _,-`
     """
-    print(dragon_art)
+    session.say(dragon_art)
     if SOUND_ENABLED:
-        print("[Sound: Dragon’s roar echoes through the abyss]")
+        session.say("[Sound: Dragon’s roar echoes through the abyss]")
 
 # --- Items ---
 player_default = {
@@ -180,906 +676,1936 @@ player_default = {
     'souls': 0
 }
 
-weapons = {
-    'fists': {'attack': 5, 'desc': 'Bare knuckles, raw and unyielding.'},
-    'rusted_sword': {'attack': 10, 'desc': 'A blade dulled by time.'},
-    'iron_sword': {'attack': 15, 'desc': 'Solid steel, cold and heavy.'},
-    'gleaming_sword': {'attack': 18, 'desc': 'Polished to a deadly sheen.'},
-    'forge_hammer': {'attack': 20, 'desc': 'A smith’s tool turned weapon.'},
-    'sword': {'attack': 10, 'desc': 'A balanced blade for a drifter.'},
-    'staff': {'attack': 5, 'spell_bonus': 5, 'desc': 'Wood carved with arcane intent.'},
-    'bow': {'attack': 12, 'range': True, 'desc': 'A taut string sings death.'},
-    'shadow_blade': {'attack': 14, 'stealth': True, 'desc': 'A knife that drinks light.'},
-    'flame_spear': {'attack': 16, 'fire_damage': 5, 'desc': 'A spear kissed by flame.'},
-    'ice_dagger': {'attack': 12, 'ice_slow': True, 'desc': 'A blade of frozen malice.'},
-    'thunder_mace': {'attack': 20, 'shock': True, 'desc': 'Crackling with storm’s fury.'},
-    'crystal_staff': {'attack': 8, 'spell_bonus': 10, 'desc': 'Glowing with mystic power.'},
-    'dragon_sword': {'attack': 25, 'fire_resist': True, 'desc': 'Forged in drake’s breath.'},
-    'void_axe': {'attack': 22, 'dark_damage': 3, 'desc': 'A cleaver of the abyss.'},
-    'bone_scythe': {'attack': 17, 'bleed': True, 'desc': 'Reaps flesh and soul alike.'},
-    'soul_reaver': {'attack': 30, 'mana_bonus': 15, 'desc': 'A blade that hungers.'},
-    'ashen_bow': {'attack': 18, 'range': True, 'desc': 'Strung with cinder sinew.'},
-    'cinder_claw': {'attack': 19, 'fire_damage': 4, 'desc': 'Claws of molten wrath.'},
-    'frost_glaive': {'attack': 16, 'ice_slow': True, 'desc': 'A polearm of ice.'},
-    'abyssal_whip': {'attack': 15, 'dark_damage': 5, 'desc': 'Lashes from the void.'},
-    'rune_blade': {'attack': 20, 'spell_bonus': 8, 'desc': 'Etched with power.'}
-}
+# --- Content Packs ---
+# Content lives in JSON (or TOML) packs under content/, base.json first and
+# any others after it in name order; a later pack's entries replace earlier
+# ones of the same name. Merged, validated and interned content is cached in
+# CONTENT_CACHE, keyed on each pack's mtime and hash.
+CONTENT_DIR_NAME = "content"
+BASE_PACK = "base.json"
+CONTENT_CACHE = ".compiled.marshal"
+CONTENT_FORMAT = 1  # Bump whenever the schema or the cached layout changes
 
-armor = {
-    'leather_armor': {'defense': 3, 'desc': 'Tough hide, worn but trusty.'},
-    'iron_plate': {'defense': 5, 'desc': 'Heavy steel guards your bones.'},
-    'chain_vest': {'defense': 4, 'desc': 'Links rattle with each step.'},
-    'mage_cloak': {'defense': 2, 'mana_bonus': 20, 'desc': 'Woven with arcane thread.'},
-    'shadow_mail': {'defense': 6, 'stealth': True, 'desc': 'Armor of night’s embrace.'},
-    'dragon_scale': {'defense': 8, 'fire_resist': True, 'desc': 'Scales of a fallen drake.'},
-    'bone_plate': {'defense': 7, 'bleed_resist': True, 'desc': 'Carved from death’s remnants.'},
-    'rune_shroud': {'defense': 4, 'spell_bonus': 5, 'desc': 'Hums with mystic wards.'},
-    'void_guard': {'defense': 10, 'dark_resist': True, 'desc': 'Forged in the abyss.'},
-    'ashen_hide': {'defense': 5, 'fire_resist': True, 'desc': 'Charred but resilient.'},
-    'frost_mail': {'defense': 6, 'ice_resist': True, 'desc': 'Gleams with frost.'},
-    'soul_weave': {'defense': 3, 'mana_bonus': 25, 'desc': 'Threads of lost spirits.'}
-}
+class ContentError(Exception):
+    """Content packs that failed to parse, match the schema, or cross-reference."""
 
-spells = {
-    'fireball': {'damage': 20, 'mana_cost': 10, 'desc': 'A blazing orb of ruin.'},
-    'heal': {'heal': 30, 'mana_cost': 15, 'desc': 'Mends flesh with light.'},
-    'levitation': {'mana_cost': 5, 'desc': 'Defies the earth’s pull.'},
-    'frost_bolt': {'damage': 15, 'slow': True, 'mana_cost': 12, 'desc': 'Freezes and shatters.'},
-    'lightning_strike': {'damage': 25, 'mana_cost': 20, 'desc': 'Thunder rends the dark.'},
-    'shadow_veil': {'stealth': True, 'mana_cost': 15, 'desc': 'Cloaks you in gloom.'},
-    'barrier': {'defense_bonus': 5, 'duration': 3, 'mana_cost': 15, 'desc': 'A shield of will.'},
-    'teleport': {'mana_cost': 30, 'desc': 'Warps space to your whim.'},
-    'soul_drain': {'damage': 18, 'heal': 10, 'mana_cost': 20, 'desc': 'Steals life’s essence.'},
-    'ash_cloud': {'blind': True, 'mana_cost': 25, 'desc': 'Chokes sight with ash.'},
-    'void_pull': {'damage': 22, 'mana_cost': 18, 'desc': 'Drags foes to doom.'},
-    'ice_shield': {'defense_bonus': 7, 'duration': 2, 'mana_cost': 20, 'desc': 'A frigid bulwark.'}
-}
+    def __init__(self, problems: List[str]) -> None:
+        super().__init__("Content packs are broken:\n  " + "\n  ".join(problems))
+        self.problems = problems
 
-trinkets = {
-    'ruby_ring': {'attack_bonus': 3, 'desc': 'Glows with martial fire.'},
-    'sapphire_amulet': {'mana_bonus': 20, 'desc': 'Pulses with mana’s tide.'},
-    'emerald_clasp': {'defense_bonus': 2, 'desc': 'Steadies your stance.'},
-    'dragon_tooth': {'attack_bonus': 5, 'fire_resist': True, 'desc': 'A drake’s fang, sharp.'},
-    'skull_charm': {'mana_bonus': 10, 'dark_resist': True, 'desc': 'Whispers of the dead.'},
-    'rune_stone': {'spell_bonus': 3, 'desc': 'Enhances arcane might.'},
-    'ashen_ember': {'fire_damage': 2, 'fire_resist': True, 'desc': 'Smolders eternally.'},
-    'frost_shard': {'ice_resist': True, 'mana_bonus': 15, 'desc': 'Chills to the touch.'}
+# For each table, every field an entry may hold: (type, required)
+_DESC = (str, True)
+CONTENT_SCHEMA = {
+    'weapons': {'attack': (int, True), 'desc': _DESC, 'fire_damage': (int, False), 'dark_damage': (int, False),
+                'spell_bonus': (int, False), 'mana_bonus': (int, False), 'bleed': (bool, False),
+                'ice_slow': (bool, False), 'stealth': (bool, False), 'range': (bool, False), 'shock': (bool, False),
+                'fire_resist': (bool, False)},
+    'armor': {'defense': (int, True), 'desc': _DESC, 'mana_bonus': (int, False), 'spell_bonus': (int, False),
+              'stealth': (bool, False), 'fire_resist': (bool, False), 'bleed_resist': (bool, False),
+              'dark_resist': (bool, False), 'ice_resist': (bool, False)},
+    'spells': {'mana_cost': (int, True), 'desc': _DESC, 'damage': (int, False), 'heal': (int, False),
+               'defense_bonus': (int, False), 'duration': (int, False), 'slow': (bool, False),
+               'stealth': (bool, False), 'blind': (bool, False)},
+    'trinkets': {'desc': _DESC, 'attack_bonus': (int, False), 'defense_bonus': (int, False), 'mana_bonus': (int, False),
+                 'spell_bonus': (int, False), 'fire_damage': (int, False), 'fire_resist': (bool, False),
+                 'dark_resist': (bool, False), 'ice_resist': (bool, False)},
+    'consumables': {'desc': _DESC, 'heal': (int, False), 'mana_restore': (int, False), 'attack_bonus': (int, False),
+                    'defense_bonus': (int, False), 'fire_damage': (int, False), 'duration': (int, False),
+                    'ice_resist': (bool, False), 'stealth': (bool, False)},
+    'materials': {'desc': _DESC},
+    'chests': {'contents': (list, True), 'locked': (bool, True), 'desc': _DESC, 'key': (str, False)},
+    'crafting_recipes': {'ingredients': (dict, True), 'souls': (int, True), 'desc': _DESC},
+    'enemies': {'name': (str, True), 'health': (int, True), 'attack': (int, True), 'defense': (int, True),
+                'xp': (int, True), 'souls': (int, True), 'description': (str, True), 'ai': (str, True)},
+    'traps': {'damage': (int, True), 'message': (str, True), 'effect': (str, True), 'ward': (str, False)},
+    'rooms': {'description': (str, True), 'exits': (dict, True), 'objects': (list, False), 'enemies': (list, False),
+              'traps': (list, False), 'chests': (list, False), 'lore': (str, False), 'bonfire': (bool, False),
+              'crafting_station': (bool, False), 'puzzle': (dict, False)}
 }
+PUZZLE_SCHEMA = {'riddle': (str, True), 'answer': (str, True), 'reward': (str, True), 'alternates': (list, False)}
+ITEM_TABLES = ('weapons', 'armor', 'trinkets', 'consumables', 'materials')
+SCROLL_PREFIX = 'spell_scroll_'
 
-consumables = {
-    'healing_potion': {'heal': 30, 'desc': 'Restores vigor swiftly.'},
-    'mana_elixir': {'mana_restore': 25, 'desc': 'Replenishes mystic reserves.'},
-    'strength_draught': {'attack_bonus': 5, 'duration': 5, 'desc': 'Surges with power.'},
-    'endurance_vial': {'defense_bonus': 3, 'duration': 5, 'desc': 'Hardens your shell.'},
-    'fire_tonic': {'fire_damage': 5, 'duration': 3, 'desc': 'Ignites your strikes.'},
-    'ice_draught': {'ice_resist': True, 'duration': 5, 'desc': 'Wards off frost.'},
-    'shadow_essence': {'stealth': True, 'duration': 3, 'desc': 'Fades you from sight.'}
-}
+try:
+    import tomllib
+except ImportError:  # Python < 3.11 reads JSON packs only
+    tomllib = None
 
-chests = {
-    'dusty_chest': {'contents': ['healing_potion', 'rusted_sword'], 'locked': False, 'desc': 'Coated in ages of grime.'},
-    'rune_chest': {'contents': ['spell_scroll_frost_bolt', 'ruby_ring'], 'locked': True, 'key': 'rune_key', 'desc': 'Etched with glowing runes.'},
-    'shadow_chest': {'contents': ['shadow_blade', 'mana_elixir'], 'locked': False, 'desc': 'Dark as the abyss.'},
-    'dragon_hoard': {'contents': ['dragon_sword', 'dragon_scale'], 'locked': True, 'key': 'dragon_key', 'desc': 'Piled with drake’s riches.'},
-    'void_coffer': {'contents': ['void_axe', 'endurance_vial'], 'locked': True, 'key': 'void_key', 'desc': 'Hums with dark energy.'},
-    'cinder_box': {'contents': ['cinder_claw', 'fire_tonic'], 'locked': False, 'desc': 'Warm to the touch.'}
-}
+def get_content_dir() -> str:
+    """The content pack directory, next to the script or a PyInstaller executable."""
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, CONTENT_DIR_NAME)
 
-# --- Crafting Recipes ---
-crafting_recipes = {
-    'healing_potion': {'ingredients': {'herb': 2, 'vial': 1}, 'souls': 10, 'desc': 'A potion to mend wounds.'},
-    'mana_elixir': {'ingredients': {'crystal_shard': 1, 'vial': 1}, 'souls': 15, 'desc': 'Restores arcane energy.'},
-    'iron_sword': {'ingredients': {'iron_ore': 2, 'leather': 1}, 'souls': 25, 'desc': 'A sturdy blade.'},
-    'rune_blade': {'ingredients': {'iron_sword': 1, 'rune_stone': 1}, 'souls': 50, 'desc': 'Infused with magic.'}
-}
+def content_packs(directory: str) -> List[str]:
+    """Pack files to load, base pack first and the rest by name."""
+    suffixes = ('.json', '.toml') if tomllib else ('.json',)
+    names = sorted(name for name in os.listdir(directory) if name.endswith(suffixes) and name != BASE_PACK)
+    return [os.path.join(directory, name) for name in [BASE_PACK] + names]
 
-# --- Enemies ---
-enemies = {
-    'skeleton': {'name': 'Skeleton', 'health': 20, 'attack': 5, 'defense': 2, 'xp': 10, 'souls': 5, 'description': 'A rattling husk with a dull blade.', 'ai': 'basic'},
-    'golem': {'name': 'Golem', 'health': 50, 'attack': 10, 'defense': 5, 'xp': 25, 'souls': 15, 'description': 'A lumbering stone brute.', 'ai': 'tank'},
-    'shadow_beast': {'name': 'Shadow Beast', 'health': 30, 'attack': 8, 'defense': 3, 'xp': 15, 'souls': 10, 'description': 'A clawed nightmare from the dark.', 'ai': 'aggressive'},
-    'mage_apprentice': {'name': 'Mage Apprentice', 'health': 25, 'attack': 7, 'defense': 2, 'xp': 20, 'souls': 12, 'description': 'A reckless spell-slinger.', 'ai': 'caster'},
-    'minotaur': {'name': 'Minotaur', 'health': 40, 'attack': 12, 'defense': 4, 'xp': 30, 'souls': 20, 'description': 'A horned beast of raw fury.', 'ai': 'aggressive'},
-    'guardian': {'name': 'Guardian', 'health': 60, 'attack': 15, 'defense': 6, 'xp': 40, 'souls': 25, 'description': 'A stoic sentinel of the relic.', 'ai': 'tank'},
-    'wraith': {'name': 'Wraith', 'health': 25, 'attack': 7, 'defense': 2, 'xp': 20, 'souls': 15, 'description': 'A spectral wail in the gloom.', 'ai': 'stealth'},
-    'drake': {'name': 'Drake', 'health': 70, 'attack': 18, 'defense': 7, 'xp': 50, 'souls': 30, 'description': 'A fire-spitting scale-wall.', 'ai': 'aggressive'},
-    'necromancer': {'name': 'Necromancer', 'health': 40, 'attack': 10, 'defense': 3, 'xp': 35, 'souls': 25, 'description': 'A death-weaver with cold eyes.', 'ai': 'caster'},
-    'ice_wyrm': {'name': 'Ice Wyrm', 'health': 55, 'attack': 14, 'defense': 5, 'xp': 45, 'souls': 28, 'description': 'A frozen terror with icy fangs.', 'ai': 'tank'},
-    'relic_warden': {'name': 'Relic Warden', 'health': 150, 'attack': 25, 'defense': 10, 'xp': 100, 'souls': 50, 'description': 'A towering knight clad in relic-forged steel, its blade hums with doom.', 'ai': 'boss'},
-    'ashen_hound': {'name': 'Ashen Hound', 'health': 35, 'attack': 9, 'defense': 3, 'xp': 20, 'souls': 12, 'description': 'A charred beast with ember eyes.', 'ai': 'aggressive'},
-    'void_stalker': {'name': 'Void Stalker', 'health': 45, 'attack': 11, 'defense': 4, 'xp': 30, 'souls': 18, 'description': 'A shadow that hunts with glee.', 'ai': 'stealth'},
-    'frost_specter': {'name': 'Frost Specter', 'health': 30, 'attack': 8, 'defense': 2, 'xp': 25, 'souls': 15, 'description': 'A chill spirit of icy wrath.', 'ai': 'caster'}
-}
+def _check_fields(where: str, entry, schema: Dict[str, Tuple[type, bool]], problems: List[str]) -> None:
+    """Schema-check one entry: a dict with the required fields, known fields only, right types."""
+    if not isinstance(entry, dict):
+        problems.append(f"{where}: expected a table, got {type(entry).__name__}")
+        return
+    for field, (kind, required) in schema.items():
+        if field not in entry:
+            if required:
+                problems.append(f"{where}: missing '{field}'")
+        # bool is an int subclass, so an int field must not quietly accept true/false
+        elif not isinstance(entry[field], kind) or (kind is int and isinstance(entry[field], bool)):
+            problems.append(f"{where}.{field}: expected {kind.__name__}, got {type(entry[field]).__name__}")
+    for field in entry:
+        if field not in schema:
+            problems.append(f"{where}: unknown field '{field}'")
 
-# --- Rooms ---
-rooms = {
-    'ruined_atrium': {
-        'description': 'A crumbled atrium, the empire’s broken gate. Moss chokes the stones, a bonfire sputters.',
-        'exits': {'north': 'grand_hall', 'east': 'windy_tunnel', 'west': 'shattered_vestibule'},
-        'objects': [], 
-        'enemies': [],
-        'traps': [],
-        'bonfire': True,
-        'lore': 'The empire’s welcome, now a grave marker.',
-        'chests': ['dusty_chest']
-    },
-    'windy_tunnel': {
-        'description': 'A howling tunnel of jagged rock. The wind bites like a ghost’s wail.',
-        'exits': {'west': 'ruined_atrium', 'east': 'crystal_cavern', 'north': 'ashen_gorge'},
-        'objects': ['mana_elixir'],
-        'enemies': ['shadow_beast'],
-        'traps': ['poison_gas_trap'],
-        'bonfire': False,
-        'lore': 'The air screams of lost souls.',
-        'chests': []
-    },
-    'crystal_cavern': {
-        'description': 'Crystals gleam like frozen stars, casting eerie light on bones.',
-        'exits': {'west': 'windy_tunnel', 'south': 'flooded_passage', 'north': 'ice_passage'},
-        'objects': ['crystal_staff', 'spell_scroll_fireball'],
-        'enemies': ['skeleton', 'skeleton'],
-        'traps': [],
-        'bonfire': True,
-        'lore': 'Mages bled here to bind the crystals’ power.',
-        'chests': ['rune_chest']
-    },
-    'flooded_passage': {
-        'description': 'A drowned hall, water black and still. A bridge creaks north.',
-        'exits': {'north': 'crystal_cavern', 'east': 'sunken_chamber'},
-        'objects': ['rope', 'leather_armor'],
-        'enemies': [],
-        'traps': ['thorny_vines'],
-        'bonfire': False,
-        'lore': 'The flood swallowed the unworthy.',
-        'chests': []
-    },
-    'sunken_chamber': {
-        'description': 'A submerged ruin, carvings weeping with age. A grate looms.',
-        'exits': {'west': 'flooded_passage', 'up': 'secret_trove', 'north': 'labyrinth_of_echoes'},
-        'objects': ['iron_sword'],
-        'enemies': ['mage_apprentice'],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'The walls mourn the empire’s collapse.',
-        'chests': ['shadow_chest']
-    },
-    'secret_trove': {
-        'description': 'A thief’s cache, glittering with stolen glory.',
-        'exits': {'down': 'sunken_chamber'},
-        'objects': ['emerald', 'iron_plate', 'strength_draught'],
-        'enemies': [],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'Greed’s last laugh echoes here.',
-        'chests': []
-    },
-    'grand_hall': {
-        'description': 'A vast hall of faded grandeur, pillars cracked like old bones.',
-        'exits': {'south': 'ruined_atrium', 'north': 'throne_antechamber', 'west': 'dark_abyss', 'east': 'library'},
-        'objects': ['torch', 'chain_vest'],
-        'enemies': [],
-        'traps': [],
-        'bonfire': True,
-        'lore': 'Kings feasted here; now silence reigns.',
-        'chests': []
-    },
-    'dark_abyss': {
-        'description': 'A pit of black despair, alive with skittering dread.',
-        'exits': {'east': 'grand_hall', 'north': 'hidden_vault', 'south': 'relic_vault'},
-        'objects': ['golden_key', 'shadow_blade'],
-        'enemies': ['shadow_beast'],
-        'traps': ['false_floor'],
-        'bonfire': False,
-        'lore': 'The abyss devoured the empire’s sins.',
-        'chests': [],
-        'puzzle': {'riddle': 'The more of me you take, the more you leave behind. What am I?', 'answer': 'footsteps', 'reward': 'void_guard'}
-    },
-    'hidden_vault': {
-        'description': 'A hollow vault, its treasure long plundered.',
-        'exits': {'south': 'dark_abyss', 'east': 'forge_of_the_ancients'},
-        'objects': ['silver_coin', 'iron_ore', 'mana_elixir'],
-        'enemies': [],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'A tomb for what once was.',
-        'chests': ['dusty_chest']
-    },
-    'library': {
-        'description': 'Shelves groan under dust and secrets, a tome pulsing faintly.',
-        'exits': {'west': 'grand_hall', 'north': 'oracle_chamber', 'east': 'arcane_sanctum'},
-        'objects': ['arcane_tome', 'spell_scroll_frost_bolt'],
-        'enemies': ['mage_apprentice'],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'Knowledge rots here, unclaimed.',
-        'chests': []
-    },
-    'oracle_chamber': {
-        'description': 'The Oracle looms, a statue of cryptic silence.',
-        'exits': {'south': 'library', 'west': 'tower_of_the_mage'},
-        'objects': ['rune_key', 'ruby_ring'],
-        'enemies': [],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'The Oracle saw the end and said nothing.',
-        'chests': [],
-        'puzzle': {'riddle': 'I speak without a mouth and hear without ears. What am I?', 'answer': 'echo', 'reward': 'shadow_blade'}
-    },
-    'throne_antechamber': {
-        'description': 'A cracked marble hall, prelude to royal ruin.',
-        'exits': {'south': 'grand_hall', 'north': 'throne_room'},
-        'objects': ['mage_cloak'],
-        'enemies': ['guardian'],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'Guards bled here for a dead king.',
-        'chests': []
-    },
-    'throne_room': {
-        'description': 'A throne of cold stone, flanked by shattered statues.',
-        'exits': {'south': 'throne_antechamber', 'west': 'chamber_of_trials', 'north': 'relic_vault'},
-        'objects': ['crown', 'gleaming_sword'],
-        'enemies': ['guardian'],
-        'traps': [],
-        'bonfire': True,
-        'lore': 'Betrayal was crowned here.',
-        'chests': []
-    },
-    'forge_of_the_ancients': {
-        'description': 'A smithy of eternal flame, anvil scarred by legend.',
-        'exits': {'west': 'hidden_vault', 'north': 'forgotten_mines', 'south': 'lava_chamber'},
-        'objects': ['forge_hammer', 'flame_spear'],
-        'enemies': ['golem'],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'Steel sang here, now it rusts.',
-        'chests': [],
-        'crafting_station': True
-    },
-    'garden_of_shadows': {
-        'description': 'A festering tangle of thorns and rot, alive with malice.',
-        'exits': {'west': 'crypt_of_the_fallen', 'south': 'deep_cavern'},
-        'objects': ['poison_antidote', 'shadow_mail'],
-        'enemies': ['shadow_beast', 'shadow_beast'],
-        'traps': ['thorny_vines'],
-        'bonfire': False,
-        'lore': 'Beauty died here, choked by darkness.',
-        'chests': []
-    },
-    'crypt_of_the_fallen': {
-        'description': 'A crypt of restless dead, tombs cracked and weeping.',
-        'exits': {'south': 'grand_hall', 'east': 'garden_of_shadows'},
-        'objects': ['ancient_key', 'bone_scythe'],
-        'enemies': ['skeleton', 'skeleton'],
-        'traps': ['poison_gas_trap'],
-        'bonfire': False,
-        'lore': 'The fallen guard their shame.',
-        'chests': ['shadow_chest'],
-        'puzzle': {'riddle': 'I am taken from a mine, shut in a wooden case, never released, yet used by all. What am I?', 'answer': 'graphite', 'reward': 'gleaming_sword'}
-    },
-    'tower_of_the_mage': {
-        'description': 'A spire of cracked stone, buzzing with old magic.',
-        'exits': {'down': 'oracle_chamber', 'up': 'labyrinth_of_echoes'},
-        'objects': ['spell_scroll_levitation', 'sapphire_amulet'],
-        'enemies': ['mage_apprentice', 'mage_apprentice'],
-        'traps': ['magical_runes'],
-        'bonfire': False,
-        'lore': 'A mage’s pride crumbled here.',
-        'chests': []
-    },
-    'labyrinth_of_echoes': {
-        'description': 'A maze of stone and madness, echoes twisting your mind.',
-        'exits': {'down': 'tower_of_the_mage', 'south': 'sunken_chamber'},
-        'objects': ['thunder_mace'],
-        'enemies': ['minotaur'],
-        'traps': ['false_floor'],
-        'bonfire': False,
-        'lore': 'Lost souls wander these turns.',
-        'chests': []
-    },
-    'chamber_of_trials': {
-        'description': 'A gauntlet of riddles and ruin, testing the bold.',
-        'exits': {'east': 'throne_room'},
-        'objects': ['rune_of_passage', 'endurance_vial'],
-        'enemies': ['guardian'],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'Only the cunning survive this crucible.',
-        'chests': [],
-        'puzzle': {'riddle': 'I am full of holes, yet hold water. What am I?', 'answer': 'sponge', 'reward': 'void_axe'}
-    },
-    'shattered_vestibule': {
-        'description': 'A hall of fractured mirrors, reflecting broken fates.',
-        'exits': {'east': 'ruined_atrium', 'north': 'echoing_crypt'},
-        'objects': ['healing_potion'],
-        'enemies': ['wraith'],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'Vanity’s shards cut deep.',
-        'chests': []
-    },
-    'echoing_crypt': {
-        'description': 'A crypt where every sound haunts, tombs agape.',
-        'exits': {'south': 'shattered_vestibule', 'west': 'shadow_vault'},
-        'objects': ['bone_plate'],
-        'enemies': ['skeleton', 'wraith'],
-        'traps': ['poison_gas_trap'],
-        'bonfire': False,
-        'lore': 'The dead chorus never fades.',
-        'chests': []
-    },
-    'shadow_vault': {
-        'description': 'A vault of eternal night, hoarding cursed spoils.',
-        'exits': {'east': 'echoing_crypt', 'north': 'ice_passage'},
-        'objects': ['emerald_clasp', 'ice_dagger'],
-        'enemies': ['shadow_beast'],
-        'traps': ['false_floor'],
-        'bonfire': False,
-        'lore': 'Darkness sealed its treasures here.',
-        'chests': ['rune_chest']
-    },
-    'ice_passage': {
-        'description': 'A frozen vein of the empire, ice sharp as blades.',
-        'exits': {'south': 'shadow_vault', 'north': 'frozen_lair', 'west': 'crystal_cavern'},
-        'objects': ['dragon_key'],
-        'enemies': ['ice_wyrm'],
-        'traps': ['ice_spikes'],
-        'bonfire': True,
-        'lore': 'Cold guards its own.',
-        'chests': []
-    },
-    'frozen_lair': {
-        'description': 'A lair of frost and fury, dragon’s breath frozen in time.',
-        'exits': {'south': 'ice_passage', 'east': 'lava_chamber', 'north': 'frosted_depths'},
-        'objects': ['dragon_tooth'],
-        'enemies': ['ice_wyrm'],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'A wyrm’s tomb, icy and unyielding.',
-        'chests': ['dragon_hoard'],
-        'puzzle': {'riddle': 'I can fly without wings, cry without eyes, and be caught but never held. What am I?', 'answer': 'snowflake', 'reward': 'frost_glaive'}
-    },
-    'lava_chamber': {
-        'description': 'A hellscape of molten rivers, heat choking the air.',
-        'exits': {'west': 'frozen_lair', 'north': 'forge_of_the_ancients', 'east': 'cinder_halls'},
-        'objects': ['fire_tonic', 'ashen_bow'],
-        'enemies': ['drake'],
-        'traps': ['lava_flow'],
-        'bonfire': False,
-        'lore': 'Fire forged the empire’s wrath.',
-        'chests': []
-    },
-    'arcane_sanctum': {
-        'description': 'A sanctum of humming runes, magic thick as blood.',
-        'exits': {'west': 'library', 'east': 'mana_well'},
-        'objects': ['rune_shroud', 'spell_scroll_soul_drain'],
-        'enemies': ['necromancer'],
-        'traps': ['magical_runes'],
-        'bonfire': False,
-        'lore': 'Spells were born in this crucible.',
-        'chests': [],
-        'puzzle': {'riddle': 'I am always running but never move. What am I?', 'answer': 'shadow', 'reward': 'crystal_staff'}
-    },
-    'mana_well': {
-        'description': 'A well of liquid mana, glowing with forbidden light.',
-        'exits': {'west': 'arcane_sanctum', 'north': 'relic_vault'},
-        'objects': ['mana_elixir', 'skull_charm'],
-        'enemies': [],
-        'traps': [],
-        'bonfire': True,
-        'lore': 'The empire drank deep from this font.',
-        'chests': []
-    },
-    'forgotten_mines': {
-        'description': 'Tunnels of dust and despair, ore veins long dead.',
-        'exits': {'south': 'forge_of_the_ancients', 'east': 'deep_cavern'},
-        'objects': ['thunder_mace', 'rune_stone'],
-        'enemies': ['golem'],
-        'traps': ['collapsing_ceiling'],
-        'bonfire': False,
-        'lore': 'Miners woke what should’ve slept.',
-        'chests': []
-    },
-    'deep_cavern': {
-        'description': 'A cavern of dripping fangs, shadows thick with menace.',
-        'exits': {'west': 'forgotten_mines', 'north': 'garden_of_shadows', 'south': 'relic_vault', 'east': 'void_chasm'},
-        'objects': ['void_guard'],
-        'enemies': ['drake'],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'The deep hides its own kings.',
-        'chests': ['dusty_chest']
-    },
-    'relic_vault': {
-        'description': 'A sanctum of power, the Relic of Ages pulsing on its dais.',
-        'exits': {'south': 'throne_room', 'north': 'mana_well', 'east': 'deep_cavern', 'west': 'dark_abyss'},
-        'objects': ['relic_of_ages'],
-        'enemies': ['relic_warden'],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'The empire’s soul rests here, fiercely guarded.',
-        'chests': []
-    },
-    'ashen_gorge': {
-        'description': 'A ravine of soot and cinders, air thick with ash.',
-        'exits': {'north': 'windy_tunnel', 'south': 'bleak_ruins'},
-        'objects': ['ashen_hide', 'fire_tonic'],
-        'enemies': ['ashen_hound'],
-        'traps': ['lava_flow'],
-        'bonfire': False,
-        'lore': 'Fire scarred this wound in the earth.',
-        'chests': ['cinder_box']
-    },
-    'bleak_ruins': {
-        'description': 'A husk of crumbled walls, ash drifting like snow.',
-        'exits': {'north': 'ashen_gorge', 'east': 'wraith_spire'},
-        'objects': ['cinder_claw'],
-        'enemies': [],
-        'traps': [],
-        'bonfire': True,
-        'lore': 'Once a stronghold, now a whisper.',
-        'chests': []
-    },
-    'wraith_spire': {
-        'description': 'A twisted spire piercing the gloom, wraiths circling.',
-        'exits': {'west': 'bleak_ruins', 'north': 'soul_pit'},
-        'objects': ['spell_scroll_ash_cloud'],
-        'enemies': ['wraith', 'wraith'],
-        'traps': ['magical_runes'],
-        'bonfire': False,
-        'lore': 'Spirits guard this forsaken peak.',
-        'chests': []
-    },
-    'soul_pit': {
-        'description': 'A pit of moaning souls, air heavy with despair.',
-        'exits': {'south': 'wraith_spire', 'east': 'relic_vault'},
-        'objects': ['soul_weave', 'void_key'],
-        'enemies': ['necromancer'],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'The damned linger here, unfreed.',
-        'chests': ['void_coffer']
-    },
-    'cinder_halls': {
-        'description': 'Halls of scorched stone, embers glowing in cracks.',
-        'exits': {'west': 'lava_chamber', 'north': 'ember_vault'},
-        'objects': ['ashen_ember'],
-        'enemies': ['ashen_hound'],
-        'traps': ['lava_flow'],
-        'bonfire': False,
-        'lore': 'Fire’s echo haunts these walls.',
-        'chests': []
-    },
-    'ember_vault': {
-        'description': 'A vault of smoldering wealth, heat pulsing from within.',
-        'exits': {'south': 'cinder_halls', 'east': 'relic_vault'},
-        'objects': ['rune_blade', 'fire_tonic'],
-        'enemies': ['drake'],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'Treasures burn here, untaken.',
-        'chests': ['cinder_box']
-    },
-    'frosted_depths': {
-        'description': 'A frozen expanse, ice cracking underfoot.',
-        'exits': {'south': 'frozen_lair', 'north': 'glacial_tomb'},
-        'objects': ['frost_glaive'],
-        'enemies': ['frost_specter'],
-        'traps': ['ice_spikes'],
-        'bonfire': False,
-        'lore': 'Cold claims all who linger.',
-        'chests': []
-    },
-    'glacial_tomb': {
-        'description': 'A tomb of ice, its chill eternal.',
-        'exits': {'south': 'frosted_depths', 'west': 'relic_vault'},
-        'objects': ['frost_mail', 'ice_draught'],
-        'enemies': ['ice_wyrm'],
-        'traps': [],
-        'bonfire': True,
-        'lore': 'A frozen king rests here, unyielding.',
-        'chests': []
-    },
-    'void_chasm': {
-        'description': 'A gaping maw of darkness, swallowing light.',
-        'exits': {'east': 'deep_cavern', 'north': 'abyssal_rift'},
-        'objects': ['abyssal_whip'],
-        'enemies': ['void_stalker'],
-        'traps': ['false_floor'],
-        'bonfire': False,
-        'lore': 'The void hungers for more.',
-        'chests': []
-    },
-    'abyssal_rift': {
-        'description': 'A tear in reality, shadows writhing within.',
-        'exits': {'south': 'void_chasm', 'west': 'relic_vault'},
-        'objects': ['spell_scroll_void_pull', 'shadow_essence'],
-        'enemies': ['void_stalker'],
-        'traps': [],
-        'bonfire': False,
-        'lore': 'The empire’s end began here.',
-        'chests': ['void_coffer']
-    }
-}
+def check_content(content: Dict[str, Dict]) -> Tuple[List[str], List[str]]:
+    """Schema and cross-reference checks over merged content; returns (problems, warnings)."""
+    problems: List[str] = []
+    warnings: List[str] = []
+    for table, schema in CONTENT_SCHEMA.items():
+        for name, entry in content.get(table, {}).items():
+            _check_fields(f"{table}.{name}", entry, schema, problems)
+    if problems:  # Cross-references assume well-formed entries
+        return problems, warnings
+
+    rooms, chests, recipes = content['rooms'], content['chests'], content['crafting_recipes']
+    items = {name for table in ITEM_TABLES for name in content[table]} | set(recipes)
+    items |= {SCROLL_PREFIX + spell for spell in content['spells']}
+    sources: Dict[str, List[str]] = {}  # Where each item can be picked up
+    for room_name, room in rooms.items():
+        for item in room.get('objects', ()):
+            sources.setdefault(item, []).append(f"room {room_name}")
+        if 'puzzle' in room:
+            sources.setdefault(room['puzzle']['reward'], []).append(f"puzzle in {room_name}")
+    for chest_name, chest in chests.items():
+        for item in chest['contents']:
+            sources.setdefault(item, []).append(f"chest {chest_name}")
+
+    def known_item(where: str, item: str) -> None:
+        if item not in items:
+            problems.append(f"{where}: unknown item '{item}'")
+
+    for room_name, room in rooms.items():
+        where = f"rooms.{room_name}"
+        for direction, target in room['exits'].items():
+            if target not in rooms:
+                problems.append(f"{where}.exits.{direction}: no room '{target}'")
+        for field, table in (('enemies', 'enemies'), ('traps', 'traps'), ('chests', 'chests')):
+            for name in room.get(field, ()):
+                if name not in content[table]:
+                    problems.append(f"{where}.{field}: no {table[:-1]} '{name}'")
+        for item in room.get('objects', ()):
+            known_item(f"{where}.objects", item)
+        if 'puzzle' in room:
+            _check_fields(f"{where}.puzzle", room['puzzle'], PUZZLE_SCHEMA, problems)
+            if isinstance(room['puzzle'].get('reward'), str):
+                known_item(f"{where}.puzzle.reward", room['puzzle']['reward'])
+    for chest_name, chest in chests.items():
+        for item in chest['contents']:
+            known_item(f"chests.{chest_name}.contents", item)
+        if chest['locked']:
+            key = chest.get('key')
+            if key is None:
+                problems.append(f"chests.{chest_name}: locked but has no key")
+            elif not [source for source in sources.get(key, ()) if source != f"chest {chest_name}"]:
+                problems.append(f"chests.{chest_name}.key: '{key}' is never found outside the chest")
+    for recipe_name, recipe in recipes.items():
+        for ingredient, count in recipe['ingredients'].items():
+            known_item(f"crafting_recipes.{recipe_name}.ingredients", ingredient)
+            if not isinstance(count, int) or count < 1:
+                problems.append(f"crafting_recipes.{recipe_name}.ingredients.{ingredient}: count must be a positive int")
+            elif ingredient not in sources and ingredient not in recipes:
+                warnings.append(f"crafting_recipes.{recipe_name}: '{ingredient}' is never found or crafted")
+    for enemy_name, enemy in content['enemies'].items():
+        if enemy['ai'] not in AI_SPECIAL_CHANCE:
+            problems.append(f"enemies.{enemy_name}.ai: unknown AI '{enemy['ai']}'")
+    for trap_name, trap in content['traps'].items():
+        if 'ward' in trap and not any(trap['ward'] in trinket for trinket in content['trinkets'].values()):
+            warnings.append(f"traps.{trap_name}.ward: no trinket carries '{trap['ward']}'")
+    for weapon, *_ in STARTING_WEAPONS.values():
+        if weapon not in content['weapons']:
+            problems.append(f"weapons: starting weapon '{weapon}' is missing")
+    for room_name in (START_ROOM, VICTORY_ROOM):
+        if room_name not in rooms:
+            problems.append(f"rooms: '{room_name}' is required")
+    if VICTORY_ITEM not in sources:
+        problems.append(f"'{VICTORY_ITEM}' is never found, so the game cannot be won")
+
+    # Recipes must not need themselves, however indirectly
+    state: Dict[str, int] = {}  # 1 while on the current path, 2 once finished
+    def visit(name: str, path: List[str]) -> None:
+        if state.get(name) == 2 or name not in recipes:
+            return
+        if state.get(name) == 1:
+            problems.append("crafting_recipes: cycle " + " -> ".join(path[path.index(name):] + [name]))
+            return
+        state[name] = 1
+        for ingredient in recipes[name]['ingredients']:
+            visit(ingredient, path + [name])
+        state[name] = 2
+    for name in recipes:
+        visit(name, [])
+    return problems, warnings
+
+def _intern(value):
+    """Intern every string in a content tree so names compare and hash by identity."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {sys.intern(k): _intern(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_intern(v) for v in value]
+    return value
+
+def _read_pack(path: str, data: bytes) -> Dict:
+    """Parse one pack file's bytes."""
+    if path.endswith('.toml'):
+        return tomllib.loads(data.decode('utf-8'))
+    return json.loads(data)
+
+def compile_content(packs: List[Tuple[str, bytes]]) -> Tuple[Dict[str, Dict], List[str]]:
+    """Parse, merge, validate and intern packs; raises ContentError listing every problem."""
+    content: Dict[str, Dict] = {table: {} for table in CONTENT_SCHEMA}
+    problems: List[str] = []
+    for path, data in packs:
+        name = os.path.basename(path)
+        try:
+            pack = _read_pack(path, data)
+        except (ValueError, UnicodeDecodeError) as e:  # JSONDecodeError and TOMLDecodeError are ValueErrors
+            problems.append(f"{name}: cannot parse: {e}")
+            continue
+        for table, entries in pack.items():
+            if table not in CONTENT_SCHEMA:
+                problems.append(f"{name}: unknown table '{table}'")
+            elif not isinstance(entries, dict):
+                problems.append(f"{name}: '{table}' must be a table of entries")
+            else:
+                content[table].update(entries)
+    if not problems:
+        found, warnings = check_content(content)
+        problems.extend(found)
+    if problems:
+        raise ContentError(problems)
+    return _intern(content), warnings
+
+def load_content(directory: Optional[str] = None) -> Dict[str, Dict]:
+    """Content from the packs in directory, from the compiled cache when it is still current.
+
+    The cache is trusted outright when every pack's mtime and size match; if
+    only mtimes moved, the packs are hashed and the cache is still used when
+    the hashes match. Anything else recompiles, then rewrites the cache.
+    """
+    directory = directory or get_content_dir()
+    paths = content_packs(directory)
+    stamps = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            raise ContentError([f"{os.path.basename(path)}: missing from {directory}"])
+        stamps.append((os.path.basename(path), st.st_mtime_ns, st.st_size))
+    key = (CONTENT_FORMAT, VERSION, marshal.version, tuple(sys.version_info[:2]))
+    cache_path = os.path.join(directory, CONTENT_CACHE)
+    cached = None
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    if cached and cached.get('key') == key and cached.get('stamps') == stamps:
+        return cached['content']
+
+    packs = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            packs.append((path, f.read()))
+    hashes = [hashlib.sha256(data).hexdigest() for _, data in packs]
+    if cached and cached.get('key') == key and cached.get('hashes') == hashes:
+        content = cached['content']
+    else:
+        content, _ = compile_content(packs)
+    try:
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            marshal.dump({'key': key, 'stamps': stamps, 'hashes': hashes, 'content': content}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # A read-only install just compiles on every start
+    return content
+
+def check_content_packs(directory: Optional[str] = None) -> bool:
+    """Validate the content packs from scratch and report what they hold."""
+    directory = directory or get_content_dir()
+    packs = []
+    for path in content_packs(directory):
+        with open(path, 'rb') as f:
+            packs.append((path, f.read()))
+    started = time.perf_counter()
+    try:
+        content, warnings = compile_content(packs)
+    except ContentError as e:
+        print(e)
+        return False
+    elapsed = time.perf_counter() - started
+    print(f"Packs: {', '.join(os.path.basename(path) for path, _ in packs)}")
+    print(', '.join(f"{len(entries)} {table}" for table, entries in content.items()))
+    for warning in warnings:
+        print(f"Warning: {warning}")
+    print(f"Parsed and validated in {elapsed * 1000:.1f} ms.")
+    started = time.perf_counter()
+    load_content(directory)
+    print(f"Warm load from {CONTENT_CACHE} in {(time.perf_counter() - started) * 1000:.2f} ms.")
+    return True
+
+CONTENT = load_content()
+weapons = CONTENT['weapons']
+armor = CONTENT['armor']
+spells = CONTENT['spells']
+trinkets = CONTENT['trinkets']
+consumables = CONTENT['consumables']
+materials = CONTENT['materials']
+chests = CONTENT['chests']
+crafting_recipes = CONTENT['crafting_recipes']
+enemies = CONTENT['enemies']
+traps = CONTENT['traps']
+rooms = CONTENT['rooms']
+# Flat rows in Combatant.FIELDS order, so spawning a foe is one tuple unpack
+ENEMY_TEMPLATES = {key: tuple(data[field] for field in Combatant.FIELDS) for key, data in enemies.items()}
 
-# --- Global State ---
-current_room = 'ruined_atrium'
-last_bonfire = 'ruined_atrium'
-master_enemies = {
-    'windy_tunnel': ['shadow_beast'],
-    'crystal_cavern': ['skeleton', 'skeleton'],
-    'sunken_chamber': ['mage_apprentice'],
-    'dark_abyss': ['shadow_beast'],
-    'library': ['mage_apprentice'],
-    'throne_room': ['guardian'],
-    'forge_of_the_ancients': ['golem'],
-    'garden_of_shadows': ['shadow_beast', 'shadow_beast'],
-    'crypt_of_the_fallen': ['skeleton', 'skeleton'],
-    'tower_of_the_mage': ['mage_apprentice', 'mage_apprentice'],
-    'labyrinth_of_echoes': ['minotaur'],
-    'chamber_of_trials': ['guardian'],
-    'shattered_vestibule': ['wraith'],
-    'echoing_crypt': ['skeleton', 'wraith'],
-    'shadow_vault': ['shadow_beast'],
-    'ice_passage': ['ice_wyrm'],
-    'frozen_lair': ['ice_wyrm'],
-    'lava_chamber': ['drake'],
-    'arcane_sanctum': ['necromancer'],
-    'mana_well': [],
-    'throne_antechamber': ['guardian'],
-    'forgotten_mines': ['golem'],
-    'deep_cavern': ['drake'],
-    'relic_vault': ['relic_warden'],
-    'ashen_gorge': ['ashen_hound'],
-    'bleak_ruins': [],
-    'wraith_spire': ['wraith', 'wraith'],
-    'soul_pit': ['necromancer'],
-    'cinder_halls': ['ashen_hound'],
-    'ember_vault': ['drake'],
-    'frosted_depths': ['frost_specter'],
-    'glacial_tomb': ['ice_wyrm'],
-    'void_chasm': ['void_stalker'],
-    'abyssal_rift': ['void_stalker']
-}
-active_effects: Dict[str, Dict] = {}
+
+# --- World State ---
+MUTABLE_ROOM_FIELDS = ('objects', 'enemies', 'traps', 'chests')
+
+def chest_key(room_name: str, chest_name: str) -> str:
+    """How an emptied chest is recorded: generated worlds reuse chest names, so the room is part of it."""
+    return f"{room_name}/{chest_name}"
+
+def freeze_table(table: Dict[str, Dict]) -> Mapping[str, Mapping]:
+    """Make a shared, read-only copy of a content table: dicts become proxies, lists become tuples."""
+    def freeze(value):
+        if isinstance(value, dict):
+            return MappingProxyType({k: freeze(v) for k, v in value.items()})
+        if isinstance(value, list):
+            return tuple(freeze(v) for v in value)
+        return value
+    return freeze(table)
+
+# Every session reads rooms and chests from these shared tables and records its
+# own changes in a WorldState overlay, so the tables themselves never change.
+rooms = freeze_table(rooms)
+chests = freeze_table(chests)
+
+# --- World Graph ---
+GRAPH_KEEP_ALL_LIMIT = 2000    # Worlds up to this many rooms keep every next-hop table once built
+ROUTE_CACHE_SIZE = 256         # Destinations whose next-hop tables large worlds keep warm
+
+class WorldGraph:
+    """Adjacency index over a world's exits with shortest-path routing.
+
+    Rooms are numbered once and their exits become (direction, room index)
+    tuples. Routing uses next-hop tables: for a destination, one BFS over the
+    reversed exits records which exit every room should take to get one step
+    closer. Tables are built on demand, the first time a route leads to that
+    room, so building the graph stays linear in the world. Small worlds keep
+    every table they build (growing into all-pairs shortest paths); large
+    ones keep the most recent ROUTE_CACHE_SIZE, so memory stays linear in the
+    world. Either way a route is then walked in O(path length).
+    """
+
+    def __init__(self, world: Mapping[str, Mapping]) -> None:
+        names = list(world)
+        index = {name: i for i, name in enumerate(names)}
+        exits = [tuple((d, index[dest]) for d, dest in world[name]['exits'].items() if dest in index) for name in names]
+        self._link(names, index, exits)
+
+    @classmethod
+    def from_exits(cls, names: List[str], exits: List[Tuple[Tuple[str, int], ...]]) -> 'WorldGraph':
+        """A graph over exits already numbered by room index, without reading any room."""
+        graph = cls.__new__(cls)
+        graph._link(names, {name: i for i, name in enumerate(names)}, exits)
+        return graph
+
+    def _link(self, names: List[str], index: Dict[str, int], exits: List[Tuple[Tuple[str, int], ...]]) -> None:
+        self.names = names
+        self.index = index
+        self.exits = exits
+        self.incoming: List[List[Tuple[int, int]]] = [[] for _ in names]
+        for source, room_exits in enumerate(exits):
+            for position, (_, dest) in enumerate(room_exits):
+                self.incoming[dest].append((source, position))
+        self._next_hops: 'OrderedDict[int, array]' = OrderedDict()
+        self.keep_all = len(self.names) <= GRAPH_KEEP_ALL_LIMIT
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, room_name: str) -> bool:
+        return room_name in self.index
+
+    def exits_of(self, room_name: str) -> List[Tuple[str, str]]:
+        """(direction, destination) pairs for a room."""
+        return [(d, self.names[dest]) for d, dest in self.exits[self.index[room_name]]]
+
+    def _bfs_toward(self, dest: int) -> array:
+        """Exit position each room takes to step toward dest (-1: unreachable or dest itself)."""
+        hops = array('i', [-1]) * len(self.names)
+        seen = bytearray(len(self.names))
+        seen[dest] = 1
+        frontier = [dest]
+        while frontier:
+            next_frontier = []
+            for room in frontier:
+                for source, position in self.incoming[room]:
+                    if not seen[source]:
+                        seen[source] = 1
+                        hops[source] = position
+                        next_frontier.append(source)
+            frontier = next_frontier
+        return hops
+
+    def _toward(self, dest: int) -> array:
+        hops = self._next_hops.get(dest)
+        if hops is None:
+            hops = self._next_hops[dest] = self._bfs_toward(dest)
+            if not self.keep_all and len(self._next_hops) > ROUTE_CACHE_SIZE:
+                self._next_hops.popitem(last=False)
+        elif not self.keep_all:
+            self._next_hops.move_to_end(dest)
+        return hops
+
+    def route(self, start: str, goal: str) -> Optional[List[Tuple[str, str]]]:
+        """Shortest list of (direction, room) steps from start to goal, or None if unreachable."""
+        source, dest = self.index[start], self.index[goal]
+        if source == dest:
+            return []
+        hops = self._toward(dest)
+        if hops[source] < 0:
+            return None
+        steps = []
+        while source != dest:
+            direction, source = self.exits[source][hops[source]]
+            steps.append((direction, self.names[source]))
+        return steps
+
+# One routing index for the shipped world, shared by every session
+WORLD_GRAPH = WorldGraph(rooms)
+
+class WorldState:
+    """A session's copy-on-write view of the shared world.
+
+    Only what the session changes is stored: a room's field is copied into
+    the overlay the first time it is modified (object taken, enemy slain,
+    trap sprung, chest opened), plus the sets of solved puzzles and emptied
+    chests. Everything else is read straight from the shared tables.
+
+    Respawns are lazy: a death only bumps the respawn generation, and a room
+    whose slain enemies date from an older generation gets its roster back
+    the next time it is entered.
+    """
+
+    def __init__(self, base: Mapping[str, Mapping] = rooms, graph: Optional[WorldGraph] = None) -> None:
+        self.base = base
+        self._graph = graph
+        self.changes: Dict[str, Dict[str, List[str]]] = {}
+        self.solved_puzzles: set = set()
+        self.emptied_chests: set = set()
+        self.generation = 0
+        self.roster_generation: Dict[str, int] = {}  # Generation each room's roster was last changed in
+        self.log: Optional[List[List]] = None  # Pending journal ops while a save journal is attached
+
+    @property
+    def graph(self) -> WorldGraph:
+        """The routing index, built the first time something routes or maps."""
+        if self._graph is None:
+            if self.base is rooms:
+                self._graph = WORLD_GRAPH
+            elif isinstance(self.base, IndexedWorld):
+                self._graph = self.base.graph()
+            else:
+                self._graph = WorldGraph(self.base)
+        return self._graph
+
+    def _record(self, *op) -> None:
+        if self.log is not None:
+            self.log.append(list(op))
+
+    def __contains__(self, room_name: str) -> bool:
+        return room_name in self.base
+
+    def get(self, room_name: str, field: str) -> Sequence[str]:
+        """Current value of one mutable field of a room."""
+        changed = self.changes.get(room_name)
+        if changed is not None and field in changed:
+            return changed[field]
+        return self.base[room_name].get(field, ())
+
+    def room(self, room_name: str) -> Dict:
+        """A read-only snapshot of a room with this session's changes applied."""
+        view = dict(self.base[room_name])
+        view.update(self.changes.get(room_name, {}))
+        if room_name in self.solved_puzzles:
+            view.pop('puzzle', None)
+        return view
+
+    def _own(self, room_name: str, field: str) -> List[str]:
+        """Copy a field into the overlay on first write and return the session's own list."""
+        changed = self.changes.setdefault(room_name, {})
+        if field not in changed:
+            changed[field] = list(self.base[room_name].get(field, ()))
+        if field == 'enemies':
+            self.roster_generation[room_name] = self.generation
+        return changed[field]
+
+    def add(self, room_name: str, field: str, value: str) -> None:
+        self._own(room_name, field).append(value)
+        self._record('add', room_name, field, value)
+
+    def remove(self, room_name: str, field: str, value: str) -> None:
+        self._own(room_name, field).remove(value)
+        self._record('remove', room_name, field, value)
+
+    def reset(self, room_name: str, field: str) -> None:
+        """Forget the session's changes to one field, restoring the shared value."""
+        changed = self.changes.get(room_name)
+        if changed and field in changed:
+            del changed[field]
+            if not changed:
+                del self.changes[room_name]
+            if field == 'enemies':
+                self.roster_generation.pop(room_name, None)
+            self._record('reset', room_name, field)
+
+    def respawn(self) -> None:
+        """Bring every slain enemy back; rooms catch up one at a time as they are entered."""
+        self.generation += 1
+        self._record('respawn')
+
+    def _stale(self, room_name: str) -> bool:
+        return self.roster_generation.get(room_name, 0) < self.generation
+
+    def refresh(self, room_name: str) -> None:
+        """Restore a room's roster if enemies have respawned since it was last fought in."""
+        if self._stale(room_name):
+            self.reset(room_name, 'enemies')
+
+    def solve_puzzle(self, room_name: str) -> None:
+        """Mark a room's puzzle solved and reveal its reward."""
+        self.solved_puzzles.add(room_name)
+        self._own(room_name, 'objects').append(self.base[room_name]['puzzle']['reward'])
+        self._record('solve_puzzle', room_name)
+
+    def chest_contents(self, room_name: str, chest_name: str) -> Sequence[str]:
+        return () if chest_key(room_name, chest_name) in self.emptied_chests else chests[chest_name]['contents']
+
+    def empty_chest(self, room_name: str, chest_name: str) -> None:
+        self.emptied_chests.add(chest_key(room_name, chest_name))
+        self._record('empty_chest', room_name, chest_name)
+
+    def _legacy_chest_keys(self, chest_names: Sequence[str]) -> set:
+        """Keys for chests older saves emptied by name alone: that chest in every room it starts in."""
+        names = {name for name in chest_names if name in chests}
+        return {chest_key(room_name, name) for room_name in self.base
+                for name in self.base[room_name].get('chests', ()) if name in names}
+
+    def replay(self, ops: List[List]) -> None:
+        """Re-apply journaled ops (method name plus arguments) without journaling them again."""
+        log, self.log = self.log, None
+        try:
+            for name, *op_args in ops:
+                if name == 'empty_chest' and len(op_args) == 1:  # Journaled before chests were keyed by room
+                    self.emptied_chests.update(self._legacy_chest_keys(op_args))
+                elif name in ('add', 'remove', 'reset', 'respawn', 'solve_puzzle', 'empty_chest'):
+                    getattr(self, name)(*op_args)
+        finally:
+            self.log = log
+
+    def to_dict(self) -> Dict:
+        """The overlay as plain JSON-ready data, sharing no lists with the live world; this is what saves record.
+
+        Rosters left over from before a respawn are dropped, so a save never
+        needs the respawn generation: everything it keeps is current.
+        """
+        changes = {}
+        for room_name, fields in self.changes.items():
+            stale = self._stale(room_name)
+            kept = {field: list(values) for field, values in fields.items() if not (stale and field == 'enemies')}
+            if kept:
+                changes[room_name] = kept
+        return {
+            'changes': changes,
+            'solved_puzzles': sorted(self.solved_puzzles),
+            'emptied_chests': sorted(self.emptied_chests)
+        }
+
+    def load(self, data: Dict, say=print) -> None:
+        """Replace the overlay with saved data, skipping (and reporting) rooms this world lacks."""
+        self.changes = {}
+        self.generation = 0
+        self.roster_generation = {}
+        for room_name, fields in data.get('changes', {}).items():
+            if room_name not in self.base:
+                say(f"Warning: Unknown room '{room_name}' in save file, skipping.")
+                continue
+            self.changes[room_name] = {f: list(v) for f, v in fields.items() if f in MUTABLE_ROOM_FIELDS}
+        self.solved_puzzles = {r for r in data.get('solved_puzzles', []) if r in self.base}
+        self.emptied_chests = set()
+        legacy = []
+        for key in data.get('emptied_chests', []):
+            room_name, keyed, chest_name = key.rpartition('/')
+            if not keyed:
+                legacy.append(key)
+            elif room_name in self.base and chest_name in chests:
+                self.emptied_chests.add(key)
+        if legacy:
+            self.emptied_chests.update(self._legacy_chest_keys(legacy))
+
+    def load_legacy_rooms(self, saved_rooms: Dict[str, Dict], say=print) -> None:
+        """Rebuild the overlay from an old full-table save, keeping only what differs."""
+        self.load({})
+        for room_name, data in saved_rooms.items():
+            if room_name not in self.base:
+                say(f"Warning: Unknown room '{room_name}' in save file, skipping.")
+                continue
+            for field in ('enemies', 'objects', 'chests'):
+                if field in data and tuple(data[field]) != tuple(self.base[room_name].get(field, ())):
+                    self.changes.setdefault(room_name, {})[field] = list(data[field])
+
+# --- World Generator ---
+WORLD_FORMAT = 1
+WORLD_LAYOUTS = ('grid', 'comb')
+GEN_ENEMY_CHANCE = 0.3
+GEN_OBJECT_CHANCE = 0.2
+GEN_TRAP_CHANCE = 0.05
+GEN_CHEST_CHANCE = 0.02
+GEN_BONFIRE_CHANCE = 0.03
+GEN_JOIN_CHANCE = 0.5     # Grid: chance of opening a wall between two unconnected neighbours in a row
+GEN_LOOP_CHANCE = 0.05    # Grid: chance of opening one between neighbours already connected, making cycles
+GEN_DESCEND_CHANCE = 0.3  # Grid: chance of a passage south beyond the one each connected region needs
+
+def _grid_exits(room_count: int, rng: random.Random) -> Generator[List[Dict[str, int]], None, None]:
+    """Exits of a near-square grid world, a finished row at a time.
+
+    Eller's maze algorithm: only the current row is ever held. Each cell
+    carries the id of the region it is connected to so far; neighbouring
+    regions are randomly merged, every region sends at least one passage
+    south so none is stranded, and the last full row merges everything left.
+    An unfinished last row hangs straight off the row above it.
+    """
+    width = max(1, int(room_count ** 0.5))
+    rows = -(-room_count // width)
+    last_length = room_count - width * (rows - 1)
+    full_rows = rows if last_length == width else rows - 1
+    regions = list(range(width))
+    next_region = width
+    from_north = [False] * width
+    for row in range(rows):
+        base = row * width
+        length = width if row < full_rows else last_length
+        exits: List[Dict[str, int]] = [{'north': base - width + c} if from_north[c] else {} for c in range(length)]
+        parent: Dict[int, int] = {}
+
+        def find(region: int) -> int:
+            while parent.get(region, region) != region:
+                parent[region] = parent.get(parent[region], parent[region])
+                region = parent[region]
+            return region
+
+        final = row == full_rows - 1
+        for c in range(length - 1):
+            if row >= full_rows:
+                join = rng.random() < GEN_JOIN_CHANCE
+            else:
+                left, right = find(regions[c]), find(regions[c + 1])
+                if left != right:
+                    join = final or rng.random() < GEN_JOIN_CHANCE
+                else:
+                    join = rng.random() < GEN_LOOP_CHANCE
+                if join:
+                    parent[right] = left
+            if join:
+                exits[c]['east'] = base + c + 1
+                exits[c + 1]['west'] = base + c
+        below = 0 if row == rows - 1 else (width if row + 1 < full_rows else last_length)
+        south = [False] * width
+        if final or row >= full_rows:
+            south[:below] = [True] * below
+        elif below:
+            members: Dict[int, List[int]] = {}
+            for c in range(length):
+                members.setdefault(find(regions[c]), []).append(c)
+            for cells in members.values():
+                south[rng.choice(cells)] = True
+                for c in cells:
+                    if rng.random() < GEN_DESCEND_CHANCE:
+                        south[c] = True
+        for c in range(below):
+            if south[c]:
+                exits[c]['south'] = base + width + c
+                regions[c] = find(regions[c])
+            else:
+                regions[c] = next_region
+                next_region += 1
+        from_north = south
+        yield exits
+
+def _comb_exits(room_count: int, rng: random.Random) -> Generator[List[Dict[str, int]], None, None]:
+    """Exits of a comb world: an east-west spine with a dead-end tooth hanging south of each room.
+
+    Rooms are numbered spine room then its tooth, so the last room is the end
+    of the last tooth, and routes from the start run the whole spine.
+    """
+    spine = max(1, int(room_count ** 0.5))
+    remaining = room_count - spine
+    index = 0
+    for s in range(spine):
+        teeth_left = spine - s
+        tooth = remaining if teeth_left == 1 else rng.randint(0, 2 * remaining // teeth_left)
+        remaining -= tooth
+        exits: List[Dict[str, int]] = [{} for _ in range(tooth + 1)]
+        if s:
+            exits[0]['west'] = previous_spine
+        if s < spine - 1:
+            exits[0]['east'] = index + tooth + 1
+        for t in range(tooth):
+            exits[t]['south'] = index + t + 1
+            exits[t + 1]['north'] = index + t
+        previous_spine = index
+        index += tooth + 1
+        yield exits
+
+def generate_world(room_count: int, seed: Optional[int] = None, layout: str = 'grid') -> Generator[Tuple[str, Dict], None, None]:
+    """Stream (name, room) pairs of a connected procedural world, shaped like the rooms table.
+
+    The first room is START_ROOM and the last, the farthest generated, is
+    VICTORY_ROOM with its warden and the relic, so the vault is always
+    reachable. Exits are two-way and the output is the same for the same
+    seed; only one row (or one tooth) of the world is in memory at a time.
+    """
+    if room_count < 2:
+        raise ValueError("A world needs at least a start room and a relic vault.")
+    if layout not in WORLD_LAYOUTS:
+        raise ValueError(f"Unknown layout '{layout}'; choose from {', '.join(WORLD_LAYOUTS)}.")
+    rng = random.Random(seed)
+    digits = max(6, len(str(room_count - 1)))
+    def name(index: int) -> str:
+        if index == 0:
+            return START_ROOM
+        return VICTORY_ROOM if index == room_count - 1 else f"room_{index:0{digits}d}"
+
+    descriptions = [room['description'] for room in rooms.values()]
+    foes = [key for key, enemy in enemies.items() if enemy['ai'] != 'boss']
+    loot = sorted(materials) + sorted(consumables)
+    trap_names = sorted(traps)
+    open_chests = [key for key, chest in chests.items() if not chest['locked']]
+    warden = next(key for key, enemy in enemies.items() if enemy['ai'] == 'boss')
+    index = 0
+    for batch in (_grid_exits if layout == 'grid' else _comb_exits)(room_count, rng):
+        for exits in batch:
+            room: Dict = {'description': rng.choice(descriptions),
+                          'exits': {direction: name(dest) for direction, dest in exits.items()}}
+            if index == 0:
+                room['bonfire'] = True
+            elif index == room_count - 1:
+                room['enemies'] = [warden]
+                room['objects'] = [VICTORY_ITEM]
+            else:
+                if rng.random() < GEN_BONFIRE_CHANCE:
+                    room['bonfire'] = True
+                if rng.random() < GEN_ENEMY_CHANCE:
+                    room['enemies'] = [rng.choice(foes) for _ in range(rng.randint(1, 2))]
+                if rng.random() < GEN_OBJECT_CHANCE:
+                    room['objects'] = [rng.choice(loot)]
+                if rng.random() < GEN_TRAP_CHANCE:
+                    room['traps'] = [rng.choice(trap_names)]
+                if open_chests and rng.random() < GEN_CHEST_CHANCE:
+                    room['chests'] = [rng.choice(open_chests)]
+            yield name(index), room
+            index += 1
+
+def write_world(path: str, room_count: int, seed: Optional[int] = None, layout: str = 'grid') -> Dict:
+    """Generate a world straight into a file as it goes.
+
+    A path ending in WORLD_INDEX_SUFFIX gets an indexed world file; any
+    other gets JSONL: a header line, then one [name, room] line per room.
+    """
+    header = {'format': WORLD_FORMAT, 'version': VERSION, 'layout': layout, 'seed': seed, 'rooms': room_count}
+    started = time.perf_counter()
+    if path.endswith(WORLD_INDEX_SUFFIX):
+        write_indexed_world(path, generate_world(room_count, seed, layout))
+    else:
+        encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header) + '\n')
+            for pair in generate_world(room_count, seed, layout):
+                f.write(encode(pair) + '\n')
+        os.replace(tmp_path, path)
+    header['bytes'] = os.path.getsize(path)
+    header['seconds'] = time.perf_counter() - started
+    return header
+
+def read_world(path: str) -> Mapping[str, Mapping]:
+    """Load a generated world file into a frozen table usable as a WorldState base."""
+    with open(path, encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('format') != WORLD_FORMAT:
+            raise ValueError(f"{path} is not a world file this version can read.")
+        return freeze_table(dict(json.loads(line) for line in f))
+
+def generate_world_file(path: str, room_count: int, seed: Optional[int] = None, layout: str = 'grid') -> None:
+    """CLI front end for write_world."""
+    info = write_world(path, room_count, seed, layout)
+    print(f"Wrote {info['rooms']:,} {layout} rooms to {path} ({info['bytes']:,} bytes) "
+          f"in {info['seconds']:.2f}s ({info['rooms'] / info['seconds']:,.0f} rooms/s).")
+
+# --- Indexed World Files ---
+# A world file laid out like a binary save (header, table of contents,
+# sections) and opened through mmap, so a room costs nothing until it is read:
+#   ROOM  each room's [name, room] JSON record, back to back
+#   NAME  room names in room-number order, NUL-separated
+#   EXIT  exits column-wise: per-room counts, direction ids, destination room numbers
+#   INDX  fixed-width (name hash, record offset, record length) entries sorted by hash
+WORLD_INDEX_SUFFIX = ".bwld"
+WORLD_INDEX_MAGIC = b'BEWD'
+WORLD_INDEX_VERSION = 1
+WORLD_INDEX_SECTIONS = (b'ROOM', b'NAME', b'EXIT', b'INDX')
+_INDEX_ENTRY = struct.Struct('<QQI')
+ROOM_CACHE_SIZE = 1024  # Decoded rooms an indexed world keeps warm
+
+def _name_hash(name: str) -> int:
+    """A hash of a room name that is stable across runs, unlike hash()."""
+    return int.from_bytes(hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def write_indexed_world(path: str, pairs) -> int:
+    """Write (name, room) pairs to an indexed world file as they arrive; returns the room count.
+
+    Room records stream straight to disk. Only each room's name id and
+    exits are kept until the end, when the NAME, EXIT and INDX sections are
+    appended and the table of contents is filled in.
+    """
+    ids: Dict[str, int] = {}  # Names in order of first sight, as rooms or as exit targets
+    def sid(text: str) -> int:
+        return ids.setdefault(text, len(ids))
+
+    directions: Dict[str, int] = {}
+    room_ids, counts, exit_dirs, exit_ids = array('I'), bytearray(), bytearray(), array('I')
+    records = []  # (name hash, offset, length) per room
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    offset = _SAVE_HEADER.size + _SAVE_TOC_ENTRY.size * len(WORLD_INDEX_SECTIONS)
+    toc = {}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(bytes(offset))
+        start = offset
+        for name, room in pairs:
+            blob = encode([name, room]).encode('utf-8')
+            f.write(blob)
+            records.append((_name_hash(name), offset, len(blob)))
+            offset += len(blob)
+            room_ids.append(sid(name))
+            counts.append(len(room['exits']))
+            for direction, dest in room['exits'].items():
+                exit_dirs.append(directions.setdefault(direction, len(directions)))
+                exit_ids.append(sid(dest))
+        toc[b'ROOM'] = (start, offset - start)
+
+        number = {room_id: n for n, room_id in enumerate(room_ids)}
+        missing = [name for name, i in ids.items() if i not in number]
+        if missing:
+            raise ValueError(f"Exits lead to rooms the world lacks: {', '.join(missing[:5])}")
+        names = list(ids)
+        sections = {
+            b'NAME': _U32.pack(len(room_ids)) + '\0'.join(names[i] for i in room_ids).encode('utf-8'),
+            b'EXIT': b''.join([
+                _U32.pack(len(counts)) + bytes(counts),
+                _U32.pack(len(exit_dirs)) + bytes(exit_dirs),
+                _U32.pack(len(exit_ids)) + _id_array([number[i] for i in exit_ids]),
+                json.dumps(list(directions)).encode('utf-8')
+            ]),
+            b'INDX': b''.join(_INDEX_ENTRY.pack(*record) for record in sorted(records))
+        }
+        for tag in (b'NAME', b'EXIT', b'INDX'):
+            toc[tag] = (offset, len(sections[tag]))
+            f.write(sections[tag])
+            offset += len(sections[tag])
+        f.seek(0)
+        f.write(_SAVE_HEADER.pack(WORLD_INDEX_MAGIC, WORLD_INDEX_VERSION, len(WORLD_INDEX_SECTIONS)))
+        for tag in WORLD_INDEX_SECTIONS:
+            f.write(_SAVE_TOC_ENTRY.pack(tag, *toc[tag]))
+    os.replace(tmp_path, path)
+    return len(room_ids)
+
+class IndexedWorld(Mapping):
+    """A read-only rooms table backed by a memory-mapped indexed world file.
+
+    Opening one reads only the header. A room is found by binary search over
+    the INDX section and decoded on first access; the last ROOM_CACHE_SIZE
+    rooms stay decoded, so memory tracks the rooms visited rather than the
+    size of the world. Names and exits are read in bulk only when iterating
+    or routing.
+    """
+
+    def __init__(self, path: str, cache_size: int = ROOM_CACHE_SIZE) -> None:
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(self._map)
+        if len(data) < _SAVE_HEADER.size:
+            raise KeyError("World file is truncated.")
+        magic, version, count = _SAVE_HEADER.unpack_from(data, 0)
+        if magic != WORLD_INDEX_MAGIC:
+            raise KeyError("Not an indexed world file.")
+        if version > WORLD_INDEX_VERSION:
+            raise KeyError(f"World format v{version} is newer than this game understands.")
+        self.toc: Dict[bytes, Tuple[int, int]] = {}
+        for i in range(count):
+            tag, offset, length = _SAVE_TOC_ENTRY.unpack_from(data, _SAVE_HEADER.size + i * _SAVE_TOC_ENTRY.size)
+            if offset + length > len(data):
+                raise KeyError(f"World section {tag.decode()} is truncated.")
+            self.toc[tag] = (offset, length)
+        missing = [tag.decode() for tag in WORLD_INDEX_SECTIONS if tag not in self.toc]
+        if missing:
+            raise KeyError(f"World file missing required data: {', '.join(missing)}.")
+        self._index_offset, index_length = self.toc[b'INDX']
+        self._count = index_length // _INDEX_ENTRY.size
+        self._cache: 'OrderedDict[str, Mapping]' = OrderedDict()
+        self._cache_size = cache_size
+        self._names: Optional[List[str]] = None
+        self.decoded = 0  # Rooms read from the file so far, cache misses included
+
+    def section(self, tag: bytes) -> memoryview:
+        offset, length = self.toc[tag]
+        return memoryview(self._map)[offset:offset + length]
+
+    def _record(self, name: str) -> Optional[Tuple[int, int]]:
+        """Offset and length of a room's record, or None if the world lacks it."""
+        target = _name_hash(name)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _INDEX_ENTRY.unpack_from(self._map, self._index_offset + mid * _INDEX_ENTRY.size)[0] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        prefix = json.dumps([name], ensure_ascii=False)[:-1].encode('utf-8') + b','
+        while lo < self._count:  # Walk any entries sharing the hash; the record's name settles it
+            found, offset, length = _INDEX_ENTRY.unpack_from(self._map, self._index_offset + lo * _INDEX_ENTRY.size)
+            if found != target:
+                break
+            if self._map[offset:offset + len(prefix)] == prefix:
+                return offset, length
+            lo += 1
+        return None
+
+    def __getitem__(self, name: str) -> Mapping:
+        room = self._cache.get(name)
+        if room is not None:
+            self._cache.move_to_end(name)
+            return room
+        record = self._record(name)
+        if record is None:
+            raise KeyError(name)
+        offset, length = record
+        room = freeze_table(json.loads(self._map[offset:offset + length])[1])
+        self.decoded += 1
+        self._cache[name] = room
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return room
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and (name in self._cache or self._record(name) is not None)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def names(self) -> List[str]:
+        """Every room name in room-number order, read once on first use."""
+        if self._names is None:
+            data = self.section(b'NAME')
+            self._names = bytes(data[4:]).decode('utf-8').split('\0')
+        return self._names
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def graph(self) -> WorldGraph:
+        """A routing graph read from the EXIT section without decoding any room."""
+        data = self.section(b'EXIT')
+        (room_count,) = _U32.unpack_from(data, 0)
+        counts = data[4:4 + room_count]
+        offset = 4 + room_count
+        (exit_count,) = _U32.unpack_from(data, offset)
+        dirs = data[offset + 4:offset + 4 + exit_count]
+        dests, offset = _read_ids(data, offset + 4 + exit_count)
+        direction_names = json.loads(bytes(data[offset:]))
+        pairs = list(zip(map(direction_names.__getitem__, dirs), dests))
+        exits, position = [], 0
+        for count in counts:
+            exits.append(tuple(pairs[position:position + count]))
+            position += count
+        return WorldGraph.from_exits(self.names(), exits)
+
+    def close(self) -> None:
+        self._map.close()
+
+def open_world(path: str) -> Mapping[str, Mapping]:
+    """A generated world as a WorldState base: indexed files lazily, JSONL files loaded whole."""
+    return IndexedWorld(path) if path.endswith(WORLD_INDEX_SUFFIX) else read_world(path)
+
+# --- Game Events ---
+EVENT_TYPES = ('enemy_killed', 'room_entered', 'item_taken', 'chest_opened', 'spell_learned', 'death',
+               'level_up', 'victory')
+
+class EventBus:
+    """Listeners for game events, indexed by event type.
+
+    emit() calls listener(session, **data) for just the listeners of that
+    one type, in the order they subscribed, so an event nobody listens to
+    costs a single lookup.
+    """
+
+    def __init__(self) -> None:
+        self.listeners: Dict[str, List] = {kind: [] for kind in EVENT_TYPES}
+
+    def subscribe(self, kind: str, listener) -> None:
+        if kind not in self.listeners:
+            raise ValueError(f"Unknown event type '{kind}'.")
+        self.listeners[kind].append(listener)
+
+    def unsubscribe(self, kind: str, listener) -> None:
+        self.listeners[kind].remove(listener)
+
+    def emit(self, session: 'GameSession', kind: str, **data) -> None:
+        for listener in self.listeners[kind]:
+            listener(session, **data)
+
+EVENTS = EventBus()
+
+# --- Achievements ---
+class Achievement:
+    """One achievement: the event it listens to, which of those events count, and how many it takes.
+
+    when filters the event's data; progress, if given, reads the count
+    straight off the player (as rooms explored) instead of tallying events.
+    """
+    __slots__ = ('name', 'desc', 'event', 'when', 'goal', 'progress')
+
+    def __init__(self, name: str, desc: str, event: str, when=None, goal: int = 1, progress=None) -> None:
+        self.name = name
+        self.desc = desc
+        self.event = event
+        self.when = when
+        self.goal = goal
+        self.progress = progress
+
+class AchievementRegistry:
+    """Every achievement, indexed by the event type it listens to.
+
+    The registry subscribes to the bus once per event type that some
+    achievement needs, and on an event looks only at that type's
+    achievements. Each counting achievement keeps its own tally in
+    player.tallies, bumped once per matching event and dropped when it
+    unlocks; an unlocked achievement is skipped, so none is awarded twice.
+    """
+
+    def __init__(self, bus: EventBus) -> None:
+        self.bus = bus
+        self.achievements: Dict[str, Achievement] = {}
+        self.by_event: Dict[str, List[Achievement]] = {}
+
+    def add(self, name: str, desc: str, event: str, when=None, goal: int = 1, progress=None) -> Achievement:
+        if name in self.achievements:
+            raise ValueError(f"Achievement '{name}' is already registered.")
+        achievement = self.achievements[name] = Achievement(name, desc, event, when, goal, progress)
+        if event not in self.by_event:
+            self.bus.subscribe(event, functools.partial(self.notify, event))
+            self.by_event[event] = []
+        self.by_event[event].append(achievement)
+        return achievement
+
+    def notify(self, event: str, session: 'GameSession', **data) -> None:
+        player = session.player
+        for achievement in self.by_event[event]:
+            if achievement.name in player.achievements:
+                continue
+            if achievement.when is not None and not achievement.when(data):
+                continue
+            if achievement.progress is not None:
+                count = achievement.progress(player)
+            elif achievement.goal > 1:
+                count = player.tallies[achievement.name] = player.tallies.get(achievement.name, 0) + 1
+            else:
+                count = 1
+            if count >= achievement.goal:
+                self.award(session, achievement)
+
+    def award(self, session: 'GameSession', achievement: Achievement) -> None:
+        player = session.player
+        player.achievements.append(achievement.name)
+        player.tallies.pop(achievement.name, None)
+        session.say(f"Achievement Unlocked: {achievement.name} - {achievement.desc}")
+
+ACHIEVEMENTS = AchievementRegistry(EVENTS)
+ACHIEVEMENTS.add('Relic Conqueror', "Vanquished the Relic Warden!", 'enemy_killed',
+                 when=lambda e: e['enemy'] == 'relic_warden')
+ACHIEVEMENTS.add('Explorer of Shadows', "Explored 20 realms!", 'room_entered',
+                 when=lambda e: e['first'], goal=20, progress=lambda player: len(player.explored))
+ACHIEVEMENTS.add('Soul Harvester', "Felled 50 foes!", 'enemy_killed', goal=50)
+ACHIEVEMENTS.add('Ember Undying', "Rose from the bonfire 10 times!", 'death', goal=10)
+ACHIEVEMENTS.add('Relic Bearer', "Claimed the Relic of Ages!", 'victory')
 
 # --- Helper Functions ---
-def enhanced_enter_room(room: Dict, player: Dict) -> bool:
+@timed_script('enter_room')
+def enhanced_enter_room(session: 'GameSession', room_name: str) -> Generator[str, str, bool]:
     """Enhanced room entry with new mechanics."""
-    player['explored'].add(current_room)
-    print(f"\n{room['description']}")
+    player = session.player
+    world = session.world
+    world.refresh(room_name)
+    room = world.room(room_name)
+    first = room_name not in player.explored
+    player.explored.add(room_name)
+    EVENTS.emit(session, 'room_entered', room=room_name, first=first)
+    session.say(f"\n{room['description']}")
     if 'lore' in room:
-        print(f"Lore: {room['lore']}")
+        session.say(f"Lore: {room['lore']}")
     if room.get('bonfire'):
-        print("A bonfire flickers, offering solace in the gloom.")
+        session.say("A bonfire flickers, offering solace in the gloom.")
     if 'chests' in room and room['chests']:
-        print("Treasures whisper: " + ', '.join(room['chests']))
+        session.say("Treasures whisper: " + ', '.join(room['chests']))
     if 'crafting_station' in room:
-        print("A crafting station hums with potential.")
+        session.say("A crafting station hums with potential.")
     if 'enemies' in room and room['enemies']:
-        for enemy_name in room['enemies'][:]:
-            enemy = enemies[enemy_name].copy()
-            if not enhanced_combat(player, enemy, enemy_name):
-                handle_death_enhanced(player)
+        for enemy_name in room['enemies']:
+            enemy = Combatant.spawn(enemy_name)
+            if not (yield from enhanced_combat(session, enemy, enemy_name)):
+                handle_death_enhanced(session)
                 return False
-            room['enemies'].remove(enemy_name)
+            world.remove(room_name, 'enemies', enemy_name)
     if 'traps' in room and room['traps']:
-        trap_effects = {
-            'poison_gas_trap': (10, "Poison gas chokes the air!", "You take 10 damage."),
-            'thorny_vines': (5, "Vines tear at your flesh!", "You take 5 damage."),
-            'false_floor': (20, "The floor collapses beneath you!", "You take 20 damage."),
-            'magical_runes': (15, "Runes flare, searing your skin!", "You take 15 damage."),
-            'ice_spikes': (12, "Ice spikes pierce upward!", "You take 12 damage."),
-            'lava_flow': (25, "Lava surges, burning all!", "You take 25 damage."),
-            'collapsing_ceiling': (18, "The ceiling rains stone!", "You take 18 damage.")
-        }
-        for trap in room['traps'][:]:
-            damage, message, effect = trap_effects[trap]
-            print(message)
-            if any(t in player['trinkets'] for t in trinkets if trap == 'poison_gas_trap' and 'dark_resist' in trinkets[t]):
-                print("Your trinket wards off the poison!")
+        for trap in room['traps']:
+            damage = traps[trap]['damage']
+            session.say(traps[trap]['message'])
+            ward = traps[trap].get('ward')
+            if ward and any(ward in trinkets[t] for t in player.trinkets):
+                session.say("Your trinket wards off the poison!")
                 damage = 0
-            player['health'] -= damage
-            print(effect)
-            room['traps'].remove(trap)
-            if player['health'] <= 0:
-                handle_death_enhanced(player)
+            player.health -= damage
+            session.say(traps[trap]['effect'])
+            world.remove(room_name, 'traps', trap)
+            if player.health <= 0:
+                handle_death_enhanced(session)
                 return False
     if 'puzzle' in room:
-        solve_puzzle(room, player)
+        yield from solve_puzzle(session, room_name)
     exits = room['exits']
     if exits:
-        print("Paths beckon: " + ', '.join([f"{d} to {dest}" for d, dest in exits.items()]))
+        session.say("Paths beckon: " + ', '.join([f"{d} to {dest}" for d, dest in exits.items()]))
     return True
 
-def enhanced_combat(player: Dict, enemy: Dict, enemy_key: str) -> bool:
+def enhanced_combat(session: 'GameSession', enemy: Combatant, enemy_key: str) -> Generator[str, str, bool]:
     """Enhanced combat with dynamic enemy AI and effects."""
-    print(f"\nA {enemy['description']} bars your path!")
+    player = session.player
+    effects = session.effects
+    metrics = session.metrics
+    metrics.count('fights')
+    session.say(f"\nA {enemy.description} bars your path!")
     turns = 0
-    enemy_ai = enemy['ai']
-    while player['health'] > 0 and enemy['health'] > 0:
+    enemy_ai = enemy.ai
+    while player.health > 0 and enemy.health > 0:
         turns += 1
-        print(f"\n=== Turn {turns} ===")
-        print(f"{player['name']}: {player['health']}/{player['max_health']} HP | Mana: {player['mana']}")
-        print(f"{enemy['name']}: {enemy['health']} HP")
-        action = input("Attack, cast spell, use item, or flee? ").lower()
+        session.say(f"\n=== Turn {turns} ===")
+        session.say(f"{player.name}: {player.health}/{player.max_health} HP | Mana: {player.mana}")
+        session.say(f"{enemy.name}: {enemy.health} HP")
+        enemy_health, player_health = enemy.health, player.health
+        action = (yield "Attack, cast spell, use item, or flee? ").lower()
+        turn_started = time.perf_counter()
         
         # Player Turn
         if action == 'attack':
-            damage = max(0, player['attack'] + active_effects.get('strength', {}).get('bonus', 0) - enemy['defense'])
-            if random.random() < 0.15:
+            damage = max(0, player.attack - enemy.defense)
+            if session.rng.random() < CRIT_CHANCE:
                 damage *= 2
-                print("Critical hit!")
-            enemy['health'] -= damage
-            print(f"You deal {damage} damage to the {enemy['name']}.")
-            apply_weapon_effects(player, enemy)
+                session.say("Critical hit!")
+            enemy.health -= damage
+            session.say(f"You deal {damage} damage to the {enemy.name}.")
+            apply_weapon_effects(session, enemy)
         elif action == 'cast spell':
-            if not player['spells']:
-                print("You wield no spells.")
+            if not player.spells:
+                session.say("You wield no spells.")
                 continue
-            spell = input(f"Choose a spell ({', '.join(player['spells'])}): ").lower()
-            if spell in player['spells'] and player['mana'] >= spells[spell]['mana_cost']:
-                player['mana'] -= spells[spell]['mana_cost']
-                apply_spell_effects(player, enemy, spell)
+            spell = (yield f"Choose a spell ({', '.join(player.spells)}): ").lower()
+            turn_started = time.perf_counter()
+            if spell in player.spells and player.mana >= spells[spell]['mana_cost']:
+                player.mana -= spells[spell]['mana_cost']
+                apply_spell_effects(session, enemy, spell)
             else:
-                print("Not enough mana or invalid spell.")
+                session.say("Not enough mana or invalid spell.")
         elif action == 'use item':
-            if not player['inventory']:
-                print("Your pack is empty.")
+            if not player.inventory:
+                session.say("Your pack is empty.")
                 continue
-            item = input(f"Choose an item ({', '.join(player['inventory'])}): ").lower()
-            apply_item_effects(player, enemy, item)
+            item = (yield f"Choose an item ({', '.join(player.inventory)}): ").lower()
+            turn_started = time.perf_counter()
+            apply_item_effects(session, enemy, item)
         elif action == 'flee':
-            flee_chance = 0.3 + (0.3 if player['stealth'] or 'stealth' in active_effects else 0)
-            if random.random() < flee_chance:
-                print("You slip into the dark!")
+            flee_chance = 0.3 + (0.3 if player.stealth or 'stealth' in player.effects else 0)
+            if session.rng.random() < flee_chance:
+                session.say("You slip into the dark!")
+                effects.drop(enemy)
+                metrics.count('flees')
                 return True
-            print("No escape this time!")
+            session.say("No escape this time!")
         
         # Enemy Turn
-        if enemy['health'] > 0:
-            defense = player['defense'] + sum(active_effects.get(e, {}).get('bonus', 0) for e in ['barrier', 'endurance'])
-            damage = max(0, enemy['attack'] - defense)
-            if player['stealth'] or 'blind' in active_effects:
-                print(f"The {enemy['name']} flails, missing you!")
+        if enemy.health > 0:
+            damage = max(0, enemy.attack + effects.bonus(enemy, 'attack') - player.defense)
+            if player.stealth or 'blind' in enemy.effects:
+                session.say(f"The {enemy.name} flails, missing you!")
             else:
-                enemy_action = enemy_ai_behavior(enemy_ai, player, enemy)
+                enemy_action = enemy_ai_behavior(session, enemy_ai, enemy)
                 if enemy_action == 'attack':
-                    player['health'] -= damage
-                    print(f"The {enemy['name']} strikes for {damage} damage.")
+                    player.health -= damage
+                    session.say(f"The {enemy.name} strikes for {damage} damage.")
                 elif enemy_action == 'special':
-                    apply_enemy_special(enemy, player)
+                    apply_enemy_special(session, enemy)
             
-            if enemy['name'] == 'Relic Warden' and random.random() < 0.2:
-                player['health'] -= 10
-                print("The Warden’s blade hums, sapping 10 more HP!")
+            if enemy.name == 'Relic Warden' and session.rng.random() < WARDEN_DRAIN_CHANCE:
+                player.health -= WARDEN_DRAIN
+                session.say(f"The Warden’s blade hums, sapping {WARDEN_DRAIN} more HP!")
         
-        update_effects(player, enemy)
+        update_effects(session, enemy)
+        if metrics.enabled:
+            metrics.record('combat_turn', time.perf_counter() - turn_started)
+            metrics.count('turns')
+            metrics.count('damage_dealt', max(0, enemy_health - enemy.health))
+            metrics.count('damage_taken', max(0, player_health - player.health))
     
-    if player['health'] <= 0:
-        print(f"\nThe {enemy['name']} claims your soul.")
+    effects.drop(enemy)
+    if player.health <= 0:
+        session.say(f"\nThe {enemy.name} claims your soul.")
         return False
-    print(f"\nYou fell the {enemy['name']}!")
-    player['xp'] += enemies[enemy_key]['xp']
-    player['souls'] += enemies[enemy_key]['souls']
-    check_level_up(player)
-    check_achievements(player, enemy_key)
+    session.say(f"\nYou fell the {enemy.name}!")
+    metrics.count('kills')
+    player.xp += enemy.xp
+    player.souls += enemy.souls
+    check_level_up(session)
+    EVENTS.emit(session, 'enemy_killed', enemy=enemy_key)
     return True
 
-def apply_weapon_effects(player: Dict, enemy: Dict) -> None:
+def apply_weapon_effects(session: 'GameSession', enemy: Combatant) -> None:
     """Apply special effects from equipped weapons."""
-    weapon = weapons.get(player['equipped_weapon'], {})
+    weapon = weapons.get(session.player.equipped_weapon, {})
     if 'fire_damage' in weapon:
-        enemy['health'] -= weapon['fire_damage']
-        print(f"Flames sear for {weapon['fire_damage']} extra damage!")
+        enemy.health -= weapon['fire_damage']
+        session.say(f"Flames sear for {weapon['fire_damage']} extra damage!")
     if 'dark_damage' in weapon:
-        enemy['health'] -= weapon['dark_damage']
-        print(f"Darkness bites for {weapon['dark_damage']} extra damage!")
-    if 'bleed' in weapon and random.random() < 0.3:
-        active_effects['bleed'] = {'turns': 3, 'damage': 2, 'target': 'enemy'}
-        print("The foe begins to bleed!")
+        enemy.health -= weapon['dark_damage']
+        session.say(f"Darkness bites for {weapon['dark_damage']} extra damage!")
+    if 'bleed' in weapon and session.rng.random() < BLEED_CHANCE:
+        session.effects.apply(enemy, 'bleed', BLEED_TURNS, BLEED_DAMAGE)
+        session.say("The foe begins to bleed!")
+    if 'ice_slow' in weapon:
+        session.effects.apply(enemy, 'slow', SLOW_TURNS, -SLOW_AMOUNT)
+        session.say(f"Frost bites the {enemy.name}, slowing its strikes!")
 
-def apply_spell_effects(player: Dict, enemy: Dict, spell: str) -> None:
+def apply_spell_effects(session: 'GameSession', enemy: Combatant, spell: str) -> None:
     """Apply effects from cast spells."""
+    player = session.player
+    effects = session.effects
     spell_data = spells[spell]
-    bonus = weapons.get(player['equipped_weapon'], {}).get('spell_bonus', 0)
+    bonus = weapons.get(player.equipped_weapon, {}).get('spell_bonus', 0)
     if 'damage' in spell_data:
         damage = spell_data['damage'] + bonus
-        enemy['health'] -= damage
-        print(f"You cast {spell}, dealing {damage} damage.")
+        enemy.health -= damage
+        session.say(f"You cast {spell}, dealing {damage} damage.")
+    if 'slow' in spell_data:
+        effects.apply(enemy, 'slow', SLOW_TURNS, -SLOW_AMOUNT)
+        session.say(f"The {enemy.name} stiffens under a crust of ice!")
     if 'heal' in spell_data:
-        player['health'] = min(player['max_health'], player['health'] + spell_data['heal'])
-        print(f"You cast {spell}, healing {spell_data['heal']} HP.")
+        player.health = min(player.max_health, player.health + spell_data['heal'])
+        session.say(f"You cast {spell}, healing {spell_data['heal']} HP.")
     if 'stealth' in spell_data:
-        active_effects['stealth'] = {'turns': 2}
-        player['stealth'] = True
-        print("You fade into shadow!")
+        effects.apply(player, 'stealth', 2)
+        player.stealth = True
+        session.say("You fade into shadow!")
     if 'defense_bonus' in spell_data:
-        active_effects['barrier'] = {'turns': spell_data['duration'], 'bonus': spell_data['defense_bonus']}
-        print(f"You cast {spell}, raising a shield!")
+        effects.apply(player, 'barrier', spell_data['duration'], spell_data['defense_bonus'])
+        session.say(f"You cast {spell}, raising a shield!")
     if 'blind' in spell_data:
-        active_effects['blind'] = {'turns': 2, 'target': 'enemy'}
-        print("Ash blinds the foe!")
+        effects.apply(enemy, 'blind', 2)
+        session.say("Ash blinds the foe!")
 
-def apply_item_effects(player: Dict, enemy: Dict, item: str) -> None:
+def apply_item_effects(session: 'GameSession', enemy: Combatant, item: str) -> None:
     """Apply effects from used items."""
-    if item in consumables and item in player['inventory']:
+    player = session.player
+    effects = session.effects
+    if item in consumables and item in player.inventory:
         item_data = consumables[item]
         if 'heal' in item_data:
-            player['health'] = min(player['max_health'], player['health'] + item_data['heal'])
-            print(f"You use {item}, healing {item_data['heal']} HP.")
+            player.health = min(player.max_health, player.health + item_data['heal'])
+            session.say(f"You use {item}, healing {item_data['heal']} HP.")
         elif 'mana_restore' in item_data:
-            player['mana'] = min(player['max_mana'], player['mana'] + item_data['mana_restore'])
-            print(f"You use {item}, restoring {item_data['mana_restore']} mana.")
+            player.mana = min(player.max_mana, player.mana + item_data['mana_restore'])
+            session.say(f"You use {item}, restoring {item_data['mana_restore']} mana.")
         elif 'attack_bonus' in item_data:
-            active_effects['strength'] = {'turns': item_data['duration'], 'bonus': item_data['attack_bonus']}
-            print(f"You quaff {item}, strength surging!")
+            effects.apply(player, 'strength', item_data['duration'], item_data['attack_bonus'])
+            session.say(f"You quaff {item}, strength surging!")
         elif 'defense_bonus' in item_data:
-            active_effects['endurance'] = {'turns': item_data['duration'], 'bonus': item_data['defense_bonus']}
-            print(f"You use {item}, steeling your guard!")
+            effects.apply(player, 'endurance', item_data['duration'], item_data['defense_bonus'])
+            session.say(f"You use {item}, steeling your guard!")
         elif 'fire_damage' in item_data:
-            active_effects['fire'] = {'turns': item_data['duration'], 'damage': item_data['fire_damage']}
-            print(f"You imbibe {item}, flames licking your blade!")
-        player['inventory'].remove(item)
+            effects.apply(enemy, 'burn', item_data['duration'], item_data['fire_damage'])
+            session.say(f"You imbibe {item}, flames licking your blade!")
+            session.say(f"The {enemy.name} catches fire!")
+        player.inventory.remove(item)
 
-def enemy_ai_behavior(ai_type: str, player: Dict, enemy: Dict) -> str:
+def enemy_ai_behavior(session: 'GameSession', ai_type: str, enemy: Combatant) -> str:
     """Determine enemy actions based on AI type."""
-    if ai_type == 'basic':
+    chance = AI_SPECIAL_CHANCE.get(ai_type, 0.0)
+    if not chance:
         return 'attack'
-    elif ai_type == 'tank':
-        return 'attack' if random.random() < 0.8 else 'special'
-    elif ai_type == 'aggressive':
+    roll = session.rng.random()
+    if ai_type == 'caster' and enemy.health <= 10:
         return 'attack'
-    elif ai_type == 'caster':
-        return 'special' if random.random() < 0.5 and enemy['health'] > 10 else 'attack'
-    elif ai_type == 'stealth':
-        return 'special' if random.random() < 0.3 else 'attack'
-    elif ai_type == 'boss':
-        return 'special' if random.random() < 0.4 else 'attack'
-    return 'attack'
-
-def apply_enemy_special(enemy: Dict, player: Dict) -> None:
+    return 'special' if roll < chance else 'attack'
+
+def apply_enemy_special(session: 'GameSession', enemy: Combatant) -> None:
     """Apply special abilities for enemies."""
-    if enemy['ai'] == 'caster':
-        player['health'] -= 5
-        print(f"The {enemy['name']} casts a dark spell, dealing 5 damage!")
-    elif enemy['ai'] == 'tank':
-        enemy['defense'] += 2
-        print(f"The {enemy['name']} hardens its stance!")
-    elif enemy['ai'] == 'stealth':
-        enemy['attack'] += 3
-        print(f"The {enemy['name']} fades, striking harder next turn!")
-    elif enemy['ai'] == 'boss':
-        player['mana'] -= 10
-        print(f"The {enemy['name']} drains your mana by 10!")
-
-def update_effects(player: Dict, enemy: Dict) -> None:
-    """Update and expire active effects."""
-    for effect in list(active_effects.keys()):
-        active_effects[effect]['turns'] -= 1
-        if 'damage' in active_effects[effect] and active_effects[effect]['target'] == 'enemy':
-            enemy['health'] -= active_effects[effect]['damage']
-            print(f"{effect.capitalize()} deals {active_effects[effect]['damage']} damage to the enemy!")
-        if active_effects[effect]['turns'] <= 0:
-            if effect == 'stealth':
-                player['stealth'] = False
-                print("Your stealth fades.")
-            elif effect == 'bleed':
-                print(f"The {enemy['name']}'s bleeding stops.")
-            else:
-                print(f"Your {effect} fades.")
-            del active_effects[effect]
+    player = session.player
+    if enemy.ai == 'caster':
+        player.health -= 5
+        session.say(f"The {enemy.name} casts a dark spell, dealing 5 damage!")
+    elif enemy.ai == 'tank':
+        enemy.defense += 2
+        session.say(f"The {enemy.name} hardens its stance!")
+    elif enemy.ai == 'stealth':
+        enemy.attack += 3
+        session.say(f"The {enemy.name} fades, striking harder next turn!")
+    elif enemy.ai == 'boss':
+        player.mana -= 10
+        session.say(f"The {enemy.name} drains your mana by 10!")
 
-def handle_death_enhanced(player: Dict) -> None:
+def update_effects(session: 'GameSession', enemy: Combatant) -> None:
+    """End the turn: deal damage over time, then expire what has run out."""
+    player = session.player
+    ticking, expired = session.effects.advance()
+    for effect in ticking:
+        effect.owner.health -= effect.amount
+        target = "you" if effect.owner is player else "the enemy"
+        session.say(f"{effect.kind.capitalize()} deals {effect.amount} damage to {target}!")
+    for effect in expired:
+        if effect.kind in effect.owner.effects:
+            continue  # Other stacks of it are still running
+        if effect.kind == 'stealth':
+            player.stealth = False
+        session.say(EFFECT_RULES[effect.kind]['fade'].format(name=enemy.name))
+
+def handle_death_enhanced(session: 'GameSession') -> None:
     """Enhanced death handler with soul loss."""
-    global current_room
-    print(f"\n{player['name']} falls, but the bonfire’s embers flare...")
-    current_room = last_bonfire
-    player['health'] = player['max_health']
-    player['mana'] = player['max_mana']
-    player['souls'] = player['souls'] // 2  # Lose half souls on death
-    active_effects.clear()
-    for room_name, enemy_list in master_enemies.items():
-        rooms[room_name]['enemies'] = enemy_list.copy()
-    print(f"You rise at {last_bonfire}, souls diminished.")
-
-def check_level_up(player: Dict) -> None:
+    player = session.player
+    session.say(f"\n{player.name} falls, but the bonfire’s embers flare...")
+    session.current_room = session.last_bonfire
+    player.health = player.max_health
+    player.mana = player.max_mana
+    session.metrics.count('deaths')
+    session.metrics.count('souls_lost', player.souls - player.souls // 2)
+    player.souls = player.souls // 2  # Lose half souls on death
+    session.effects.clear(player)
+    session.world.respawn()
+    session.say(f"You rise at {session.last_bonfire}, souls diminished.")
+    EVENTS.emit(session, 'death', room=session.current_room)
+
+def check_level_up(session: 'GameSession') -> None:
     """Check and handle player level-up."""
-    xp_needed = player['level'] * 100
-    if player['xp'] >= xp_needed:
-        player['level'] += 1
-        player['max_health'] += 25
-        player['health'] = player['max_health']
-        player['max_mana'] += 20
-        player['mana'] = player['max_mana']
-        player['attack'] += 4
-        player['defense'] += 3
-        print(f"\n{player['name']} rises to Level {player['level']}! Strength surges within.")
-
-def check_achievements(player: Dict, enemy_key: str) -> None:
-    """Check and award achievements."""
-    if enemy_key == 'relic_warden' and 'Relic Conqueror' not in player['achievements']:
-        player['achievements'].append('Relic Conqueror')
-        print("Achievement Unlocked: Relic Conqueror - Vanquished the Relic Warden!")
-    if len(player['explored']) >= 20 and 'Explorer of Shadows' not in player['achievements']:
-        player['achievements'].append('Explorer of Shadows')
-        print("Achievement Unlocked: Explorer of Shadows - Explored 20 realms!")
-
-def solve_puzzle(room: Dict, player: Dict) -> None:
+    player = session.player
+    xp_needed = player.level * 100
+    if player.xp >= xp_needed:
+        player.level += 1
+        player.invalidate()
+        player.health = player.max_health
+        player.mana = player.max_mana
+        session.say(f"\n{player.name} rises to Level {player.level}! Strength surges within.")
+        EVENTS.emit(session, 'level_up', level=player.level)
+
+def solve_puzzle(session: 'GameSession', room_name: str) -> Generator[str, str, None]:
     """Solve room-specific puzzles."""
+    room = session.world.room(room_name)
     if 'puzzle' in room and room['puzzle']:
         puzzle = room['puzzle']
-        print(f"\nA riddle bars your way: '{puzzle['riddle']}'")
-        answer = input("Answer: ").lower().strip()
-        if answer == puzzle['answer'] or (puzzle['riddle'] == 'I am taken from a mine, shut in a wooden case, never released, yet used by all. What am I?' and answer == 'pencil lead'):
-            item = puzzle['reward']
-            room['objects'].append(item)
-            print(f"Stone yields—revealed: {item}!")
-            room.pop('puzzle')
+        session.say(f"\nA riddle bars your way: '{puzzle['riddle']}'")
+        answer = (yield "Answer: ").lower().strip()
+        if answer == puzzle['answer'] or answer in puzzle.get('alternates', ()):
+            session.world.solve_puzzle(room_name)
+            session.say(f"Stone yields—revealed: {puzzle['reward']}!")
         else:
-            print("The riddle mocks your folly.")
+            session.say("The riddle mocks your folly.")
 
-def open_chest(chest_name: str, player: Dict) -> None:
+def open_chest(session: 'GameSession', chest_name: str) -> bool:
     """Open a chest with enhanced mechanics, removing contents to prevent duplication."""
+    player = session.player
     chest = chests[chest_name]
-    print(f"\n{chest['desc']}")
+    session.say(f"\n{chest['desc']}")
     if chest['locked']:
-        if chest['key'] in player['inventory']:
-            print(f"You unlock the {chest_name} with the {chest['key']}!")
-            player['inventory'].remove(chest['key'])
-        elif 'teleport' in player['spells'] and player['mana'] >= spells['teleport']['mana_cost']:
-            print("You teleport the lock away with a spell!")
-            player['mana'] -= spells['teleport']['mana_cost']
+        if chest['key'] in player.inventory:
+            session.say(f"You unlock the {chest_name} with the {chest['key']}!")
+            player.inventory.remove(chest['key'])
+        elif 'teleport' in player.spells and player.mana >= spells['teleport']['mana_cost']:
+            session.say("You teleport the lock away with a spell!")
+            player.mana -= spells['teleport']['mana_cost']
         else:
-            print(f"The {chest_name} is sealed. You need a {chest['key']} or teleport spell.")
-            return
+            session.say(f"The {chest_name} is sealed. You need a {chest['key']} or teleport spell.")
+            return False
     else:
-        print(f"You wrench open the {chest_name}, hinges screaming.")
+        session.say(f"You wrench open the {chest_name}, hinges screaming.")
     
     # Transfer and clear chest contents
-    for item in chest['contents']:
-        player['inventory'].append(item)
-        print(f"You claim: {item.capitalize()}")
-    chest['contents'] = []
+    for item in session.world.chest_contents(session.current_room, chest_name):
+        player.inventory.append(item)
+        session.say(f"You claim: {item.capitalize()}")
+    session.world.empty_chest(session.current_room, chest_name)
+    EVENTS.emit(session, 'chest_opened', chest=chest_name)
+    return True
 
-def craft_item(player: Dict, item: str) -> None:
-    """Craft items at a crafting station."""
-    if item not in crafting_recipes:
-        print("No such recipe exists.")
-        return
-    recipe = crafting_recipes[item]
-    if player['souls'] < recipe['souls']:
-        print(f"Not enough souls. Required: {recipe['souls']}")
-        return
-    for ingredient, count in recipe['ingredients'].items():
-        if player['inventory'].count(ingredient) < count:
-            print(f"Missing {count - player['inventory'].count(ingredient)} {ingredient}(s).")
+# --- Crafting Planner ---
+class CraftingCycle(Exception):
+    """A recipe that, through its ingredients, needs itself."""
+
+_CRAFT_ORDERS: Dict[str, Tuple[str, ...]] = {}  # Must be cleared if crafting_recipes changes
+
+def craft_order(item: str) -> Tuple[str, ...]:
+    """Every craftable item in item's recipe tree, each after the ingredients it needs.
+
+    Memoized per item, and subtrees already worked out are reused whole.
+    Raises CraftingCycle if a recipe needs itself, however indirectly.
+    """
+    order = _CRAFT_ORDERS.get(item)
+    if order is not None:
+        return order
+    seen = set()
+    result: List[str] = []
+
+    def visit(name: str, path: Tuple[str, ...]) -> None:
+        if name in path:
+            raise CraftingCycle(" -> ".join(path + (name,)))
+        if name in seen or name not in crafting_recipes:
+            return
+        known = _CRAFT_ORDERS.get(name)
+        if known is not None:  # An acyclic subtree, so nothing on path can be inside it
+            for sub in known:
+                if sub not in seen:
+                    seen.add(sub)
+                    result.append(sub)
             return
-    for ingredient, count in recipe['ingredients'].items():
-        for _ in range(count):
-            player['inventory'].remove(ingredient)
-    player['souls'] -= recipe['souls']
-    player['inventory'].append(item)
-    print(f"You craft a {item}! {recipe['desc']}")
-
-def handle_victory(player: Dict) -> str:
+        for ingredient in crafting_recipes[name]['ingredients']:
+            visit(ingredient, path + (name,))
+        seen.add(name)
+        result.append(name)
+
+    visit(item, ())
+    order = _CRAFT_ORDERS[item] = tuple(result)
+    return order
+
+def plan_craft(inventory: Inventory, item: str, count: int = 1) -> Dict:
+    """The cheapest way to craft count of item from what inventory holds.
+
+    Held copies of an ingredient are always used before crafting more, which
+    is never dearer since every item has one recipe. Demand is pushed down
+    the tree in craft_order, so the work grows with the tree, not with count.
+    The result lists held items used, crafts in the order they must run,
+    total souls, and any raw ingredients still missing.
+    """
+    order = craft_order(item)
+    demand = {item: count}
+    use: Dict[str, int] = {}
+    crafts: List[Tuple[str, int]] = []
+    souls = 0
+    for name in reversed(order):
+        needed = demand.pop(name, 0)
+        if name != item:  # Copies of the target already in the pack are not what was asked for
+            held = min(inventory.count(name), needed)
+            if held:
+                use[name] = held
+                needed -= held
+        if not needed:
+            continue
+        recipe = crafting_recipes[name]
+        crafts.append((name, needed))
+        souls += recipe['souls'] * needed
+        for ingredient, per_craft in recipe['ingredients'].items():
+            demand[ingredient] = demand.get(ingredient, 0) + per_craft * needed
+    missing = {}
+    for name, needed in demand.items():  # Only raw ingredients are left
+        held = min(inventory.count(name), needed)
+        if held:
+            use[name] = held
+        if needed > held:
+            missing[name] = needed - held
+    crafts.reverse()
+    return {'item': item, 'count': count, 'use': use, 'crafts': crafts, 'souls': souls, 'missing': missing}
+
+def max_craftable(inventory: Inventory, souls: int, item: str) -> Tuple[int, Dict]:
+    """The most of item the pack and soul budget allow, with the plan for that many."""
+    def affordable(plan: Dict) -> bool:
+        return not plan['missing'] and plan['souls'] <= souls
+
+    best = plan_craft(inventory, item, 0)
+    low, high = 0, len(inventory) + max(souls, 0)  # Every craft eats at least one held item or soul
+    while low < high:
+        middle = (low + high + 1) // 2
+        plan = plan_craft(inventory, item, middle)
+        if affordable(plan):
+            low, best = middle, plan
+        else:
+            high = middle - 1
+    return low, best
+
+def craft_item(session: 'GameSession', item: str, count: Optional[int] = 1) -> None:
+    """Craft count of an item at a crafting station (None for as many as possible), making missing parts on the way."""
+    player = session.player
+    if item not in crafting_recipes:
+        session.say("No such recipe exists.")
+        return
+    try:
+        if count is None:
+            count, plan = max_craftable(player.inventory, player.souls, item)
+            if not count:
+                plan = plan_craft(player.inventory, item)
+        else:
+            plan = plan_craft(player.inventory, item, count)
+    except CraftingCycle as e:
+        session.say(f"The recipe devours itself ({e}); no forge can finish it.")
+        return
+    if player.souls < plan['souls']:
+        session.say(f"Not enough souls. Required: {plan['souls']}")
+        return
+    if plan['missing']:
+        for ingredient, short in plan['missing'].items():
+            session.say(f"Missing {short} {ingredient}(s).")
+        return
+    for name, times in plan['crafts']:
+        for ingredient, per_craft in crafting_recipes[name]['ingredients'].items():
+            player.inventory.remove(ingredient, per_craft * times)
+        player.inventory.append(name, times)
+        if name != item:
+            session.say(f"You first craft {times} {name}(s) for the work.")
+    player.souls -= plan['souls']
+    if count == 1:
+        session.say(f"You craft a {item}! {crafting_recipes[item]['desc']}")
+    else:
+        session.say(f"You craft {count} {item}s for {plan['souls']} souls! {crafting_recipes[item]['desc']}")
+
+def show_craft_plan(session: 'GameSession', item: str) -> None:
+    """Explain how one of an item would be crafted now, and how many the pack allows."""
+    player = session.player
+    if item not in crafting_recipes:
+        session.say("No such recipe exists.")
+        return
+    try:
+        plan = plan_craft(player.inventory, item)
+        most, _ = max_craftable(player.inventory, player.souls, item)
+    except CraftingCycle as e:
+        session.say(f"The recipe devours itself ({e}); no forge can finish it.")
+        return
+    session.say(f"\nTo craft a {item}:")
+    if plan['use']:
+        session.say("  From your pack: " + ', '.join(f"{name} x{n}" for name, n in plan['use'].items()))
+    session.say("  Craft in turn: " + ', then '.join(f"{name} x{n}" for name, n in plan['crafts']))
+    session.say(f"  Souls: {plan['souls']} (you hold {player.souls})")
+    if plan['missing']:
+        session.say("  Still missing: " + ', '.join(f"{name} x{n}" for name, n in plan['missing'].items()))
+    session.say(f"You could craft {most} right now.")
+
+# --- Headless Combat Simulation ---
+def simulation_player(weapon: str, armor_name: Optional[str] = None, level: int = 1) -> PlayerState:
+    """Build a player for a loadout the way equipping and leveling would."""
+    return PlayerState(
+        name=f"{weapon}/{armor_name or 'no_armor'}",
+        level=level,
+        equipped_weapon=weapon, equipped_armor=armor_name,
+        explored={START_ROOM},
+        stealth=bool(armor_name and armor[armor_name].get('stealth'))
+    )
+
+def _distribution(values) -> Dict:
+    """Summarize a NumPy array as plain numbers fit for printing or JSON."""
+    if values.size == 0:
+        return {'count': 0}
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    counts, edges = np.histogram(values, bins=10)
+    return {
+        'count': int(values.size),
+        'mean': float(values.mean()), 'std': float(values.std()),
+        'min': int(values.min()), 'p5': float(p5), 'median': float(p50), 'p95': float(p95), 'max': int(values.max()),
+        'histogram': {'edges': [float(e) for e in edges], 'counts': [int(c) for c in counts]}
+    }
+
+def _push_stacks(stacks, head, lanes, turns: int) -> None:
+    """Start an effect stack in each lane's ring buffer, overwriting its oldest slot."""
+    slots = head[lanes]
+    stacks[lanes, slots] = turns
+    head[lanes] = (slots + 1) % stacks.shape[1]
+
+def _tick_stacks(stacks, lanes):
+    """Count each lane's running stacks, then age them all by a turn."""
+    rows = stacks[lanes]
+    running = rows > 0
+    stacks[lanes] = rows - running
+    return running.sum(axis=1)
+
+def simulate_fights(player: PlayerState, enemy_key: str, fights: int = 100_000, seed: Optional[int] = None,
+                    max_turns: int = 200, tonics: int = 0) -> Dict:
+    """Run many independent fights at once, following enhanced_combat's rules.
+
+    Each fight is one lane of a set of NumPy arrays; lanes drop out of the
+    active index as soon as either side falls. The player spends the first
+    `tonics` turns drinking fire tonics, then only attacks. Stacking effects
+    (bleed, burn, ice slow) are per-lane ring buffers of turns remaining,
+    capped like EffectEngine's stacks. Fights still running after max_turns
+    (both sides unable to hurt each other) are reported as unresolved.
+    """
+    if np is None:
+        raise RuntimeError("The combat simulator needs NumPy (pip install numpy).")
+    rng = np.random.default_rng(seed)
+    template = enemies[enemy_key]
+    ai = template['ai']
+    special_chance = AI_SPECIAL_CHANCE.get(ai, 0.0)
+    weapon = weapons.get(player.equipped_weapon, {})
+    extra_damage = weapon.get('fire_damage', 0) + weapon.get('dark_damage', 0)
+    is_warden = template['name'] == 'Relic Warden'
+
+    player_hp = np.full(fights, player.health, dtype=np.int32)
+    player_mana = np.full(fights, player.mana, dtype=np.int32)
+    enemy_hp = np.full(fights, template['health'], dtype=np.int32)
+    enemy_attack = np.full(fights, template['attack'], dtype=np.int32)
+    enemy_defense = np.full(fights, template['defense'], dtype=np.int32)
+    tonic = consumables['fire_tonic']
+    bleed = np.zeros((fights, BLEED_MAX_STACKS), dtype=np.int8)
+    burn = np.zeros((fights, BURN_MAX_STACKS), dtype=np.int8)
+    slow = np.zeros((fights, SLOW_MAX_STACKS), dtype=np.int8)
+    bleed_head, burn_head, slow_head = (np.zeros(fights, dtype=np.int8) for _ in range(3))
+    turns = np.zeros(fights, dtype=np.int32)
+    active = np.arange(fights)
+
+    for turn in range(1, max_turns + 1):
+        if active.size == 0:
+            break
+        turns[active] = turn
+
+        if turn <= tonics:
+            # Player turn: drink a fire tonic, setting the foe alight
+            _push_stacks(burn, burn_head, active, tonic['duration'])
+        else:
+            # Player turn: attack, crit, weapon effects
+            damage = np.maximum(0, player.attack - enemy_defense[active])
+            damage[rng.random(active.size) < CRIT_CHANCE] *= 2
+            enemy_hp[active] -= damage + extra_damage
+            if 'bleed' in weapon:
+                _push_stacks(bleed, bleed_head, active[rng.random(active.size) < BLEED_CHANCE], BLEED_TURNS)
+            if 'ice_slow' in weapon:
+                _push_stacks(slow, slow_head, active, SLOW_TURNS)
+
+        # Enemy turn, only for foes still standing
+        standing = active[enemy_hp[active] > 0]
+        if standing.size:
+            slowed = (slow[standing] > 0).sum(axis=1) * SLOW_AMOUNT if 'ice_slow' in weapon else 0
+            damage = np.maximum(0, enemy_attack[standing] - slowed - player.defense)
+            if not player.stealth:
+                special = np.zeros(standing.size, dtype=bool)
+                if special_chance:
+                    special = rng.random(standing.size) < special_chance
+                    if ai == 'caster':
+                        special &= enemy_hp[standing] > 10
+                player_hp[standing[~special]] -= damage[~special]
+                specials = standing[special]
+                if ai == 'caster':
+                    player_hp[specials] -= 5
+                elif ai == 'tank':
+                    enemy_defense[specials] += 2
+                elif ai == 'stealth':
+                    enemy_attack[specials] += 3
+                elif ai == 'boss':
+                    player_mana[specials] -= 10
+            if is_warden:
+                drained = standing[rng.random(standing.size) < WARDEN_DRAIN_CHANCE]
+                player_hp[drained] -= WARDEN_DRAIN
+
+        # Effects tick for every fight still in the loop this turn
+        if 'bleed' in weapon:
+            enemy_hp[active] -= _tick_stacks(bleed, active) * BLEED_DAMAGE
+        if tonics:
+            enemy_hp[active] -= _tick_stacks(burn, active) * tonic['fire_damage']
+        if 'ice_slow' in weapon:
+            _tick_stacks(slow, active)
+
+        active = active[(player_hp[active] > 0) & (enemy_hp[active] > 0)]
+
+    losses = player_hp <= 0
+    wins = (enemy_hp <= 0) & ~losses
+    return {
+        'enemy': enemy_key,
+        'loadout': player.name,
+        'fights': fights,
+        'win_rate': float(wins.mean()),
+        'loss_rate': float(losses.mean()),
+        'unresolved_rate': float(active.size / fights),
+        'turns': _distribution(turns),
+        'hp_remaining': _distribution(player_hp[wins])
+    }
+
+def run_balance_report(fights: int, level: int = 1, seed: Optional[int] = None,
+                       enemy_keys: Optional[List[str]] = None, loadouts: Optional[List[Tuple[str, Optional[str]]]] = None,
+                       tonics: int = 0) -> List[Dict]:
+    """Simulate every enemy against every loadout and print a win-rate table."""
+    enemy_keys = enemy_keys or list(enemies)
+    loadouts = loadouts or [('sword', None), ('staff', None), ('bow', None)]
+    results = []
+    started = time.perf_counter()
+    print(f"\n{'Enemy':<16} {'Loadout':<28} {'Win %':>7} {'Turns':>6} {'HP left':>8}")
+    for enemy_key in enemy_keys:
+        for weapon, armor_name in loadouts:
+            player = simulation_player(weapon, armor_name, level)
+            result = simulate_fights(player, enemy_key, fights, seed, tonics=tonics)
+            results.append(result)
+            hp_left = result['hp_remaining'].get('mean', 0.0)
+            print(f"{enemy_key:<16} {player.name:<28} {result['win_rate'] * 100:>6.1f}% {result['turns']['mean']:>6.1f} {hp_left:>8.1f}")
+    elapsed = time.perf_counter() - started
+    print(f"\n{len(results) * fights:,} fights simulated in {elapsed:.2f}s.")
+    return results
+
+# --- Exact Fight Solver ---
+SOLVER_SPELLS = tuple(name for name, spell in spells.items() if 'damage' in spell)
+
+def _age_stacks(stacks: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Age each running stack by a turn, dropping those that run out."""
+    return tuple(left - 1 for left in stacks if left > 1)
+
+def _add_stack(stacks: Tuple[int, ...], turns: int, cap: int) -> Tuple[int, ...]:
+    """Start a stack, dropping the oldest (shortest-lived) one at the cap like EffectEngine."""
+    if len(stacks) >= cap:
+        stacks = stacks[1:]
+    return stacks + (turns,)
+
+def _weapon_traits(weapon_key: Optional[str], spell: Optional[str]) -> Tuple[int, bool, bool, int]:
+    """What a weapon adds to a fight beyond attack: extra damage, bleed, ice slow and spell bonus."""
+    weapon = weapons.get(weapon_key, {})
+    return (weapon.get('fire_damage', 0) + weapon.get('dark_damage', 0), 'bleed' in weapon, 'ice_slow' in weapon,
+            weapon.get('spell_bonus', 0) if spell else 0)
+
+@functools.lru_cache(maxsize=None)
+def _solve_matchup(enemy_key: str, attack: int, defense: int, health: int, mana: int, stealth: bool,
+                   traits: Tuple[int, bool, bool, int], tonics: int, spell: Optional[str]) -> Tuple[float, float, float, float, int]:
+    """Solve one matchup exactly: (win, loss, turns mass, HP-left mass, states).
+
+    A state is everything one turn of enhanced_combat reads or changes:
+    (player HP, mana, enemy HP, enemy attack and defense gained from specials,
+    bleed, burn and slow stacks as sorted turns remaining, tonics still to
+    drink). Each turn branches on crits, bleed procs, AI specials and the
+    Warden's drain. Player and enemy HP, mana and tonics never rise and the
+    special bonuses never fall, so the only cycles are turns where nothing
+    changes; their self-loop is folded in algebraically, and a state that can
+    only loop is a stalemate, counted as unresolved. Values that can no longer
+    matter are clamped (defense past the player's attack, attack past a
+    one-hit kill, mana below the spell's cost) so equivalent states merge.
+    Masses are expectations over resolved fights (turns) and won fights (HP
+    left); the caller divides them by the matching probability. Loadouts that
+    differ only in ways the fight never reads share one solve.
+    """
+    template = enemies[enemy_key]
+    ai = template['ai']
+    special_chance = AI_SPECIAL_CHANCE.get(ai, 0.0)
+    is_warden = template['name'] == 'Relic Warden'
+    extra_damage, bleeds, ice, spell_bonus = traits
+    tonic = consumables['fire_tonic']
+    cast = spells[spell] if spell else None
+    cost = cast['mana_cost'] if cast else 0
+    spell_damage = cast['damage'] + spell_bonus if cast else 0
+    max_defense_bonus = max(0, attack - template['defense'])
+
+    @functools.lru_cache(maxsize=None)
+    def enemy_turn(player_hp, mana, specials, attack_bonus, defense_bonus, slowed):
+        """(probability, player HP, mana, attack bonus, defense bonus) for each way the foe's turn goes."""
+        damage = max(0, template['attack'] + attack_bonus - SLOW_AMOUNT * slowed - defense)
+        if stealth:
+            outcomes = [(1.0, player_hp, mana, attack_bonus, defense_bonus)]
+        else:
+            chance = special_chance if specials else 0.0
+            outcomes = [(1.0 - chance, player_hp - damage, mana, attack_bonus, defense_bonus)] if chance < 1.0 else []
+            if chance:
+                if ai == 'caster':
+                    outcomes.append((chance, player_hp - 5, mana, attack_bonus, defense_bonus))
+                elif ai == 'tank':
+                    outcomes.append((chance, player_hp, mana, attack_bonus, min(max_defense_bonus, defense_bonus + 2)))
+                elif ai == 'stealth':
+                    # Past a sure kill at full slow, more attack changes nothing
+                    lethal = max(0, player_hp + defense + SLOW_AMOUNT * SLOW_MAX_STACKS - template['attack'])
+                    outcomes.append((chance, player_hp, mana, min(lethal, attack_bonus + 3), defense_bonus))
+                elif ai == 'boss':
+                    outcomes.append((chance, player_hp, mana - 10, attack_bonus, defense_bonus))
+        if not is_warden:
+            return outcomes
+        drained = [(p * WARDEN_DRAIN_CHANCE, hp - WARDEN_DRAIN, m, a, d) for p, hp, m, a, d in outcomes]
+        return [(p * (1.0 - WARDEN_DRAIN_CHANCE), hp, m, a, d) for p, hp, m, a, d in outcomes] + drained
+
+    def transitions(state):
+        """Every way one turn can go from state: (probability, next state or None, player HP, won)."""
+        player_hp, mana, enemy_hp, attack_bonus, defense_bonus, bleed, burn, slow, tonics_left = state
+        # Player turn: (probability, enemy HP, bleed, slow) for each way it can go
+        if tonics_left:
+            burn = _add_stack(burn, tonic['duration'], BURN_MAX_STACKS)
+            tonics_left -= 1
+            moves = [(1.0, enemy_hp, bleed, slow)]
+        elif cast and mana >= cost:
+            mana -= cost
+            if 'slow' in cast:
+                slow = _add_stack(slow, SLOW_TURNS, SLOW_MAX_STACKS)
+            moves = [(1.0, enemy_hp - spell_damage, bleed, slow)]
+        else:
+            if ice:
+                slow = _add_stack(slow, SLOW_TURNS, SLOW_MAX_STACKS)
+            damage = max(0, attack - template['defense'] - defense_bonus)
+            hits = [(CRIT_CHANCE, damage * 2), (1.0 - CRIT_CHANCE, damage)] if damage else [(1.0, 0)]
+            moves = []
+            for p, dealt in hits:
+                hit_hp = enemy_hp - dealt - extra_damage
+                if bleeds:
+                    moves.append((p * BLEED_CHANCE, hit_hp, _add_stack(bleed, BLEED_TURNS, BLEED_MAX_STACKS), slow))
+                    moves.append((p * (1.0 - BLEED_CHANCE), hit_hp, bleed, slow))
+                else:
+                    moves.append((p, hit_hp, bleed, slow))
+        results = []
+        for p, hit_hp, hit_bleed, hit_slow in moves:
+            if hit_hp > 0:
+                answers = enemy_turn(player_hp, mana, ai != 'caster' or hit_hp > 10, attack_bonus, defense_bonus, len(hit_slow))
+            else:
+                answers = [(1.0, player_hp, mana, attack_bonus, defense_bonus)]
+            # End of turn: stacks tick, then age
+            end_hp = hit_hp - len(hit_bleed) * BLEED_DAMAGE - len(burn) * tonic['fire_damage']
+            aged = (_age_stacks(hit_bleed) if hit_bleed else (), _age_stacks(burn) if burn else (),
+                    _age_stacks(hit_slow) if hit_slow else (), tonics_left)
+            for q, hp, m, a, d in answers:
+                if q == 0.0:
+                    continue
+                if hp <= 0 or end_hp <= 0:
+                    results.append((p * q, None, hp, hp > 0))
+                else:
+                    m = m if cast and m >= cost else 0
+                    results.append((p * q, (hp, m, end_hp, a, d) + aged, hp, False))
+        return results
+
+    start = (health, mana if cast and mana >= cost else 0, template['health'], 0, 0, (), (), (), tonics)
+    solved: Dict[Tuple, Tuple[float, float, float, float]] = {}
+    pending: Dict[Tuple, List] = {}
+    stack = [start]
+    while stack:
+        state = stack[-1]
+        if state in solved:
+            stack.pop()
+            continue
+        moves = pending.get(state)
+        if moves is None:
+            # First visit: solve what this state leads to first. Everything
+            # pushed above it is solved by the time it surfaces again.
+            moves = pending[state] = transitions(state)
+            unsolved = [nxt for _, nxt, _, _ in moves if nxt is not None and nxt != state and nxt not in solved]
+            if unsolved:
+                stack.extend(unsolved)
+                continue
+        stack.pop()
+        del pending[state]
+        loop = win = loss = turns = hp_left = 0.0
+        for p, nxt, hp, won in moves:
+            if nxt is None:
+                win += p * won
+                loss += p * (not won)
+                turns += p
+                hp_left += p * hp * won
+            elif nxt == state:
+                loop += p
+            else:
+                w, l, t, h = solved[nxt]
+                win += p * w
+                loss += p * l
+                turns += p * (t + w + l)
+                hp_left += p * h
+        if loop >= 1.0 - 1e-12:
+            solved[state] = (0.0, 0.0, 0.0, 0.0)
+            continue
+        scale = 1.0 / (1.0 - loop)
+        win, loss = win * scale, loss * scale
+        solved[state] = (win, loss, (turns + loop * (win + loss)) * scale, hp_left * scale)
+    return solved[start] + (len(solved),)
+
+def solve_fight(player: PlayerState, enemy_key: str, tonics: int = 0, spell: Optional[str] = None) -> Dict:
+    """Exact odds of one enhanced_combat matchup under a fixed policy.
+
+    The player drinks `tonics` fire tonics, then casts `spell` (a damage
+    spell) while mana allows, then only attacks - the simulator's policy when
+    no spell is given. Unlike simulate_fights there is no turn cap: fights
+    that can never end are unresolved, and expected turns are over the rest.
+    """
+    if spell is not None and spell not in SOLVER_SPELLS:
+        raise ValueError(f"{spell} is not a damage spell")
+    stealth = bool(player.stealth)
+    # A foe that never lands a blow makes armor moot, as mana is without a spell
+    win, loss, turns, hp_left, states = _solve_matchup(
+        enemy_key, player.attack, 0 if stealth else player.defense, player.health, player.mana if spell else 0,
+        stealth, _weapon_traits(player.equipped_weapon, spell), tonics, spell)
+    resolved = win + loss
+    return {
+        'enemy': enemy_key,
+        'loadout': player.name,
+        'win_rate': win,
+        'loss_rate': loss,
+        'unresolved_rate': 1.0 - resolved if resolved < 1.0 - 1e-12 else 0.0,
+        'expected_turns': turns / resolved if resolved else float('inf'),
+        'expected_hp_left': hp_left / win if win else 0.0,
+        'states': states
+    }
+
+def run_solver_report(level: int = 1, enemy_keys: Optional[List[str]] = None,
+                      loadouts: Optional[List[Tuple[str, Optional[str]]]] = None,
+                      tonics: int = 0, spell: Optional[str] = None) -> List[Dict]:
+    """Solve every enemy against every weapon/armor pair and print an exact win-rate table."""
+    enemy_keys = enemy_keys or list(enemies)
+    loadouts = loadouts or [(weapon, armor_name) for weapon in weapons for armor_name in (None, *armor)]
+    results = []
+    started = time.perf_counter()
+    print(f"\n{'Enemy':<16} {'Loadout':<28} {'Win %':>7} {'Turns':>6} {'HP left':>8}")
+    for enemy_key in enemy_keys:
+        for weapon, armor_name in loadouts:
+            player = simulation_player(weapon, armor_name, level)
+            result = solve_fight(player, enemy_key, tonics, spell)
+            results.append(result)
+            print(f"{enemy_key:<16} {player.name:<28} {result['win_rate'] * 100:>6.2f}% "
+                  f"{result['expected_turns']:>6.1f} {result['expected_hp_left']:>8.1f}")
+    elapsed = time.perf_counter() - started
+    states = _solve_matchup.cache_info().currsize
+    print(f"\n{len(results):,} matchups solved exactly ({states:,} distinct) in {elapsed:.2f}s.")
+    return results
+
+def handle_victory(session: 'GameSession') -> Generator[str, str, str]:
     """Handle victory condition with options to save, quit, or restart."""
-    print(f"\n{player['name']} grasps the Relic of Ages, its power a storm in your veins.")
-    print("The Underground Empire shudders, light piercing the dark above. Victory is yours—for now.")
-    player['achievements'].append('Relic Bearer')
+    player = session.player
+    session.say(f"\n{player.name} grasps the Relic of Ages, its power a storm in your veins.")
+    session.say("The Underground Empire shudders, light piercing the dark above. Victory is yours—for now.")
+    EVENTS.emit(session, 'victory', room=session.current_room)
     
     while True:
-        choice = input("What now, Relic Bearer? (save/quit/restart): ").lower().strip()
+        choice = (yield "What now, Relic Bearer? (save/quit/restart): ").lower().strip()
         if choice == 'save':
-            save_game(player)
-            print("Your triumph is recorded. What next?")
+            save_game(session)
+            session.say("Your triumph is recorded. What next?")
         elif choice == 'quit':
-            save_game(player)
+            save_game(session)
             return 'quit'
         elif choice == 'restart':
             return 'restart'
         else:
-            print("The relic hums, awaiting a clear command.")
+            session.say("The relic hums, awaiting a clear command.")
 
 def get_save_path() -> str:
     """Get the consistent save file path, handling PyInstaller bundles."""
@@ -1089,190 +2615,2202 @@ def get_save_path() -> str:
         base_path = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(base_path, SAVE_FILE)
 
-def save_game(player: Dict) -> None:
-    """Save the game state to a file, converting sets to lists."""
-    player_copy = player.copy()
-    player_copy['explored'] = list(player['explored'])
-    game_state = {
-        'player': player_copy,
-        'current_room': current_room,
-        'last_bonfire': last_bonfire,
-        'rooms': {k: {'enemies': v['enemies'], 'objects': v['objects'], 'chests': v['chests']} for k, v in rooms.items()},
-        'active_effects': active_effects
+def session_state(session: 'GameSession') -> Dict:
+    """Everything a save needs, as JSON-ready data."""
+    return {
+        'player': session.player.to_dict(),
+        'current_room': session.current_room,
+        'last_bonfire': session.last_bonfire,
+        'world': session.world.to_dict(),
+        'active_effects': session.effects.to_list(session.player)
     }
-    save_path = get_save_path()
-    print(f"Attempting to save to: {save_path}")  # Debug output
+
+def restore_state(session: 'GameSession', game_state: Dict) -> None:
+    """Put saved data back into a session; raises KeyError on incomplete saves."""
+    if not all(key in game_state for key in ['player', 'current_room', 'last_bonfire', 'active_effects']):
+        raise KeyError("Save file missing required data.")
+    if 'world' in game_state:
+        session.world.load(game_state['world'], session.say)
+    elif 'rooms' in game_state:  # Saves from before the world overlay stored every room
+        session.world.load_legacy_rooms(game_state['rooms'], session.say)
+    else:
+        raise KeyError("Save file missing required data.")
+    session.player = PlayerState.from_dict(game_state['player'])
+    session.current_room = game_state['current_room']
+    session.last_bonfire = game_state['last_bonfire']
+    session.effects.load(session.player, game_state['active_effects'])
+
+class SaveJournal:
+    """A compact snapshot plus an append-only journal of per-command deltas.
+
+    Each autosave appends one JSON line holding the ops for one command:
+    rooms and bonfire reached, player fields changed, effects, and the world
+    overlay's own ops. Every JOURNAL_COMPACT_EVERY records (and on explicit
+    saves) the full state is written to a temp file, fsynced and renamed
+    over the snapshot, and a fresh journal id starts. Records carry the id of
+    the snapshot they extend, so a crash between the rename and truncating
+    the journal never replays stale deltas, and a torn final line is ignored.
+    A new game begun over an existing save is held: autosaves are skipped
+    until the player saves, so declining to load never costs the old save.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.journal_id: Optional[str] = None
+        self.held = False
+        self.records = 0
+        self.last_player: Dict = {}
+        self.last_place: Tuple = ()
+        self.last_effects: str = ''
+
+    def reset(self, hold: bool = False) -> None:
+        """Force the next autosave to write a full snapshot, e.g. after a new player is made.
+
+        With hold, autosaves are skipped until that snapshot is written by an
+        explicit save.
+        """
+        self.journal_id = None
+        self.held = hold
+
+    def mark(self, session: 'GameSession') -> None:
+        """Remember the state just persisted so the next record holds only changes."""
+        player = session.player
+        self.last_player = {k: (v.copy() if isinstance(v, (set, Inventory, dict)) else list(v) if isinstance(v, list) else v)
+                            for k, v in player.items()}
+        self.last_place = (session.current_room, session.last_bonfire)
+        self.last_effects = json.dumps(session.effects.to_list(session.player))
+        session.world.log = []
+
+    def compact(self, session: 'GameSession') -> None:
+        """Atomically replace the snapshot with the full state and start an empty journal."""
+        self.held = False
+        self.journal_id = os.urandom(4).hex()
+        state = session_state(session)
+        state['journal_id'] = self.journal_id
+        directory = os.path.dirname(os.path.abspath(self.path))
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(encode_save_state(state, self.path))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if hasattr(os, 'O_DIRECTORY'):
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        with open(self.journal_path, 'w'):
+            pass
+        self.records = 0
+        self.mark(session)
+
+    def deltas(self, session: 'GameSession') -> List[List]:
+        """Ops describing what changed since the last record or snapshot."""
+        ops: List[List] = []
+        place = (session.current_room, session.last_bonfire)
+        if place != self.last_place:
+            ops.append(['place', *place])
+        changed = {}
+        for key, value in session.player.items():
+            if key == 'explored':
+                new_rooms = value - self.last_player.get(key, set())
+                if new_rooms:
+                    ops.append(['explored', sorted(new_rooms)])
+            elif value != self.last_player.get(key):
+                changed[key] = list(value) if isinstance(value, Inventory) else value
+        if changed:
+            ops.append(['stats', changed])
+        effects = session.effects.to_list(session.player)
+        if json.dumps(effects) != self.last_effects:
+            ops.append(['effects', effects])
+        ops.extend(session.world.log or [])
+        return ops
+
+    def autosave(self, session: 'GameSession') -> None:
+        """Append this command's deltas, compacting first when due."""
+        if self.held:
+            return
+        if self.journal_id is None or self.records >= JOURNAL_COMPACT_EVERY:
+            self.compact(session)
+            return
+        ops = self.deltas(session)
+        if not ops:
+            return
+        with open(self.journal_path, 'a') as f:
+            f.write(json.dumps({'id': self.journal_id, 'ops': ops}, separators=(',', ':')) + '\n')
+        self.records += 1
+        self.mark(session)
+
+    def load(self, session: 'GameSession') -> None:
+        """Rebuild the session from the snapshot plus every journal record that extends it."""
+        game_state = read_save_state(self.path)
+        restore_state(session, game_state)
+        journal_id = game_state.get('journal_id')
+        if journal_id and os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # Torn write from a crash; everything before it stands
+                    if record.get('id') == journal_id:
+                        apply_journal_ops(session, record['ops'])
+        # Fold what was replayed into a fresh snapshot so the next journal starts clean
+        self.compact(session)
+
+def apply_journal_ops(session: 'GameSession', ops: List[List]) -> None:
+    """Apply one journal record's ops to a session."""
+    world_ops = []
+    for op in ops:
+        kind = op[0]
+        if kind == 'place':
+            session.current_room, session.last_bonfire = op[1], op[2]
+        elif kind == 'explored':
+            session.player.explored.update(op[1])
+        elif kind == 'stats':
+            session.player.update(op[1])
+        elif kind == 'effects':
+            session.effects.load(session.player, op[1])
+        else:
+            world_ops.append(op)
+    session.world.replay(world_ops)
+
+@timed('save')
+def save_game(session: 'GameSession') -> None:
+    """Save the full game state as a fresh snapshot, folding in the journal."""
+    if session.save_path is None:
+        session.say("This realm keeps no annals; your journey cannot be saved.")
+        return
+    session.say(f"Attempting to save to: {session.save_path}")  # Debug output
+    try:
+        session.journal.compact(session)
+        session.say("Your journey is etched into the annals.")
+    except (IOError, PermissionError) as e:
+        session.say(f"Failed to save game: {e}. Your progress may be lost.")
+
+def autosave(session: 'GameSession') -> None:
+    """Journal whatever the last command changed; cheap enough to run after every command."""
+    if session.journal is None or session.player is None:
+        return
     try:
-        with open(save_path, 'w') as f:
-            json.dump(game_state, f, indent=2)
-        print("Your journey is etched into the annals.")
+        session.journal.autosave(session)
     except (IOError, PermissionError) as e:
-        print(f"Failed to save game: {e}. Your progress may be lost.")
-
-def load_game() -> Tuple[Optional[Dict], str, str, Dict]:
-    """Load the game state from a file, converting lists back to sets."""
-    save_path = get_save_path()
-    print(f"Checking for save file at: {save_path}")  # Debug output
-    if not os.path.exists(save_path):
-        print("No tale to reclaim from the void.")
-        return None, 'ruined_atrium', 'ruined_atrium', {}
+        session.say(f"Autosave failed: {e}.")
+
+@timed('load')
+def load_game(session: 'GameSession') -> bool:
+    """Load the game state from the snapshot and journal into the session."""
+    save_path = session.save_path
+    session.say(f"Checking for save file at: {save_path}")  # Debug output
+    if save_path is None or not os.path.exists(save_path):
+        session.say("No tale to reclaim from the void.")
+        return False
     try:
-        with open(save_path, 'r') as f:
-            game_state = json.load(f)
-        if not all(key in game_state for key in ['player', 'current_room', 'last_bonfire', 'rooms', 'active_effects']):
-            raise KeyError("Save file missing required data.")
-        game_state['player']['explored'] = set(game_state['player']['explored'])
-        for room, data in game_state['rooms'].items():
-            if room not in rooms:
-                print(f"Warning: Unknown room '{room}' in save file, skipping.")
-                continue
-            rooms[room]['enemies'] = data.get('enemies', rooms[room]['enemies'])
-            rooms[room]['objects'] = data.get('objects', rooms[room]['objects'])
-            rooms[room]['chests'] = data.get('chests', rooms[room]['chests'])
-        print("You rise from the ashes of a past life.")
-        return game_state['player'], game_state['current_room'], game_state['last_bonfire'], game_state['active_effects']
-    except (json.JSONDecodeError, KeyError, IOError) as e:
-        print(f"Failed to load save file: {e}. Starting anew.")
-        return None, 'ruined_atrium', 'ruined_atrium', {}
-
-def game_setup() -> Tuple[Dict, str, str, Dict]:
-    """Handle initial game setup or restart with load option."""
-    print(f"Bonfire's Echo v{VERSION}")
-    print_lore()
-    save_path = get_save_path()
-    if os.path.exists(save_path):
-        choice = input("Load saved game? (yes/no): ").lower().strip()
-        if choice.startswith('y'):
-            loaded_player, loaded_room, loaded_bonfire, loaded_effects = load_game()
-            if loaded_player:
-                return loaded_player, loaded_room, loaded_bonfire, loaded_effects
-    print("No save found or load declined. A new tale begins.")
-    player = setup_player()
-    return player, 'ruined_atrium', 'ruined_atrium', {}
-
-# --- Game Setup and Loop ---
-player, current_room, last_bonfire, active_effects = game_setup()
-print_ascii_art()
-
-while True:
-    room = rooms[current_room]
-    if not enhanced_enter_room(room, player):
-        continue
-    if current_room == 'relic_vault' and 'relic_of_ages' in player['inventory']:
-        result = handle_victory(player)
-        if result == 'quit':
-            break
-        elif result == 'restart':
-            player, current_room, last_bonfire, active_effects = game_setup()
-            for room_name, enemy_list in master_enemies.items():
-                rooms[room_name]['enemies'] = enemy_list.copy()
-            print("A new journey begins in the shadowed depths.")
-            print_ascii_art()
+        session.journal.load(session)
+        session.say("You rise from the ashes of a past life.")
+        return True
+    except (json.JSONDecodeError, UnicodeDecodeError, KeyError, IndexError, struct.error, IOError) as e:
+        session.say(f"Failed to load save file: {e}. Starting anew.")
+        return False
+
+# --- Binary Saves ---
+BINARY_SAVE_SUFFIX = ".bsav"
+BINARY_SAVE_MAGIC = b'BESV'
+BINARY_SAVE_VERSION = 1
+_SAVE_HEADER = struct.Struct('<4sHH')     # magic, format version, section count
+_SAVE_TOC_ENTRY = struct.Struct('<4sQQ')  # section tag, offset, length
+_U32 = struct.Struct('<I')
+_PLAYER_FIELD = struct.Struct('<IB')      # key string id, value type
+REQUIRED_SAVE_SECTIONS = (b'STRS', b'PLYR', b'PLCE', b'EXPL', b'WRLD', b'EFCT')
+# Player field value types
+_NONE, _BOOL, _INT, _STR, _STR_LIST, _JSON = range(6)
+
+def _id_array(ids) -> bytes:
+    """Little-endian uint32 bytes for a sequence of string ids."""
+    values = array('I', ids)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+def _read_ids(data: memoryview, offset: int) -> Tuple[array, int]:
+    """Read a count-prefixed uint32 id array; returns the ids and the offset after them."""
+    (count,) = _U32.unpack_from(data, offset)
+    offset += 4
+    values = array('I')
+    values.frombytes(data[offset:offset + 4 * count])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values, offset + 4 * count
+
+def encode_binary_save(state: Dict) -> bytes:
+    """Pack a save state into the sectioned binary format.
+
+    Room, item and other names are interned into one string table and
+    referenced by uint32 id everywhere else. A table of contents after the
+    header lets readers find and decode any one section on its own.
+    """
+    ids: Dict[str, int] = {}
+    def sid(text: str) -> int:
+        return ids.setdefault(text, len(ids))
+
+    player = state['player']
+    sections: Dict[bytes, bytes] = {}
+    sections[b'PLCE'] = struct.pack('<II', sid(state['current_room']), sid(state['last_bonfire']))
+    explored = [sid(room) for room in player['explored']]
+    sections[b'EXPL'] = _U32.pack(len(explored)) + _id_array(explored)
+
+    fields = []
+    for key, value in player.items():
+        if key == 'explored':
             continue
-    command = input("> ").lower().split()
-    if not command:
-        print("The silence deafens.")
-        continue
-    verb = command[0]
-
-    if verb == 'go' and len(command) > 1:
-        direction = command[1]
-        if direction in room['exits']:
-            current_room = room['exits'][direction]
-            print(f"You stagger {direction} into the abyss.")
+        if value is None:
+            fields.append(_PLAYER_FIELD.pack(sid(key), _NONE))
+        elif isinstance(value, bool):
+            fields.append(_PLAYER_FIELD.pack(sid(key), _BOOL) + struct.pack('<B', value))
+        elif isinstance(value, int):
+            fields.append(_PLAYER_FIELD.pack(sid(key), _INT) + struct.pack('<q', value))
+        elif isinstance(value, str):
+            fields.append(_PLAYER_FIELD.pack(sid(key), _STR) + _U32.pack(sid(value)))
+        elif isinstance(value, list) and all(isinstance(v, str) for v in value):
+            fields.append(_PLAYER_FIELD.pack(sid(key), _STR_LIST) + _U32.pack(len(value)) + _id_array([sid(v) for v in value]))
         else:
-            print("That way is barred or lost.")
-    elif verb == 'take' and len(command) > 1:
-        item = ' '.join(command[1:]).lower()
-        if item in room['objects']:
-            player['inventory'].append(item)
-            room['objects'].remove(item)
-            print(f"You take the {item}, another weight on your soul.")
+            blob = json.dumps(value).encode('utf-8')
+            fields.append(_PLAYER_FIELD.pack(sid(key), _JSON) + _U32.pack(len(blob)) + blob)
+    sections[b'PLYR'] = _U32.pack(len(fields)) + b''.join(fields)
+
+    # The overlay is stored column-wise: one entry per changed (room, field) pair,
+    # then every entry's values back to back, so readers slice whole arrays at once.
+    world = state['world']
+    entry_rooms, entry_fields, entry_counts, values = [], [], [], []
+    field_index = {field: i for i, field in enumerate(MUTABLE_ROOM_FIELDS)}
+    for room_name, changed in world['changes'].items():
+        room_id = sid(room_name)
+        for field, field_values in changed.items():
+            entry_rooms.append(room_id)
+            entry_fields.append(field_index[field])
+            entry_counts.append(len(field_values))
+            values.extend(map(sid, field_values))
+    sections[b'WRLD'] = b''.join([
+        _U32.pack(len(entry_rooms)) + _id_array(entry_rooms),
+        _U32.pack(len(entry_fields)) + bytes(entry_fields),
+        _U32.pack(len(entry_counts)) + _id_array(entry_counts),
+        _U32.pack(len(values)) + _id_array(values),
+        _U32.pack(len(world['solved_puzzles'])) + _id_array([sid(n) for n in world['solved_puzzles']]),
+        _U32.pack(len(world['emptied_chests'])) + _id_array([sid(n) for n in world['emptied_chests']])
+    ])
+
+    sections[b'EFCT'] = json.dumps(state['active_effects']).encode('utf-8')
+    sections[b'META'] = json.dumps({'journal_id': state.get('journal_id')}).encode('utf-8')
+    sections[b'STRS'] = _U32.pack(len(ids)) + '\0'.join(ids).encode('utf-8')
+
+    order = [b'STRS', b'PLCE', b'PLYR', b'EXPL', b'WRLD', b'EFCT', b'META']
+    offset = _SAVE_HEADER.size + _SAVE_TOC_ENTRY.size * len(order)
+    toc = []
+    for tag in order:
+        toc.append(_SAVE_TOC_ENTRY.pack(tag, offset, len(sections[tag])))
+        offset += len(sections[tag])
+    header = _SAVE_HEADER.pack(BINARY_SAVE_MAGIC, BINARY_SAVE_VERSION, len(order))
+    return header + b''.join(toc) + b''.join(sections[tag] for tag in order)
+
+class BinarySave:
+    """Read access to a binary save that decodes each section only when first asked for."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = memoryview(data)
+        if len(data) < _SAVE_HEADER.size:
+            raise KeyError("Save file is truncated.")
+        magic, version, count = _SAVE_HEADER.unpack_from(self.data, 0)
+        if magic != BINARY_SAVE_MAGIC:
+            raise KeyError("Not a binary save file.")
+        if version > BINARY_SAVE_VERSION:
+            raise KeyError(f"Save format v{version} is newer than this game understands.")
+        self.version = version
+        self.toc: Dict[bytes, Tuple[int, int]] = {}
+        for i in range(count):
+            tag, offset, length = _SAVE_TOC_ENTRY.unpack_from(self.data, _SAVE_HEADER.size + i * _SAVE_TOC_ENTRY.size)
+            if offset + length > len(data):
+                raise KeyError(f"Save section {tag.decode()} is truncated.")
+            self.toc[tag] = (offset, length)
+        missing = [tag.decode() for tag in REQUIRED_SAVE_SECTIONS if tag not in self.toc]
+        if missing:
+            raise KeyError(f"Save file missing required data: {', '.join(missing)}.")
+        self._cache: Dict[bytes, object] = {}
+
+    @classmethod
+    def open(cls, path: str) -> 'BinarySave':
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def section(self, tag: bytes) -> memoryview:
+        offset, length = self.toc[tag]
+        return self.data[offset:offset + length]
+
+    def _cached(self, tag: bytes, decode):
+        if tag not in self._cache:
+            self._cache[tag] = decode(self.section(tag))
+        return self._cache[tag]
+
+    @property
+    def strings(self) -> List[str]:
+        def decode(data: memoryview) -> List[str]:
+            (count,) = _U32.unpack_from(data, 0)
+            return bytes(data[4:]).decode('utf-8').split('\0') if count else []
+        return self._cached(b'STRS', decode)
+
+    @property
+    def place(self) -> Tuple[str, str]:
+        strings = self.strings
+        return self._cached(b'PLCE', lambda data: tuple(strings[i] for i in struct.unpack_from('<II', data, 0)))
+
+    @property
+    def explored(self) -> set:
+        strings = self.strings
+        return self._cached(b'EXPL', lambda data: {strings[i] for i in _read_ids(data, 0)[0]})
+
+    @property
+    def player(self) -> Dict:
+        def decode(data: memoryview) -> Dict:
+            strings = self.strings
+            player = {}
+            (count,) = _U32.unpack_from(data, 0)
+            offset = 4
+            for _ in range(count):
+                key_id, kind = _PLAYER_FIELD.unpack_from(data, offset)
+                offset += _PLAYER_FIELD.size
+                if kind == _NONE:
+                    value = None
+                elif kind == _BOOL:
+                    value = bool(data[offset])
+                    offset += 1
+                elif kind == _INT:
+                    (value,) = struct.unpack_from('<q', data, offset)
+                    offset += 8
+                elif kind == _STR:
+                    value = strings[_U32.unpack_from(data, offset)[0]]
+                    offset += 4
+                elif kind == _STR_LIST:
+                    values, offset = _read_ids(data, offset)
+                    value = [strings[i] for i in values]
+                else:
+                    (length,) = _U32.unpack_from(data, offset)
+                    value = json.loads(bytes(data[offset + 4:offset + 4 + length]))
+                    offset += 4 + length
+                player[strings[key_id]] = value
+            return player
+        return self._cached(b'PLYR', decode)
+
+    @property
+    def world(self) -> Dict:
+        def decode(data: memoryview) -> Dict:
+            strings = self.strings
+            entry_rooms, offset = _read_ids(data, 0)
+            (count,) = _U32.unpack_from(data, offset)
+            entry_fields = bytes(data[offset + 4:offset + 4 + count])
+            entry_counts, offset = _read_ids(data, offset + 4 + count)
+            values, offset = _read_ids(data, offset)
+            names = [strings[i] for i in values]
+            changes: Dict[str, Dict[str, List[str]]] = {}
+            start = 0
+            for room_id, field, length in zip(entry_rooms, entry_fields, entry_counts):
+                room_name = strings[room_id]
+                fields = changes.get(room_name)
+                if fields is None:
+                    fields = changes[room_name] = {}
+                fields[MUTABLE_ROOM_FIELDS[field]] = names[start:start + length]
+                start += length
+            solved, offset = _read_ids(data, offset)
+            emptied, offset = _read_ids(data, offset)
+            return {
+                'changes': changes,
+                'solved_puzzles': [strings[i] for i in solved],
+                'emptied_chests': [strings[i] for i in emptied]
+            }
+        return self._cached(b'WRLD', decode)
+
+    @property
+    def active_effects(self) -> List[Dict]:
+        return self._cached(b'EFCT', lambda data: json.loads(bytes(data)))
+
+    @property
+    def meta(self) -> Dict:
+        return self._cached(b'META', lambda data: json.loads(bytes(data))) if b'META' in self.toc else {}
+
+    def to_state(self) -> Dict:
+        """Decode every section into the same dict a JSON save holds."""
+        player = dict(self.player)
+        player['explored'] = sorted(self.explored)
+        current_room, last_bonfire = self.place
+        state = {
+            'player': player,
+            'current_room': current_room,
+            'last_bonfire': last_bonfire,
+            'world': self.world,
+            'active_effects': self.active_effects
+        }
+        if self.meta.get('journal_id'):
+            state['journal_id'] = self.meta['journal_id']
+        return state
+
+def read_save_state(path: str) -> Dict:
+    """Read a JSON or binary save (told apart by the magic bytes) into a state dict."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] == BINARY_SAVE_MAGIC:
+        return BinarySave(data).to_state()
+    return json.loads(data)
+
+def encode_save_state(state: Dict, path: str) -> bytes:
+    """Serialize a state dict in the format the path's extension asks for."""
+    if path.endswith(BINARY_SAVE_SUFFIX):
+        return encode_binary_save(state)
+    return json.dumps(state, separators=(',', ':')).encode('utf-8')
+
+def upgrade_save_state(state: Dict) -> Dict:
+    """A save state in the current layout; older saves go through the same restore a load does."""
+    if 'world' in state:
+        return state
+    session = GameSession(persist=False, sink=NullSink())
+    restore_state(session, state)
+    return session_state(session)
+
+def convert_save(source: str, destination: str) -> None:
+    """Convert a save between JSON and binary; the destination extension picks the format."""
+    state = upgrade_save_state(read_save_state(source))
+    with open(destination, 'wb') as f:
+        f.write(encode_save_state(state, destination))
+    print(f"Converted {source} ({os.path.getsize(source):,} bytes) to {destination} ({os.path.getsize(destination):,} bytes).")
+
+def synthetic_save_state(room_count: int) -> Dict:
+    """A save state over a synthetic world where every room was explored and changed."""
+    names = [START_ROOM] + [f"room_{i:06d}" for i in range(1, room_count)]
+    player = new_player('Benchmark', '1').to_dict()
+    player['explored'] = sorted(names)  # As a real save writes them
+    player['inventory'] = ['healing_potion', 'mana_elixir', 'iron_ore', 'herb', 'vial'] * 20
+    changes = {name: {'enemies': [], 'objects': ['torch'], 'traps': []} for name in names}
+    return {
+        'player': player,
+        'current_room': names[-1],
+        'last_bonfire': START_ROOM,
+        'world': {'changes': changes, 'solved_puzzles': names[::50], 'emptied_chests': [chest_key(START_ROOM, c) for c in sorted(chests)]},
+        'active_effects': [{'kind': 'barrier', 'turns': 2, 'amount': 5}]
+    }
+
+def benchmark_save_formats(room_counts: Sequence[int] = (len(rooms), 100_000), repeat: int = 5) -> List[Dict]:
+    """Compare JSON and binary saves by size and by save, full-load and lazy-load latency."""
+    def best(fn) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    results = []
+    print(f"\n{'Rooms':>8} {'Format':<7} {'Bytes':>12} {'Save ms':>9} {'Load ms':>9} {'Peek ms':>9}")
+    for count in room_counts:
+        if count == len(rooms):
+            state = synthetic_save_state(0)
+            state['player']['explored'] = list(rooms)
+            state['world']['changes'] = {name: {'enemies': [], 'objects': []} for name in rooms}
+            state['world']['solved_puzzles'] = [name for name in rooms if 'puzzle' in rooms[name]]
         else:
-            print("No such prize lies here.")
-    elif verb == 'equip' and len(command) > 1:
-        item = ' '.join(command[1:]).lower()
-        if item in player['inventory']:
-            if item in weapons:
-                player['equipped_weapon'] = item
-                player['attack'] = weapons[item]['attack']
-                player['inventory'].remove(item)
-                print(f"You wield the {item}. {weapons[item]['desc']}")
-            elif item in armor:
-                if player['equipped_armor']:
-                    old_armor = armor[player['equipped_armor']]
-                    player['max_mana'] -= old_armor.get('mana_bonus', 0)
-                    player['mana'] = min(player['mana'], player['max_mana'])
-                player['equipped_armor'] = item
-                player['defense'] = armor[item]['defense']
-                if 'mana_bonus' in armor[item]:
-                    player['max_mana'] += armor[item]['mana_bonus']
-                    player['mana'] = min(player['mana'], player['max_mana'])
-                player['inventory'].remove(item)
-                print(f"You don the {item}. {armor[item]['desc']}")
-            elif item in trinkets:
-                player['trinkets'].append(item)
-                if 'attack_bonus' in trinkets[item]:
-                    player['attack'] += trinkets[item]['attack_bonus']
-                if 'defense_bonus' in trinkets[item]:
-                    player['defense'] += trinkets[item]['defense_bonus']
-                if 'mana_bonus' in trinkets[item]:
-                    player['max_mana'] += trinkets[item]['mana_bonus']
-                    player['mana'] = min(player['mana'], player['max_mana'])
-                player['inventory'].remove(item)
-                print(f"You wear the {item}. {trinkets[item]['desc']}")
+            state = synthetic_save_state(count)
+        json_blob = json.dumps(state, separators=(',', ':')).encode('utf-8')
+        binary_blob = encode_binary_save(state)
+        rows = [
+            ('json', json_blob,
+             lambda: json.dumps(state, separators=(',', ':')).encode('utf-8'),
+             lambda: json.loads(json_blob),
+             lambda: json.loads(json_blob)['current_room']),
+            ('binary', binary_blob,
+             lambda: encode_binary_save(state),
+             lambda: BinarySave(binary_blob).to_state(),
+             lambda: BinarySave(binary_blob).place)
+        ]
+        for name, blob, save, load, peek in rows:
+            row = {'rooms': count, 'format': name, 'bytes': len(blob),
+                   'save_ms': best(save) * 1000, 'load_ms': best(load) * 1000, 'peek_ms': best(peek) * 1000}
+            results.append(row)
+            print(f"{count:>8} {name:<7} {row['bytes']:>12,} {row['save_ms']:>9.2f} {row['load_ms']:>9.2f} {row['peek_ms']:>9.3f}")
+    return results
+
+def benchmark_inventory(sizes: Sequence[int] = (100, 10_000, 100_000), ops: int = 200, repeat: int = 3) -> List[Dict]:
+    """Time crafting and equipping as the pack grows, the old list pack beside the multiset."""
+    recipe = crafting_recipes['healing_potion']
+
+    def list_craft(pack: List[str]) -> None:
+        # The list-based craft_item this replaced: two counts per ingredient, then one remove per copy
+        for ingredient, count in recipe['ingredients'].items():
+            if pack.count(ingredient) < count:
+                raise ValueError(f"Missing {count - pack.count(ingredient)} {ingredient}(s).")
+        for ingredient, count in recipe['ingredients'].items():
+            for _ in range(count):
+                pack.remove(ingredient)
+        pack.append('healing_potion')
+
+    def list_equip(pack: List[str]) -> None:
+        if 'emerald_clasp' in pack:
+            pack.remove('emerald_clasp')
+
+    def per_op_us(fn) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(ops):
+                fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings) / ops * 1e6
+
+    results = []
+    print(f"\n{'Items':>8} {'Pack':<9} {'Craft us':>10} {'Equip us':>10}")
+    for size in sizes:
+        filler = [f"relic_shard_{i}" for i in range(size)]
+        session = GameSession(persist=False, sink=NullSink(), seed=0)
+        player = session.player = new_player('Benchmark', '1')
+        player.souls = 10 ** 9
+        player.inventory = Inventory(filler)
+        pack = list(filler)
+
+        def multiset_craft() -> None:
+            player.inventory.append('herb', 2)
+            player.inventory.append('vial')
+            craft_item(session, 'healing_potion')
+            player.inventory.remove('healing_potion')
+
+        def multiset_equip() -> None:
+            player.inventory.append('emerald_clasp')
+            execute_command(session, ['equip', 'emerald_clasp'])
+            player.trinkets.pop()
+
+        def old_craft() -> None:
+            pack.extend(['herb', 'herb', 'vial'])
+            list_craft(pack)
+            pack.remove('healing_potion')
+
+        def old_equip() -> None:
+            pack.append('emerald_clasp')
+            list_equip(pack)
+
+        for name, craft, equip in (('list', old_craft, old_equip), ('multiset', multiset_craft, multiset_equip)):
+            row = {'items': size, 'pack': name, 'craft_us': per_op_us(craft), 'equip_us': per_op_us(equip)}
+            results.append(row)
+            print(f"{size:>8} {name:<9} {row['craft_us']:>10.2f} {row['equip_us']:>10.2f}")
+    return results
+
+LOAD_PROMPT = "Load saved game? (yes/no): "
+
+def game_setup(session: 'GameSession') -> Generator[str, str, None]:
+    """Handle initial game setup or restart with load option."""
+    session.say(f"Bonfire's Echo v{VERSION}")
+    print_lore(session)
+    if session.save_path and os.path.exists(session.save_path):
+        choice = (yield LOAD_PROMPT).lower().strip()
+        if choice.startswith('y') and load_game(session):
+            session.rebase_recording()
+            return
+    session.say("No save found or load declined. A new tale begins.")
+    session.player = yield from setup_player(session)
+    if session.journal:
+        keep_old = os.path.exists(session.journal.path)
+        session.journal.reset(hold=keep_old)
+        if keep_old:
+            session.say("Your old tale stays in the annals until you save over it.")
+    session.current_room = START_ROOM
+    session.last_bonfire = START_ROOM
+    session.effects = EffectEngine()
+
+# --- Commands ---
+# Room flags a command can require, and what the player hears when it is missing
+ROOM_REQUIREMENTS = {
+    'bonfire': "No bonfire burns here to rest by.",
+    'crafting_station': "No crafting station stands here."
+}
+
+class Command:
+    """One verb: its handler, how its words become arguments, and where it may be used."""
+    __slots__ = ('verb', 'name', 'handler', 'parse', 'usage', 'requires', 'subcommands')
+
+    def __init__(self, verb: str, handler, parse, usage: str, requires: Optional[str] = None,
+                 parent: Optional[str] = None) -> None:
+        self.verb = verb
+        self.name = f"{parent} {verb}" if parent else verb  # Full spelling, as 'craft plan'
+        self.handler = handler
+        self.parse = parse
+        self.usage = usage
+        self.requires = requires
+        self.subcommands: Dict[str, 'Command'] = {}
+
+    def __repr__(self) -> str:
+        return f"Command({self.usage!r})"
+
+class _TrieNode:
+    __slots__ = ('children', 'names')
+
+    def __init__(self) -> None:
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.names: List[str] = []  # Every verb and alias spelled with this prefix
+
+class CommandRegistry:
+    """Every command the player can type, resolved through a prefix trie.
+
+    Verbs and aliases (which may carry preset arguments, as 'n' is 'go
+    north') share one trie, so any prefix that leads to a single command
+    works as an abbreviation while exact names always win. Each dispatch
+    runs the pre hooks (any returning False cancels it), checks the
+    command's room requirement, parses its words and calls the handler,
+    then runs the post hooks with the elapsed time.
+    """
+
+    def __init__(self) -> None:
+        self.commands: Dict[str, Command] = {}
+        self.names: Dict[str, Tuple[Command, Tuple[str, ...]]] = {}  # verb or alias -> (command, preset args)
+        self.trie = _TrieNode()
+        self.pre_hooks: List = []
+        self.post_hooks: List = []
+
+    def _name(self, name: str, command: Command, preset: Tuple[str, ...] = ()) -> None:
+        if name in self.names:
+            raise ValueError(f"Command name '{name}' is already taken.")
+        self.names[name] = (command, preset)
+        node = self.trie
+        node.names.append(name)
+        for ch in name:
+            node = node.children.setdefault(ch, _TrieNode())
+            node.names.append(name)
+
+    def command(self, verb: str, usage: Optional[str] = None, parse=None, aliases: Sequence[str] = (),
+                requires: Optional[str] = None, parent: Optional[str] = None):
+        """Decorator registering a handler(session, *args); a parent makes it a subcommand, as in 'craft plan'."""
+        def register(handler):
+            command = Command(verb, handler, parse or no_args, usage or verb, requires, parent)
+            if parent:
+                self.commands[parent].subcommands[verb] = command
             else:
-                print(f"The {item} serves no purpose here.")
-        else:
-            print("You don’t possess that.")
-    elif verb == 'learn' and len(command) > 1:
-        item = ' '.join(command[1:]).lower()
-        if item in player['inventory'] and item.startswith('spell_scroll_'):
-            spell = item.split('_')[2]
-            if spell in spells:
-                player['spells'].append(spell)
-                player['inventory'].remove(item)
-                print(f"You master the {spell} spell. {spells[spell]['desc']}")
+                self.commands[verb] = command
+                self._name(verb, command)
+                for alias in aliases:
+                    self._name(alias, command)
+            return handler
+        return register
+
+    def alias(self, name: str, verb: str, *preset: str) -> None:
+        """Make name stand for verb with some words already filled in."""
+        self._name(name, self.commands[verb], preset)
+
+    def resolve(self, word: str) -> Tuple[Optional[Command], Tuple[str, ...], List[str]]:
+        """(command, preset args, candidates): exact names first, then an unambiguous prefix."""
+        if word in self.names:
+            return self.names[word] + ([word],)
+        node = self.trie
+        for ch in word:
+            node = node.children.get(ch)
+            if node is None:
+                return None, (), []
+        # Aliases that mean the same thing ('i', 'inv') do not make a prefix ambiguous
+        meanings = {(self.names[name][0].verb, self.names[name][1]) for name in node.names}
+        if len(meanings) == 1:
+            return self.names[node.names[0]] + (node.names,)
+        return None, (), node.names
+
+    def dispatch(self, session: 'GameSession', words: List[str]) -> bool:
+        """Run one command line; returns False once the player quits."""
+        command, preset, candidates = self.resolve(words[0])
+        if command is None:
+            if candidates:
+                session.say(f"The shadows hear many meanings: {', '.join(sorted(candidates))}.")
             else:
-                print("That scroll’s secrets elude you.")
+                session.say("The shadows ignore your words.")
+            return True
+        words = list(preset) + words[1:]
+        if words and words[0] in command.subcommands:
+            command, words = command.subcommands[words[0]], words[1:]
+        for hook in self.pre_hooks:
+            if hook(session, command, words) is False:
+                return True
+        started = time.perf_counter()
+        keep_playing = True
+        if command.requires and not session.world.room(session.current_room).get(command.requires):
+            session.say(ROOM_REQUIREMENTS[command.requires])
         else:
-            print("No such scroll in your grasp.")
-    elif verb == 'rest' and room.get('bonfire', False):
-        player['health'] = player['max_health']
-        player['mana'] = player['max_mana']
-        last_bonfire = current_room
-        print("You rest by the bonfire, its warmth a fleeting balm.")
-    elif verb == 'stats':
-        print_stats(player)
-    elif verb == 'map':
-        print_map(player)
-    elif verb == 'open' and len(command) > 1:
-        chest_name = ' '.join(command[1:]).lower()
-        if chest_name in room.get('chests', []):
-            open_chest(chest_name, player)
-            rooms[current_room]['chests'].remove(chest_name)
+            args = command.parse(words)
+            if args is None:
+                session.say(f"The shadows await more: {command.usage}")
+            else:
+                keep_playing = command.handler(session, *args) is not False
+        elapsed = time.perf_counter() - started
+        for hook in self.post_hooks:
+            hook(session, command, words, elapsed)
+        return keep_playing
+
+    def help_lines(self) -> List[str]:
+        """The help text, built from what is registered."""
+        usages = []
+        for command in self.commands.values():
+            usages.append(command.usage)
+            usages.extend(sub.usage for sub in command.subcommands.values())
+        shortcuts = [f"{name} = {' '.join((command.verb,) + preset)}" for name, (command, preset) in self.names.items()
+                     if name != command.verb]
+        return ["Commands: " + ', '.join(usages),
+                "Shortcuts: " + ', '.join(shortcuts),
+                "Any unambiguous start of a command works too."]
+
+# Argument parsers: the words after the verb in, a tuple of handler arguments
+# (or None when the words will not do) out
+def no_args(words: List[str]) -> Tuple:
+    return ()
+
+def word_arg(words: List[str]) -> Optional[Tuple[str]]:
+    return (words[0],) if words else None
+
+def name_arg(words: List[str]) -> Optional[Tuple[str]]:
+    return (' '.join(words).lower(),) if words else None
+
+def room_arg(words: List[str]) -> Optional[Tuple[str]]:
+    return ('_'.join(words),) if words else None
+
+def optional_word(words: List[str]) -> Tuple[str]:
+    return (words[0] if words else '',)
+
+def craft_args(words: List[str]) -> Optional[Tuple[Optional[int], str]]:
+    """[n|all] item: a count (None for as many as possible) and the item."""
+    count: Optional[int] = 1
+    if len(words) > 1 and words[0] == 'all':
+        count, words = None, words[1:]
+    elif len(words) > 1 and words[0].isdigit():
+        count, words = int(words[0]), words[1:]
+    return (count, ' '.join(words).lower()) if words else None
+
+COMMANDS = CommandRegistry()
+
+@COMMANDS.command('go', 'go [direction]', word_arg)
+def do_go(session: 'GameSession', direction: str) -> None:
+    exits = session.world.room(session.current_room)['exits']
+    if direction in exits:
+        session.current_room = exits[direction]
+        session.say(f"You stagger {direction} into the abyss.")
+    else:
+        session.say("That way is barred or lost.")
+
+@COMMANDS.command('route', 'route [room]', room_arg)
+def do_route(session: 'GameSession', destination: str) -> None:
+    plan_travel(session, destination, False)
+
+@COMMANDS.command('travel', 'travel [room]', room_arg)
+def do_travel(session: 'GameSession', destination: str) -> None:
+    plan_travel(session, destination, True)
+
+@COMMANDS.command('take', 'take [item]', name_arg)
+def do_take(session: 'GameSession', item: str) -> None:
+    room_name = session.current_room
+    if item in session.world.room(room_name).get('objects', ()):
+        session.player.inventory.append(item)
+        session.world.remove(room_name, 'objects', item)
+        session.say(f"You take the {item}, another weight on your soul.")
+        EVENTS.emit(session, 'item_taken', item=item)
+    else:
+        session.say("No such prize lies here.")
+
+@COMMANDS.command('equip', 'equip [item]', name_arg)
+def do_equip(session: 'GameSession', item: str) -> None:
+    player = session.player
+    if item not in player.inventory:
+        session.say("You don’t possess that.")
+        return
+    if item in weapons:
+        player.equipped_weapon = item
+        message = f"You wield the {item}. {weapons[item]['desc']}"
+    elif item in armor:
+        player.equipped_armor = item
+        message = f"You don the {item}. {armor[item]['desc']}"
+    elif item in trinkets:
+        player.trinkets.append(item)
+        message = f"You wear the {item}. {trinkets[item]['desc']}"
+    else:
+        session.say(f"The {item} serves no purpose here.")
+        return
+    player.inventory.remove(item)
+    player.invalidate()
+    player.mana = min(player.mana, player.max_mana)
+    session.say(message)
+
+@COMMANDS.command('learn', 'learn [spell_scroll]', name_arg)
+def do_learn(session: 'GameSession', item: str) -> None:
+    player = session.player
+    if item in player.inventory and item.startswith(SCROLL_PREFIX):
+        spell = item[len(SCROLL_PREFIX):]
+        if spell in spells:
+            player.spells.append(spell)
+            player.inventory.remove(item)
+            session.say(f"You master the {spell} spell. {spells[spell]['desc']}")
+            EVENTS.emit(session, 'spell_learned', spell=spell)
         else:
-            print("No chest by that name here.")
-    elif verb == 'craft' and room.get('crafting_station', False) and len(command) > 1:
-        item = ' '.join(command[1:]).lower()
-        craft_item(player, item)
-    elif verb == 'save':
-        save_game(player)
-    elif verb == 'search':
-        print("\nYou scour the shadows...")
-        if room['objects']:
-            print(f"Items: {', '.join([item.capitalize() for item in room['objects']])}")
+            session.say("That scroll’s secrets elude you.")
+    else:
+        session.say("No such scroll in your grasp.")
+
+@COMMANDS.command('rest', requires='bonfire')
+def do_rest(session: 'GameSession') -> None:
+    player = session.player
+    player.health = player.max_health
+    player.mana = player.max_mana
+    session.last_bonfire = session.current_room
+    session.say("You rest by the bonfire, its warmth a fleeting balm.")
+
+@COMMANDS.command('stats', aliases=('i', 'inv', 'inventory'))
+def do_stats(session: 'GameSession') -> None:
+    print_stats(session)
+
+@COMMANDS.command('map')
+def do_map(session: 'GameSession') -> None:
+    print_map(session)
+
+@COMMANDS.command('open', 'open [chest]', name_arg)
+def do_open(session: 'GameSession', chest_name: str) -> None:
+    room_name = session.current_room
+    if chest_name in session.world.room(room_name).get('chests', ()):
+        if open_chest(session, chest_name):
+            session.world.remove(room_name, 'chests', chest_name)
+    else:
+        session.say("No chest by that name here.")
+
+@COMMANDS.command('craft', 'craft [n|all] [item]', craft_args, requires='crafting_station')
+def do_craft(session: 'GameSession', count: Optional[int], item: str) -> None:
+    if count == 0:
+        session.say("You craft nothing, and the station hums on.")
+    else:
+        craft_item(session, item, count)
+
+@COMMANDS.command('plan', 'craft plan [item]', name_arg, parent='craft')
+def do_craft_plan(session: 'GameSession', item: str) -> None:
+    show_craft_plan(session, item)
+
+@COMMANDS.command('search')
+def do_search(session: 'GameSession') -> None:
+    room = session.world.room(session.current_room)
+    session.say("\nYou scour the shadows...")
+    if room.get('objects'):
+        session.say(f"Items: {', '.join([item.capitalize() for item in room['objects']])}")
+    else:
+        session.say("No loose items catch your eye.")
+    if room.get('chests'):
+        session.say(f"Chests: {', '.join([chest.capitalize() for chest in room['chests']])}")
+    else:
+        session.say("No chests loom in sight.")
+
+@COMMANDS.command('save')
+def do_save(session: 'GameSession') -> None:
+    save_game(session)
+
+@COMMANDS.command('help')
+def do_help(session: 'GameSession') -> None:
+    for line in COMMANDS.help_lines():
+        session.say(line)
+
+@COMMANDS.command('perf', 'perf [on|off|reset]', optional_word)
+def do_perf(session: 'GameSession', mode: str) -> None:
+    metrics = session.metrics
+    if mode in ('on', 'off'):
+        metrics.enabled = mode == 'on'
+        session.say("You begin to count the dark’s every heartbeat." if metrics.enabled else "You stop counting.")
+    elif mode == 'reset':
+        metrics.reset()
+        session.say("Your tallies scatter like ash.")
+    elif not metrics.timers and not metrics.counters:
+        session.say("Nothing measured yet; 'perf on' starts the count." if not metrics.enabled else "Nothing measured yet.")
+    else:
+        for line in metrics.summary_lines():
+            session.say(line)
+
+@COMMANDS.command('quit')
+def do_quit(session: 'GameSession') -> bool:
+    session.say(f"{session.player.name} turns from the dark. The empire waits.")
+    save_game(session)
+    return False
+
+for _direction in ('north', 'south', 'east', 'west', 'up', 'down'):
+    COMMANDS.alias(_direction, 'go', _direction)
+    COMMANDS.alias(_direction[0], 'go', _direction)
+
+def record_command_time(session: 'GameSession', command: Command, words: List[str], elapsed: float) -> None:
+    """Post-dispatch hook timing every top-level command into the session's metrics."""
+    session.metrics.record(f"command.{command.name}", elapsed)
+
+COMMANDS.post_hooks.append(record_command_time)
+
+def execute_command(session: 'GameSession', command: List[str]) -> bool:
+    """Carry out one parsed command; returns False once the player quits."""
+    return COMMANDS.dispatch(session, command)
+
+def plan_travel(session: 'GameSession', destination: str, travel: bool) -> None:
+    """Show the shortest way to an explored room and, for travel, start walking it."""
+    graph = session.world.graph
+    if destination not in graph or destination not in session.player.explored:
+        session.say("You know no path to such a place.")
+        return
+    steps = graph.route(session.current_room, destination)
+    if steps is None:
+        session.say("No path through the dark leads there.")
+        return
+    if not steps:
+        session.say("You already stand there.")
+        return
+    session.say(f"Route ({len(steps)} steps): " + ', '.join(f"{d} to {room}" for d, room in steps))
+    if travel:
+        session.travel_route = steps
+        session.say(f"You set out for {destination}.")
+
+def play(session: 'GameSession') -> Generator[str, str, None]:
+    """The game script: setup, then enter rooms and run commands until the player quits."""
+    if session.player is None:
+        yield from game_setup(session)
+    print_ascii_art(session)
+
+    while True:
+        if not (yield from enhanced_enter_room(session, session.current_room)):
+            session.travel_route = []
+            continue
+        if session.current_room == VICTORY_ROOM and VICTORY_ITEM in session.player.inventory:
+            result = yield from handle_victory(session)
+            if result == 'quit':
+                return
+            elif result == 'restart':
+                yield from game_setup(session)
+                session.world.respawn()
+                session.say("A new journey begins in the shadowed depths.")
+                print_ascii_art(session)
+                continue
+        if session.travel_route:
+            direction, session.current_room = session.travel_route.pop(0)
+            session.say(f"You press on {direction} toward {session.current_room}.")
+            continue
+        autosave(session)
+        command = (yield "> ").lower().split()
+        if not command:
+            session.say("The silence deafens.")
+            continue
+        if not execute_command(session, command):
+            return
+
+# --- Rendering ---
+class TerminalSink:
+    """Writes rendered text to a real terminal; honours pacing pauses unless told not to."""
+
+    def __init__(self, stream=None, paced: bool = True) -> None:
+        self.stream = stream or sys.stdout
+        self.paced = paced
+        self.discards = False
+
+    def write(self, text: str) -> None:
+        self.stream.write(text)
+        self.stream.flush()
+
+    def pace(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+class NullSink:
+    """Throws all output away, for headless runs where only the game state matters."""
+    paced = False
+    discards = True
+
+    def write(self, text: str) -> None:
+        pass
+
+    def pace(self, seconds: float) -> None:
+        pass
+
+class CaptureSink:
+    """Keeps output in memory until taken, for tests, tools and the server."""
+    paced = False
+    discards = False
+
+    def __init__(self) -> None:
+        self.chunks: List[str] = []
+
+    def write(self, text: str) -> None:
+        self.chunks.append(text)
+
+    def pace(self, seconds: float) -> None:
+        pass
+
+    def take(self) -> str:
+        """Return and clear everything written so far."""
+        text = ''.join(self.chunks)
+        self.chunks.clear()
+        return text
+
+class Renderer:
+    """Collects one command's worth of output and hands it to a sink in a single write."""
+
+    def __init__(self, sink=None) -> None:
+        self.sink = sink or CaptureSink()
+        self.buffer: List[str] = []
+
+    def say(self, *parts, sep: str = ' ', end: str = '\n') -> None:
+        """Queue a line of output, print()-style."""
+        if not self.sink.discards:
+            self.buffer.append(sep.join(map(str, parts)) + end)
+
+    def pause(self, seconds: float) -> None:
+        """Dramatic pause: flush what is queued, then wait if the sink keeps pace."""
+        if self.sink.paced:
+            self.flush()
+            self.sink.pace(seconds)
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.sink.write(''.join(self.buffer))
+            self.buffer.clear()
+
+# --- Game Session ---
+class GameSession:
+    """One game's worth of state, driven a line of input at a time.
+
+    The game script (play) is a generator that yields every prompt it needs
+    answered, so the same rules run under input(), step() or any other driver,
+    and one process can host as many independent sessions as it likes. All
+    output goes through the session's Renderer; the default CaptureSink makes
+    step() return it, while main() renders straight to the terminal.
+    """
+
+    def __init__(self, player: Optional[PlayerState] = None, save_path: Optional[str] = None, persist: bool = True,
+                 sink=None, seed: Optional[int] = None, world: Optional[WorldState] = None,
+                 metrics: Optional[Metrics] = None) -> None:
+        self.player = player
+        self.current_room = START_ROOM
+        self.last_bonfire = START_ROOM
+        self.effects = EffectEngine()
+        self.world = world or WorldState()
+        self.metrics = metrics or Metrics()
+        self.travel_route: List[Tuple[str, str]] = []
+        self.save_path = (save_path or get_save_path()) if persist else None
+        self.journal = SaveJournal(self.save_path) if self.save_path else None
+        self.out = Renderer(sink)
+        self.say = self.out.say
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.rng = random.Random(self.seed)
+        self.recording: Dict = {'version': VERSION, 'seed': self.seed, 'start': None, 'inputs': []}
+        self.prompt: Optional[str] = None
+        self._script: Optional[Generator[str, str, None]] = None
+
+    @property
+    def finished(self) -> bool:
+        """True once the game script has run to its end."""
+        return self._script is not None and self.prompt is None
+
+    def advance(self, line: Optional[str] = None) -> Optional[str]:
+        """Start the script or answer its pending prompt; returns the next prompt, or None when done."""
+        if self.finished:
+            return None
+        try:
+            if self._script is None:
+                if self.player is not None:
+                    self.recording['start'] = session_state(self)
+                self._script = play(self)
+                self.prompt = next(self._script)
+            else:
+                self.recording['inputs'].append([self.prompt, line or ''])
+                self.prompt = self._script.send(line or '')
+        except StopIteration:
+            self.prompt = None
+        return self.prompt
+
+    def rebase_recording(self) -> None:
+        """Restart the recording from the current state, e.g. after loading a save.
+
+        A fresh seed is drawn so the recording is seed + starting state +
+        inputs from here on, and replays need no save file.
+        """
+        self.seed = self.rng.randrange(2 ** 63)
+        self.rng.seed(self.seed)
+        self.recording = {'version': VERSION, 'seed': self.seed, 'start': session_state(self), 'inputs': []}
+
+    @classmethod
+    def from_recording(cls, recording: Dict, sink=None) -> 'GameSession':
+        """A fresh, non-saving session positioned at the start of a recording."""
+        session = cls(persist=False, sink=sink or NullSink(), seed=recording['seed'])
+        if recording.get('start'):
+            restore_state(session, json.loads(json.dumps(recording['start'])))
+        return session
+
+    def _flush(self) -> str:
+        """Flush the renderer; returns the text if the sink captures it."""
+        self.out.flush()
+        take = getattr(self.out.sink, 'take', None)
+        return take() if take else ''
+
+    def start(self) -> str:
+        """Run the game up to its first prompt and return its output."""
+        if self._script is None:
+            self.advance()
+        return self._flush()
+
+    def step(self, command: str) -> str:
+        """Answer the current prompt with command and return the output it produced."""
+        if self._script is None:
+            self.advance()
+        self.advance(command)
+        return self._flush()
+
+# --- Recording and Replay ---
+class ReplayDivergence(Exception):
+    """A replay reached a prompt the recording did not expect."""
+
+def save_recording(session: 'GameSession', path: str) -> None:
+    """Write a session's seed, starting state and inputs to a JSON file."""
+    with open(path, 'w') as f:
+        json.dump(session.recording, f, separators=(',', ':'))
+
+def replay(recording: Dict, sink=None) -> Tuple['GameSession', Dict]:
+    """Re-run a recording as fast as possible and return the rebuilt session plus timing.
+
+    Output goes to a NullSink unless another sink is given. Recorded answers to
+    the load prompt are skipped, since replays never touch save files; any
+    other prompt mismatch means the rules changed and raises ReplayDivergence.
+    """
+    session = GameSession.from_recording(recording, sink)
+    started = time.perf_counter()
+    session.advance()
+    fed = 0
+    for number, (prompt, line) in enumerate(recording['inputs'], 1):
+        if session.finished:
+            raise ReplayDivergence(f"Game ended before input {number} ({line!r}).")
+        if prompt != session.prompt:
+            if prompt == LOAD_PROMPT:
+                continue
+            raise ReplayDivergence(f"Input {number}: recorded prompt {prompt!r}, replay is at {session.prompt!r}.")
+        session.advance(line)
+        fed += 1
+    session.out.flush()
+    elapsed = time.perf_counter() - started
+    return session, {
+        'inputs': fed,
+        'seconds': elapsed,
+        'inputs_per_second': fed / elapsed if elapsed else float('inf'),
+        'finished': session.finished
+    }
+
+def replay_file(path: str) -> None:
+    """Replay a recording file and report how it went."""
+    with open(path, 'r') as f:
+        recording = json.load(f)
+    if recording.get('version') != VERSION:
+        print(f"Warning: recorded with v{recording.get('version')}, replaying with v{VERSION}.")
+    try:
+        session, stats = replay(recording)
+    except ReplayDivergence as e:
+        print(f"Replay diverged: {e}")
+        sys.exit(1)
+    player = session.player
+    print(f"Replayed {stats['inputs']} inputs in {stats['seconds'] * 1000:.1f} ms ({stats['inputs_per_second']:,.0f}/s).")
+    if player:
+        print(f"{player.name} stands in {session.current_room}: level {player.level}, "
+              f"{player.health}/{player.max_health} HP, {player.souls} souls, {len(player.explored)} realms explored.")
+
+# --- Benchmark Suite ---
+BENCH_FILE = "bench_results.json"
+BENCH_SEED = 1234
+BENCH_LARGE_ROOMS = 100_000
+BENCH_TOLERANCE = 0.25  # Median slowdown against the baseline that counts as a regression
+BENCH_FIGHT_TURNS = 500  # Fights still going after this many turns are called off
+
+def _percentile(samples: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of a sorted sample list."""
+    return samples[min(len(samples) - 1, max(0, int(round(fraction * len(samples))) - 1))]
+
+def measure(fn, setup=None, warmup: int = 3, repeat: int = 20, number: int = 1) -> Dict:
+    """Time fn(setup()) after warmup; each of the repeat samples is the mean of number calls.
+
+    setup is untimed and gives every call fresh input; all of a sample's
+    inputs are made before its clock starts. The collector is paused while
+    a sample is timed, as timeit does, so a collection triggered by setup
+    does not land in a random sample.
+    """
+    samples = []
+    gc_enabled = gc.isenabled()
+    for i in range(warmup + repeat):
+        values = [setup() if setup else None for _ in range(number)]
+        value = None  # Free the last sample's input now, not when the timed loop rebinds it
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            for value in values:
+                fn(value)
+            elapsed = (time.perf_counter() - started) / number
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if i >= warmup:
+            samples.append(elapsed)
+    samples.sort()
+    return {
+        'runs': repeat,
+        'median_ms': round(_percentile(samples, 0.5) * 1000, 4),
+        'p99_ms': round(_percentile(samples, 0.99) * 1000, 4),
+        'min_ms': round(samples[0] * 1000, 4),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 4)
+    }
+
+def bench_session(world: Optional[WorldState] = None, save_path: Optional[str] = None,
+                  level: int = 1, health: Optional[int] = None) -> 'GameSession':
+    """A silent, seeded session with a fresh sword wielder already in play."""
+    session = GameSession(player=simulation_player('sword', None, level), save_path=save_path,
+                          persist=save_path is not None, sink=NullSink(), seed=BENCH_SEED, world=world)
+    if health is not None:
+        session.player.health = health
+    return session
+
+def _clear_enemies(world: WorldState) -> None:
+    """Slay every enemy in a world, as a long run would."""
+    for room_name in world.base:
+        for enemy in world.get(room_name, 'enemies'):
+            world.remove(room_name, 'enemies', enemy)
+
+def _fight(session: 'GameSession', enemy_key: str) -> None:
+    """Attack until the fight ends either way."""
+    script = enhanced_combat(session, Combatant.spawn(enemy_key), enemy_key)
+    try:
+        next(script)
+        for _ in range(BENCH_FIGHT_TURNS):
+            script.send('attack')
+    except StopIteration:
+        pass
+
+def bench_cases(large_rooms: int, workdir: str):
+    """Every benchmark as (name, fn, setup, measure overrides); large fixtures are built once, on demand."""
+    HEAVY = {'warmup': 1, 'repeat': 5}  # Large-world cases take long enough to need fewer runs
+    MICRO = {'number': 50}                # Microsecond cases average many calls per sample
+    fixtures: Dict[str, object] = {}
+    def large_world() -> Mapping[str, Mapping]:
+        if 'world' not in fixtures:
+            fixtures['world'] = freeze_table(dict(generate_world(large_rooms, BENCH_SEED)))
+        return fixtures['world']
+
+    def combat_turn_setup():
+        session = bench_session(health=10 ** 9)
+        enemy = Combatant.spawn('golem')
+        enemy.health = 10 ** 9
+        script = enhanced_combat(session, enemy, 'golem')
+        next(script)
+        return script
+    yield 'combat.turn', lambda script: script.send('attack'), combat_turn_setup, MICRO
+
+    for enemy_key in enemies:
+        yield f"combat.fight.{enemy_key}", functools.partial(_fight, enemy_key=enemy_key), bench_session, MICRO
+
+    trap_room = freeze_table({'trap_hall': {'description': "A hall sown with every snare the empire knew.",
+                                            'exits': {}, 'traps': sorted(traps) * 5}})
+    def trap_setup():
+        return bench_session(world=WorldState(trap_room), health=10 ** 9)
+    yield 'enter_room.traps', lambda session: list(enhanced_enter_room(session, 'trap_hall')), trap_setup, MICRO
+
+    def explored_session(base: Optional[Mapping] = None, save_path: Optional[str] = None) -> 'GameSession':
+        session = bench_session(world=WorldState(base) if base is not None else None, save_path=save_path)
+        session.player.explored = set(session.world.base)
+        _clear_enemies(session.world)
+        return session
+
+    for label in ('shipped', 'large'):
+        path = os.path.join(workdir, f"bench_{label}.json")
+        def save_setup(label=label, path=path):
+            session = fixtures.get(f"save.{label}")
+            if session is None:
+                session = fixtures[f"save.{label}"] = explored_session(large_world() if label == 'large' else None, path)
+            return session
+        heavy = HEAVY if label == 'large' else {}
+        yield f"save.{label}", save_game, save_setup, heavy
+        def load_setup(label=label, path=path):
+            if not os.path.exists(path):
+                save_game(save_setup())
+            world = WorldState(large_world()) if label == 'large' else None
+            return bench_session(world=world, save_path=path)
+        yield f"load.{label}", load_game, load_setup, heavy
+
+    yield 'map.shipped', print_map, lambda: fixtures.get('save.shipped') or explored_session(), {}
+    yield 'map.large', print_map, lambda: fixtures.get('save.large') or explored_session(large_world()), HEAVY
+
+    pack = Inventory()
+    for item in sorted(materials) + sorted(consumables) + sorted(weapons):
+        pack.append(item, 100_000 // 50 if item in materials else 50)
+    def craft_setup():
+        session = bench_session()
+        session.player.inventory = pack.copy()
+        session.player.souls = 10 ** 6
+        return session
+    yield 'craft.large_inventory', lambda session: craft_item(session, 'iron_sword', 10), craft_setup, MICRO
+
+    for label in ('shipped', 'large'):
+        def death_setup(label=label):
+            session = bench_session(world=WorldState(large_world()) if label == 'large' else None)
+            _clear_enemies(session.world)
+            return session
+        yield f"death.respawn.{label}", handle_death_enhanced, death_setup, HEAVY if label == 'large' else MICRO
+
+def compare_bench(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float = BENCH_TOLERANCE) -> Dict[str, Dict]:
+    """Median change against a baseline for every benchmark both runs have."""
+    comparison = {}
+    for name, row in results.items():
+        before = baseline.get(name)
+        if before and before['median_ms'] > 0:
+            change = row['median_ms'] / before['median_ms'] - 1
+            comparison[name] = {'baseline_ms': before['median_ms'], 'change': round(change, 4),
+                                'regression': change > tolerance}
+    return comparison
+
+def run_benchmarks(path: str = BENCH_FILE, baseline_path: Optional[str] = None, only: Optional[str] = None,
+                   warmup: int = 3, repeat: int = 20, large_rooms: int = BENCH_LARGE_ROOMS,
+                   tolerance: float = BENCH_TOLERANCE) -> bool:
+    """Run the suite, write JSON results, and compare with a baseline; False if anything regressed."""
+    baseline = None
+    if baseline_path:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    results: Dict[str, Dict] = {}
+    print(f"{'Benchmark':<34} {'Runs':>5} {'Median ms':>11} {'p99 ms':>10}" + (f" {'Baseline':>10} {'Change':>8}" if baseline else ''))
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, fn, setup, overrides in bench_cases(large_rooms, workdir):
+            if only and only not in name:
+                continue
+            options = {'warmup': warmup, 'repeat': repeat, 'number': 1}
+            options.update({key: min(value, options[key]) if key != 'number' else value for key, value in overrides.items()})
+            row = results[name] = measure(fn, setup, **options)
+            line = f"{name:<34} {row['runs']:>5} {row['median_ms']:>11.4f} {row['p99_ms']:>10.4f}"
+            if baseline and name in baseline:
+                change = compare_bench({name: row}, baseline, tolerance).get(name)
+                if change:
+                    flag = '  REGRESSION' if change['regression'] else ''
+                    line += f" {change['baseline_ms']:>10.4f} {change['change']:>+8.1%}{flag}"
+            print(line)
+    report = {
+        'meta': {'version': VERSION, 'python': sys.version.split()[0], 'platform': sys.platform,
+                 'warmup': warmup, 'repeat': repeat, 'large_rooms': large_rooms, 'seed': BENCH_SEED},
+        'results': results
+    }
+    regressions = []
+    if baseline:
+        report['comparison'] = compare_bench(results, baseline, tolerance)
+        regressions = [name for name, row in report['comparison'].items() if row['regression']]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {path}.")
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {tolerance:.0%}: {', '.join(regressions)}")
+    return not regressions
+
+# --- Autoplay Agents ---
+AGENT_MAX_COMMANDS = 3000  # Commands before a goal-driven agent's run is called off
+AGENT_MAX_DEATHS = 25      # Runs that fall this often are written off
+AGENT_FLEE_TURNS = 100     # Prompts in one fight before an agent flees a stalemate
+AGENT_STUCK_TURNS = 1000   # Prompts without reaching the command line that mark a run as stuck
+COMBAT_PROMPT = "Attack, cast spell, use item, or flee? "
+VICTORY_PROMPT = "What now, Relic Bearer? (save/quit/restart): "
+
+class Agent(abc.ABC):
+    """A bot that plays the real game script, choosing every line of input.
+
+    command() picks what to type at the command line, given the session and
+    the room the player stands in; answer() replies to every other prompt.
+    The default answers fight (fleeing a fight that will not end), solve
+    riddles, and quit on victory, so a policy only has to write command().
+    Each agent draws from its own generator, seeded from the run's seed but
+    apart from the session's, so a run is reproducible from that one seed.
+    """
+    name = 'agent'
+    max_commands = AGENT_MAX_COMMANDS
+
+    def __init__(self, seed: int) -> None:
+        self.rng = random.Random(splitmix64(seed))
+
+    @abc.abstractmethod
+    def command(self, session: 'GameSession', room: Dict) -> str:
+        """The next line to type at the command line."""
+
+    def answer(self, session: 'GameSession', prompt: str, turns: int) -> Optional[str]:
+        """Reply to a prompt other than the command line; None if the agent is at a loss."""
+        if prompt == COMBAT_PROMPT:
+            return 'attack' if turns <= AGENT_FLEE_TURNS else 'flee'
+        if prompt == "Answer: ":
+            return session.world.room(session.current_room)['puzzle']['answer']
+        if prompt == VICTORY_PROMPT:
+            return 'quit'
+        if prompt == "Enter your name: ":
+            return self.name.capitalize()
+        if prompt == "Enter 1, 2, or 3: ":
+            return self.rng.choice(list(STARTING_WEAPONS))
+        return None
+
+def _nearest_unexplored(session: 'GameSession') -> Optional[str]:
+    """First step toward the closest room the player has not yet seen, or None."""
+    graph = session.world.graph
+    explored = session.player.explored
+    first_steps = {}
+    frontier = [session.current_room]
+    seen = {session.current_room}
+    while frontier:
+        following = []
+        for room_name in frontier:
+            for direction, dest in graph.exits_of(room_name):
+                if dest in seen:
+                    continue
+                seen.add(dest)
+                step = first_steps.get(room_name, direction)
+                if dest not in explored:
+                    return step
+                first_steps[dest] = step
+                following.append(dest)
+        frontier = following
+    return None
+
+class GreedyExplorer(Agent):
+    """Takes everything, wears the best gear, rests at every bonfire and explores nearest first.
+
+    Loose items and unlocked (or keyed) chests are looted, better weapons and
+    armor equipped, and rooms explored closest first; once none are left the
+    explorer walks the shortest route to VICTORY_ROOM.
+    """
+    name = 'greedy'
+
+    def command(self, session: 'GameSession', room: Dict) -> str:
+        player = session.player
+        if room.get('objects'):
+            return f"take {room['objects'][0]}"
+        for chest_name in room.get('chests', ()):
+            chest = chests[chest_name]
+            if not chest['locked'] or chest['key'] in player.inventory:
+                return f"open {chest_name}"
+        weapon_attack = weapons[player.equipped_weapon]['attack'] if player.equipped_weapon else 0
+        armor_defense = armor[player.equipped_armor]['defense'] if player.equipped_armor else 0
+        for item in player.inventory.counts():
+            if (item in weapons and weapons[item]['attack'] > weapon_attack) or \
+                    (item in armor and armor[item]['defense'] > armor_defense):
+                return f"equip {item}"
+        if room.get('bonfire') and (session.last_bonfire != session.current_room or player.health < player.max_health):
+            return "rest"
+        direction = _nearest_unexplored(session)
+        if direction is None:
+            steps = session.world.graph.route(session.current_room, VICTORY_ROOM)
+            if not steps:
+                return "quit"
+            direction = steps[0][0]
+        return f"go {direction}"
+
+class RelicRunner(Agent):
+    """Heads straight for the relic by the shortest route, stopping only to rest when hurt."""
+    name = 'relic'
+
+    def command(self, session: 'GameSession', room: Dict) -> str:
+        player = session.player
+        if VICTORY_ITEM in room.get('objects', ()):
+            return f"take {VICTORY_ITEM}"
+        if room.get('bonfire') and player.health < player.max_health:
+            return "rest"
+        steps = session.world.graph.route(session.current_room, VICTORY_ROOM)
+        return f"go {steps[0][0]}" if steps else "quit"
+
+class RandomWalker(Agent):
+    """Types a random plausible (or implausible) command each turn, to shake out crashes.
+
+    Half its moves walk a random exit; the rest are drawn from every other
+    command with arguments taken from the room and the pack, abbreviations,
+    and lines no parser expects. Its answers are as random: any combat action,
+    wrong riddle answers, and saving or restarting after a victory.
+    """
+    name = 'random'
+    max_commands = 400
+    NOISE = ('', 'go', 'take', 'xyzzy', 'go nowhere', 'c', 'cr', 'craft 0 iron_ingot', 'equip', 'take the_moon',
+             'travel nowhere', 'learn spell_scroll_nothing', 'perf', 'help', 'search', 'map', 'stats', 'i', 'rest', 'save')
+
+    def command(self, session: 'GameSession', room: Dict) -> str:
+        rng = self.rng
+        exits = room['exits']
+        if exits and rng.random() < 0.5:
+            direction = rng.choice(list(exits))
+            return rng.choice((f"go {direction}", direction, direction[0]))
+        player = session.player
+        choices = [rng.choice(self.NOISE)]
+        if room.get('objects'):
+            choices.append(f"take {rng.choice(room['objects'])}")
+        if room.get('chests'):
+            choices.append(f"open {rng.choice(room['chests'])}")
+        items = list(player.inventory.counts())
+        if items:
+            item = rng.choice(items)
+            choices.extend((f"equip {item}", f"learn {item}"))
+        recipe = rng.choice(list(crafting_recipes))
+        choices.extend((f"craft {recipe}", f"craft plan {recipe}", f"craft all {recipe}"))
+        destination = rng.choice(sorted(player.explored))  # Set order follows the hash seed; the run must not
+        choices.extend((f"route {destination}", f"travel {destination}"))
+        return rng.choice(choices)
+
+    def answer(self, session: 'GameSession', prompt: str, turns: int) -> Optional[str]:
+        rng = self.rng
+        player = session.player
+        if prompt == COMBAT_PROMPT:
+            return 'flee' if turns > AGENT_FLEE_TURNS else rng.choice(('attack', 'attack', 'attack', 'cast spell', 'use item', 'flee'))
+        if prompt.startswith("Choose a spell"):
+            return rng.choice(player.spells + ['nothing'])
+        if prompt.startswith("Choose an item"):
+            return rng.choice(list(player.inventory.counts()) + ['nothing'])
+        if prompt == "Answer: ":
+            return rng.choice((session.world.room(session.current_room)['puzzle']['answer'], 'a guess'))
+        if prompt == VICTORY_PROMPT:
+            return rng.choice(('save', 'dance', 'restart', 'quit'))
+        return super().answer(session, prompt, turns)
+
+AGENTS = {agent.name: agent for agent in (RandomWalker, GreedyExplorer, RelicRunner)}
+
+def _cover_command(coverage: Dict[str, set], line: str) -> None:
+    """Note the command (or subcommand) a command line is about to run."""
+    words = line.split()
+    if words:
+        command = COMMANDS.resolve(words[0])[0]
+        if command is not None:
+            coverage['commands'].add(command.subcommands[words[1]].name if len(words) > 1 and words[1] in command.subcommands
+                                     else command.name)
+
+def _cover_state(coverage: Dict[str, set], session: 'GameSession') -> None:
+    """Note the items the player holds, worn or carried, after a step of the script."""
+    player = session.player
+    if player is None:
+        return
+    items = coverage['items']
+    items.update(player.inventory.counts())
+    items.update(player.trinkets)
+    if player.equipped_weapon:
+        items.add(player.equipped_weapon)
+    if player.equipped_armor:
+        items.add(player.equipped_armor)
+
+def autoplay(session: 'GameSession', agent: Agent, max_commands: Optional[int] = None,
+             coverage: Optional[Dict[str, set]] = None) -> Tuple[str, int, int]:
+    """Let an agent play a session until the game ends, the run is written off or its budget is spent.
+
+    Returns (outcome, commands typed, deaths before first standing in
+    VICTORY_ROOM with its guardian beaten, or -1). Outcomes are 'victory'
+    (the relic was claimed at least once), 'fallen', 'stalled' (out of
+    commands, or the agent quit) and 'stuck' (a prompt the agent cannot
+    answer, or one that never lets go). Game errors propagate, with every
+    input up to the crash in session.recording.
+    """
+    max_commands = max_commands or agent.max_commands
+    counters = session.metrics.counters
+    commands, turns, won, outcome, deaths_before_vault = 0, 0, False, 'stalled', -1
+    prompt = session.advance()
+    while prompt is not None:
+        if counters.get('deaths', 0) >= AGENT_MAX_DEATHS:
+            outcome = 'fallen'
+            break
+        if prompt == '> ':
+            # At the command line in the vault means its guardian is beaten
+            if deaths_before_vault < 0 and session.current_room == VICTORY_ROOM:
+                deaths_before_vault = counters.get('deaths', 0)
+            if commands >= max_commands:
+                break
+            commands += 1
+            turns = 0
+            line = agent.command(session, session.world.room(session.current_room))
+            if coverage is not None:
+                _cover_command(coverage, line)
         else:
-            print("No loose items catch your eye.")
-        if 'chests' in room and room['chests']:
-            print(f"Chests: {', '.join([chest.capitalize() for chest in room['chests']])}")
+            turns += 1
+            line = agent.answer(session, prompt, turns) if turns <= AGENT_STUCK_TURNS else None
+            if line is None:
+                outcome = 'stuck'
+                break
+            if prompt == VICTORY_PROMPT:
+                won = True
+                if coverage is not None:  # A restart starts a new character
+                    coverage['rooms'].update(session.player.explored)
+        prompt = session.advance(line)
+        if coverage is not None:
+            _cover_state(coverage, session)
+    if coverage is not None and session.player:
+        coverage['rooms'].update(session.player.explored)
+    if won and outcome != 'stuck':
+        outcome = 'victory'
+    return outcome, commands, deaths_before_vault
+
+# --- Playthrough Simulation ---
+PLAYTHROUGH_CHUNK = 20  # Runs a worker plays per task
+SOAK_CRASH_DIR = "soak_crashes"
+_MASK64 = (1 << 64) - 1
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+# One compact row per run, all a worker sends back
+RUN_FIELDS = ('seed', 'outcome', 'reached_vault', 'deaths', 'deaths_before_vault', 'souls_lost', 'level',
+              'commands', 'turns', 'kills', 'explored')
+RUN_OUTCOMES = ('victory', 'fallen', 'stalled', 'stuck')
+
+def splitmix64(state: int) -> int:
+    """Scramble a 64-bit value with SplitMix64's finalizer."""
+    z = (state + _GOLDEN_GAMMA) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+def run_seed(base_seed: int, index: int) -> int:
+    """The index-th seed of base_seed's SplitMix64 stream.
+
+    Every run gets its own well-mixed seed straight from its index, so runs
+    are independent of each other and of how they are split among workers:
+    the same base seed gives the same runs on one core or sixty-four.
+    """
+    return splitmix64((base_seed + index * _GOLDEN_GAMMA) & _MASK64)
+
+def autoplay_session(seed: int, start: str = 'sword', world: Optional[Mapping[str, Mapping]] = None,
+                     graph: Optional[WorldGraph] = None) -> 'GameSession':
+    """A silent, non-saving, counting session with a fresh character, ready for an agent."""
+    choice = next(key for key, spec in STARTING_WEAPONS.items() if spec[0] == start)
+    return GameSession(player=new_player('Pilgrim', choice), persist=False, sink=NullSink(), seed=seed,
+                       world=WorldState(world, graph) if world is not None else None, metrics=Metrics(enabled=True))
+
+def play_run(seed: int, start: str = 'sword', agent: str = 'greedy', world: Optional[Mapping[str, Mapping]] = None,
+             graph: Optional[WorldGraph] = None, max_commands: Optional[int] = None) -> Tuple:
+    """Play one full headless run with an agent and return its RUN_FIELDS row."""
+    session = autoplay_session(seed, start, world, graph)
+    outcome, commands, deaths_before_vault = autoplay(session, AGENTS[agent](seed), max_commands)
+    counters = session.metrics.counters
+    player = session.player
+    return (seed, outcome, deaths_before_vault >= 0, counters.get('deaths', 0), deaths_before_vault,
+            counters.get('souls_lost', 0), player.level, commands, counters.get('turns', 0), counters.get('kills', 0),
+            len(player.explored))
+
+_worker_world: Tuple[Optional[Mapping[str, Mapping]], Optional[WorldGraph]] = (None, None)
+
+def _init_playthrough_worker(world_path: Optional[str]) -> None:
+    """Open the world file once per worker process, sharing it (and its routes) across runs."""
+    global _worker_world
+    if world_path:
+        base = open_world(world_path)
+        _worker_world = (base, WorldState(base).graph)
+
+def _play_chunk(task: Tuple[str, str, int, int, int, Optional[int]]) -> List[Tuple]:
+    """Worker entry point: play runs [first, last) of the seed stream and return their rows."""
+    start, agent, base_seed, first, last, max_commands = task
+    world, graph = _worker_world
+    return [play_run(run_seed(base_seed, index), start, agent, world, graph, max_commands) for index in range(first, last)]
+
+def _fan_out(worker, tasks: List[Tuple], workers: int, world_path: Optional[str]):
+    """Yield each task's result, in order, from a process pool (or from this process for one worker)."""
+    if workers == 1:
+        _init_playthrough_worker(world_path)
+        yield from map(worker, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_playthrough_worker, initargs=(world_path,)) as pool:
+        yield from pool.map(worker, tasks)
+
+def summarize_runs(rows: List[Tuple]) -> Dict:
+    """Fold per-run rows into rates, totals and percentiles."""
+    count = len(rows)
+    if not count:
+        return {'runs': 0}
+    columns = {field: [row[i] for row in rows] for i, field in enumerate(RUN_FIELDS)}
+    def spread(field: str) -> Dict:
+        values = sorted(columns[field])
+        return {'mean': sum(values) / count, 'p50': _percentile(values, 0.5), 'p95': _percentile(values, 0.95),
+                'max': values[-1]}
+    reached = [row for row in rows if row[2]]
+    return {
+        'runs': count,
+        'outcomes': {outcome: columns['outcome'].count(outcome) / count for outcome in RUN_OUTCOMES},
+        'reached_vault': len(reached) / count,
+        'reached_vault_deathless': sum(1 for row in reached if row[4] == 0) / count,
+        'deaths': spread('deaths'),
+        'souls_lost': spread('souls_lost'),
+        'souls_lost_total': sum(columns['souls_lost']),
+        'level': spread('level'),
+        'commands': spread('commands'),
+        'turns': spread('turns'),
+        'explored': spread('explored'),
+        'stalled_seeds': [row[0] for row in rows if row[1] in ('stalled', 'stuck')][:10]
+    }
+
+def run_playthroughs(runs: int, start: str = 'sword', seed: Optional[int] = None, workers: Optional[int] = None,
+                     world_path: Optional[str] = None, max_commands: Optional[int] = None,
+                     chunk: int = PLAYTHROUGH_CHUNK, agent: str = 'greedy') -> Dict:
+    """Play many full runs across a process pool and print what they add up to.
+
+    Runs are dealt out in chunks of `chunk`; each worker opens the world once
+    and sends back only RUN_FIELDS rows, so the cost of shipping results stays
+    tiny next to the runs themselves and throughput grows with the cores.
+    With one worker everything runs in this process.
+    """
+    base_seed = seed if seed is not None else random.randrange(2 ** 64)
+    workers = workers or os.cpu_count() or 1
+    tasks = [(start, agent, base_seed, first, min(first + chunk, runs), max_commands) for first in range(0, runs, chunk)]
+    rows: List[Tuple] = []
+    started = time.perf_counter()
+    for chunk_rows in _fan_out(_play_chunk, tasks, workers, world_path):
+        rows.extend(chunk_rows)
+    elapsed = time.perf_counter() - started
+    summary = summarize_runs(rows)
+    summary.update({'start': start, 'agent': agent, 'seed': base_seed, 'workers': workers, 'seconds': elapsed,
+                    'runs_per_second': runs / elapsed if elapsed else float('inf')})
+
+    print(f"\n{runs:,} {start} playthroughs by the {agent} agent (seed {base_seed}) on {workers} worker(s) "
+          f"in {elapsed:.2f}s ({summary['runs_per_second']:,.1f} runs/s).")
+    if not rows:
+        return summary
+    print("Outcomes: " + ', '.join(f"{name} {rate:.1%}" for name, rate in summary['outcomes'].items()))
+    print(f"Reached {VICTORY_ROOM}: {summary['reached_vault']:.1%} "
+          f"({summary['reached_vault_deathless']:.1%} without dying)")
+    print(f"\n{'Per run':<12} {'Mean':>9} {'p50':>8} {'p95':>8} {'Max':>8}")
+    for field in ('deaths', 'souls_lost', 'level', 'commands', 'turns', 'explored'):
+        row = summary[field]
+        print(f"{field:<12} {row['mean']:>9.1f} {row['p50']:>8.0f} {row['p95']:>8.0f} {row['max']:>8}")
+    print(f"\nSouls lost to death across all runs: {summary['souls_lost_total']:,}")
+    if summary['stalled_seeds']:
+        print("Stalled or stuck run seeds: " + ', '.join(str(s) for s in summary['stalled_seeds']))
+    return summary
+
+# --- Soak Testing ---
+def _soak_failure(session: 'GameSession', agent: str, seed: int, crash_dir: Optional[str],
+                  error: Optional[BaseException] = None) -> Dict:
+    """Describe a crashed or stuck run, saving its recording so --replay can reproduce it."""
+    report = {'agent': agent, 'seed': seed, 'inputs': len(session.recording['inputs']), 'recording': None,
+              'error': f"{type(error).__name__}: {error}" if error else f"stuck at {session.prompt!r}"}
+    if error is not None and error.__traceback__ is not None:
+        frame = traceback.extract_tb(error.__traceback__)[-1]
+        report['where'] = f"line {frame.lineno} in {frame.name}"
+    if crash_dir:
+        os.makedirs(crash_dir, exist_ok=True)
+        report['recording'] = os.path.join(crash_dir, f"{agent}-{seed}.json")
+        save_recording(session, report['recording'])
+    return report
+
+def _soak_chunk(task: Tuple[Tuple[str, ...], str, int, int, int, Optional[int], Optional[str]]) -> Dict:
+    """Worker entry point: soak runs [first, last), taking agents in turn, and return what they found."""
+    agents, start, base_seed, first, last, max_commands, crash_dir = task
+    world, graph = _worker_world
+    coverage: Dict[str, set] = {'rooms': set(), 'commands': set(), 'items': set()}
+    outcomes: Dict[str, Dict[str, int]] = {}
+    failures: List[Dict] = []
+    commands = 0
+    for index in range(first, last):
+        seed = run_seed(base_seed, index)
+        agent = agents[index % len(agents)]
+        session = autoplay_session(seed, start, world, graph)
+        try:
+            outcome, typed, _ = autoplay(session, AGENTS[agent](seed), max_commands, coverage)
+            if outcome == 'stuck':
+                failures.append(_soak_failure(session, agent, seed, crash_dir))
+        except Exception as e:
+            outcome = 'crash'
+            typed = sum(1 for prompt, _ in session.recording['inputs'] if prompt == '> ')
+            failures.append(_soak_failure(session, agent, seed, crash_dir, e))
+        tally = outcomes.setdefault(agent, {})
+        tally[outcome] = tally.get(outcome, 0) + 1
+        commands += typed
+    return {'outcomes': outcomes, 'commands': commands, 'failures': failures, 'coverage': coverage}
+
+def all_command_names() -> List[str]:
+    """Every command and subcommand by full name, as coverage counts them."""
+    names = []
+    for command in COMMANDS.commands.values():
+        names.append(command.name)
+        names.extend(sub.name for sub in command.subcommands.values())
+    return names
+
+def run_soak(runs: int, agents: Optional[List[str]] = None, start: str = 'sword', seed: Optional[int] = None,
+             workers: Optional[int] = None, world_path: Optional[str] = None, max_commands: Optional[int] = None,
+             crash_dir: Optional[str] = SOAK_CRASH_DIR, chunk: int = PLAYTHROUGH_CHUNK) -> bool:
+    """Let agents hammer the game across a process pool; False if any run crashed or got stuck.
+
+    Runs take the agents in turn and are seeded from one SplitMix64 stream,
+    so a failure is named by agent and seed, and its recording (written to
+    crash_dir) replays the exact inputs with --replay. The report gives
+    throughput and how much of the world, the command set and the item
+    tables the runs reached between them.
+    """
+    agents = tuple(agents or AGENTS)
+    base_seed = seed if seed is not None else random.randrange(2 ** 64)
+    workers = workers or os.cpu_count() or 1
+    tasks = [(agents, start, base_seed, first, min(first + chunk, runs), max_commands, crash_dir)
+             for first in range(0, runs, chunk)]
+    coverage: Dict[str, set] = {'rooms': set(), 'commands': set(), 'items': set()}
+    outcomes: Dict[str, Dict[str, int]] = {}
+    failures: List[Dict] = []
+    commands = 0
+    started = time.perf_counter()
+    for result in _fan_out(_soak_chunk, tasks, workers, world_path):
+        for agent, tally in result['outcomes'].items():
+            merged = outcomes.setdefault(agent, {})
+            for outcome, count in tally.items():
+                merged[outcome] = merged.get(outcome, 0) + count
+        for key, seen in result['coverage'].items():
+            coverage[key] |= seen
+        failures.extend(result['failures'])
+        commands += result['commands']
+    elapsed = time.perf_counter() - started
+
+    print(f"\n{runs:,} soak runs (seed {base_seed}) on {workers} worker(s) in {elapsed:.2f}s: "
+          f"{runs / elapsed * 60 if elapsed else 0:,.0f} runs/min, {commands / elapsed if elapsed else 0:,.0f} commands/s.")
+    for agent in agents:
+        tally = outcomes.get(agent, {})
+        print(f"  {agent:<8} " + ', '.join(f"{outcome} {count}" for outcome, count in sorted(tally.items())))
+    world_rooms = len(open_world(world_path)) if world_path else len(rooms)
+    commands_known = all_command_names()
+    items_known = {item for table in ITEM_TABLES for item in CONTENT[table]}
+    print(f"\nCoverage: rooms {len(coverage['rooms'])}/{world_rooms}, "
+          f"commands {len(coverage['commands'] & set(commands_known))}/{len(commands_known)}, "
+          f"items {len(coverage['items'] & items_known)}/{len(items_known)}")
+    unused = [name for name in commands_known if name not in coverage['commands']]
+    if unused:
+        print("Commands never run: " + ', '.join(unused))
+    unseen = sorted(items_known - coverage['items'])
+    if unseen:
+        print(f"Items never held ({len(unseen)}): " + ', '.join(unseen[:15]) + (' ...' if len(unseen) > 15 else ''))
+    if not failures:
+        print("\nNo crashes or stuck runs.")
+        return True
+    print(f"\n{len(failures)} failing run(s):")
+    for failure in failures[:20]:
+        where = f" ({failure['where']})" if 'where' in failure else ''
+        replay_hint = f"; replay with --replay {failure['recording']}" if failure['recording'] else ''
+        print(f"  {failure['agent']} seed {failure['seed']} after {failure['inputs']} inputs: "
+              f"{failure['error']}{where}{replay_hint}")
+    return False
+
+# --- Multiplayer Server ---
+TELNET_IAC = 255
+MAX_LINE_BYTES = 4096
+SERVER_BACKLOG = 2048  # Pending connections the listener queues; a burst of logins must not overflow it
+
+def approx_size(obj, seen: Optional[set] = None) -> int:
+    """Rough deep size in bytes of plain containers, following dicts, lists, sets and objects (slotted too)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k, seen) + approx_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approx_size(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += approx_size(vars(obj), seen)
+    elif hasattr(type(obj), '__slots__'):
+        size += sum(approx_size(getattr(obj, name), seen) for name in type(obj).__slots__ if hasattr(obj, name))
+    return size
+
+def strip_telnet(data: bytes) -> str:
+    """Drop telnet IAC negotiation sequences and line endings from a raw input line."""
+    if TELNET_IAC in data:
+        cleaned = bytearray()
+        i = 0
+        while i < len(data):
+            if data[i] == TELNET_IAC:
+                i += 3 if i + 1 < len(data) and 251 <= data[i + 1] <= 254 else 2
+                continue
+            cleaned.append(data[i])
+            i += 1
+        data = bytes(cleaned)
+    return data.decode('utf-8', errors='replace').strip('\r\n')
+
+async def discard_line(reader: asyncio.StreamReader) -> bool:
+    """Throw away input up to and including the next newline; False if the peer hung up first."""
+    while True:
+        try:
+            await reader.readuntil(b'\n')
+            return True
+        except asyncio.LimitOverrunError as e:
+            await reader.readexactly(e.consumed)
+        except asyncio.IncompleteReadError:
+            return False
+
+class Connection:
+    """One connected player: their session plus latency figures for their commands."""
+
+    def __init__(self, conn_id: int, peer: str, session: GameSession) -> None:
+        self.conn_id = conn_id
+        self.peer = peer
+        self.session = session
+        self.connected_at = time.monotonic()
+        self.last_active = self.connected_at
+        self.latency = Histogram()
+
+    def record(self, seconds: float) -> None:
+        """Count one handled command and its latency."""
+        self.latency.record(seconds)
+        self.last_active = time.monotonic()
+
+    def report(self) -> Dict:
+        """Latency and memory figures for this connection."""
+        latency = self.latency.report()
+        return {
+            'id': self.conn_id,
+            'peer': self.peer,
+            'commands': latency['count'],
+            'mean_ms': latency['mean_ms'],
+            'max_ms': latency['max_ms'],
+            'latency_buckets_ms': latency['buckets_ms'],
+            'session_bytes': approx_size(self.session)
+        }
+
+class GameServer:
+    """An asyncio line-protocol server hosting one GameSession per connection.
+
+    Sessions never block: every prompt the game yields is answered by
+    awaiting the next line from that player's socket. Lines starting with '/'
+    are server commands ('/stats', '/quit') rather than game input.
+
+    With a save directory, every step may write and fsync a save, so sessions
+    are driven on a single worker thread instead of the event loop. One worker
+    keeps steps (and the stats that read sessions) in order with each other,
+    as on the loop, while other players' sockets are still served.
+    """
+
+    def __init__(self, save_dir: Optional[str] = None, stats_interval: float = 0.0) -> None:
+        self.save_dir = save_dir
+        self.stats_interval = stats_interval
+        self.connections: Dict[int, Connection] = {}
+        self.next_id = 1
+        self.total_commands = 0
+        self.total_latency = 0.0
+        self.verb_counts: Dict[str, int] = {}
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sessions') if save_dir else None
+
+    async def run(self, fn, *args):
+        """Call fn on the session worker when sessions save, or straight away when nothing touches the disk."""
+        if self.executor is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def count_verb(self, session: GameSession, command: Command, words: List[str], elapsed: float) -> None:
+        """Post-dispatch hook tallying which commands players use."""
+        self.verb_counts[command.name] = self.verb_counts.get(command.name, 0) + 1
+
+    def new_session(self, conn_id: int) -> GameSession:
+        """Create a capturing session whose saves land in the server's save directory."""
+        if not self.save_dir:
+            return GameSession(persist=False)
+        return GameSession(save_path=os.path.join(self.save_dir, f"session_{conn_id}.json"))
+
+    async def send(self, writer: asyncio.StreamWriter, text: str) -> None:
+        """Write text with telnet line endings and wait for the socket to drain."""
+        writer.write(text.replace('\n', '\r\n').encode('utf-8'))
+        await writer.drain()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one player until their game ends or they disconnect."""
+        conn_id = self.next_id
+        self.next_id += 1
+        peer = str(writer.get_extra_info('peername') or 'unix')
+        conn = Connection(conn_id, peer, self.new_session(conn_id))
+        self.connections[conn_id] = conn
+        try:
+            await self.send(writer, await self.run(conn.session.start) + (conn.session.prompt or ''))
+            while not conn.session.finished:
+                try:
+                    raw = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.send(writer, "The dark cannot parse such a tirade.\n")
+                    if not await discard_line(reader):
+                        break
+                    continue
+                line = strip_telnet(raw)
+                if line.startswith('/'):
+                    if line == '/quit':
+                        break
+                    if line == '/stats':
+                        stats = await self.run(lambda: {'connection': conn.report(), 'server': self.report()})
+                        await self.send(writer, json.dumps(stats) + '\n')
+                        continue
+                started = time.perf_counter()
+                output = await self.run(conn.session.step, line)
+                elapsed = time.perf_counter() - started
+                conn.record(elapsed)
+                self.total_commands += 1
+                self.total_latency += elapsed
+                await self.send(writer, output + (conn.session.prompt or ''))
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            del self.connections[conn_id]
+            writer.close()
+
+    def report(self, memory_sample: int = 0) -> Dict:
+        """Server-wide figures; memory is estimated from up to memory_sample sessions."""
+        now = time.monotonic()
+        connections = list(self.connections.values())  # Players come and go on the loop while this runs on the worker
+        active = sum(1 for c in connections if now - c.last_active < 60)
+        figures = {
+            'connections': len(connections),
+            'active_last_minute': active,
+            'commands': self.total_commands,
+            'mean_ms': round(self.total_latency / self.total_commands * 1000, 3) if self.total_commands else 0.0,
+            'max_ms': round(max((c.latency.max for c in connections), default=0.0) * 1000, 3),
+            'verbs': dict(sorted(self.verb_counts.items(), key=lambda item: -item[1]))
+        }
+        if memory_sample:
+            sample = connections[:memory_sample]
+            if sample:
+                figures['mean_session_bytes'] = sum(approx_size(c.session) for c in sample) // len(sample)
+        return figures
+
+    async def publish_stats(self) -> None:
+        """Log server figures to stderr every stats_interval seconds."""
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            print(json.dumps(await self.run(self.report, 20)), file=sys.stderr, flush=True)
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 4000, unix_path: Optional[str] = None) -> None:
+        """Listen on TCP (or a Unix socket) and serve players until cancelled."""
+        if self.save_dir:
+            os.makedirs(self.save_dir, exist_ok=True)
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle, path=unix_path, limit=MAX_LINE_BYTES,
+                                                     backlog=SERVER_BACKLOG)
         else:
-            print("No chests loom in sight.")
-    elif verb == 'help':
-        print("Commands: go [direction], take [item], equip [item], learn [spell_scroll], rest, stats, map, open [chest], craft [item], save, search, help, quit")
-    elif verb == 'quit':
-        print(f"{player['name']} turns from the dark. The empire waits.")
-        save_game(player)
-        break
-    else:
-        print("The shadows ignore your words.")
\ No newline at end of file
+            server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE_BYTES, backlog=SERVER_BACKLOG)
+        where = unix_path or f"{host}:{port}"
+        print(f"Bonfire's Echo v{VERSION} serving on {where}", file=sys.stderr)
+        publisher = asyncio.create_task(self.publish_stats()) if self.stats_interval > 0 else None
+        COMMANDS.post_hooks.append(self.count_verb)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            COMMANDS.post_hooks.remove(self.count_verb)
+            if publisher:
+                publisher.cancel()
+            if self.executor:
+                self.executor.shutdown()
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options; with none given the game starts as usual."""
+    parser = argparse.ArgumentParser(description="Bonfire's Echo - a text-based souls-like.")
+    parser.add_argument('--simulate', action='store_true', help='run headless Monte Carlo fights instead of the game')
+    parser.add_argument('--fights', type=int, default=100_000, help='fights per enemy/loadout pair')
+    parser.add_argument('--enemy', action='append', choices=sorted(enemies), help='enemy to simulate (repeatable, default all)')
+    parser.add_argument('--weapon', action='append', choices=sorted(weapons), help='weapon loadout (repeatable, default starting weapons)')
+    parser.add_argument('--armor', choices=sorted(armor), help='armor worn by every simulated loadout')
+    parser.add_argument('--level', type=int, default=1, help='player level for simulated loadouts')
+    parser.add_argument('--tonics', type=int, default=0, help='opening turns spent drinking fire tonics in simulated fights')
+    parser.add_argument('--solve', action='store_true', help='compute exact fight odds for every weapon/armor pair')
+    parser.add_argument('--spell', choices=SOLVER_SPELLS, help='damage spell solved fights cast while mana lasts')
+    parser.add_argument('--seed', type=int, help='random seed for reproducible runs')
+    parser.add_argument('--playthroughs', type=int, metavar='N', help='play N full headless runs across a process pool')
+    parser.add_argument('--start', choices=[spec[0] for spec in STARTING_WEAPONS.values()], default='sword',
+                        help='starting weapon for playthroughs')
+    parser.add_argument('--workers', type=int, help='worker processes for playthroughs (default: one per core)')
+    parser.add_argument('--soak', type=int, metavar='N', help='soak-test with N autoplay runs, reporting crashes, stuck runs and coverage')
+    parser.add_argument('--agent', action='append', choices=sorted(AGENTS),
+                        help='autoplay agent (repeatable; playthroughs default to greedy, soak runs take every agent in turn)')
+    parser.add_argument('--max-commands', type=int, help="commands before a run is called off (default: the agent's own budget)")
+    parser.add_argument('--crash-dir', default=SOAK_CRASH_DIR, help='where soak runs save recordings of crashed or stuck runs')
+    parser.add_argument('--convert-save', nargs=2, metavar=('SOURCE', 'DEST'), help=f'convert a save between JSON and binary ({BINARY_SAVE_SUFFIX}) formats')
+    parser.add_argument('--bench-saves', action='store_true', help='compare JSON and binary save size and latency')
+    parser.add_argument('--bench-inventory', action='store_true', help='time crafting and equipping with 100k-item packs')
+    parser.add_argument('--check-content', action='store_true', help='validate the content packs and report warnings')
+    parser.add_argument('--generate-world', metavar='PATH', help=f'stream a procedural world of --rooms rooms to JSONL, or an indexed {WORLD_INDEX_SUFFIX} file')
+    parser.add_argument('--rooms', type=int, default=10_000, help='rooms in a generated world')
+    parser.add_argument('--layout', choices=WORLD_LAYOUTS, default='grid', help='shape of a generated world')
+    parser.add_argument('--world', metavar='PATH', help='play (or run playthroughs) in a generated world file instead of the Empire')
+    parser.add_argument('--profile', nargs='?', const=PROFILE_FILE, metavar='PATH',
+                        help=f'time commands, fights and saves and write cProfile stats (default {PROFILE_FILE})')
+    parser.add_argument('--bench', nargs='?', const=BENCH_FILE, metavar='PATH',
+                        help=f'run the hot-path benchmark suite and write JSON results (default {BENCH_FILE})')
+    parser.add_argument('--baseline', metavar='PATH', help='benchmark results to compare against; regressions fail the run')
+    parser.add_argument('--bench-only', metavar='TEXT', help='run only benchmarks whose name contains TEXT')
+    parser.add_argument('--warmup', type=int, default=3, help='untimed warmup runs per benchmark')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per benchmark')
+    parser.add_argument('--tolerance', type=float, default=BENCH_TOLERANCE, help='median slowdown vs the baseline that fails a benchmark')
+    parser.add_argument('--bench-rooms', type=int, default=BENCH_LARGE_ROOMS, help='rooms in the large benchmark world')
+    parser.add_argument('--record', metavar='PATH', help='record this game (seed plus every input) to a replay file')
+    parser.add_argument('--replay', metavar='PATH', help='replay a recorded game headlessly at full speed')
+    parser.add_argument('--serve', action='store_true', help='host sessions over a telnet-style line protocol')
+    parser.add_argument('--host', default='127.0.0.1', help='address the server binds to')
+    parser.add_argument('--port', type=int, default=4000, help='TCP port the server listens on')
+    parser.add_argument('--unix', metavar='PATH', help='serve on a Unix socket instead of TCP')
+    parser.add_argument('--save-dir', help='directory for per-connection save files (default: saving disabled)')
+    parser.add_argument('--stats-interval', type=float, default=0.0, help='seconds between server stats lines on stderr')
+    return parser.parse_args(argv)
+
+def write_profile_summary(profiler: cProfile.Profile, metrics: Metrics, path: str, stream=None) -> None:
+    """Print the game's own timers and counters, then the hottest functions cProfile saw."""
+    stream = stream or sys.stderr
+    print(f"\n--- Profile (full cProfile data in {path}) ---", file=stream)
+    if metrics.timers or metrics.counters:
+        for line in metrics.summary_lines():
+            print(line, file=stream)
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(15)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point: run the interactive game, or a headless tool if asked."""
+    args = parse_args(argv)
+    if not args.profile:
+        run(args)
+        return
+    metrics = Metrics(enabled=True)
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(run, args, metrics)
+    finally:
+        profiler.dump_stats(args.profile)
+        write_profile_summary(profiler, metrics, args.profile)
+
+def run(args: argparse.Namespace, metrics: Optional[Metrics] = None) -> None:
+    """Run whichever mode the options chose."""
+    if args.simulate:
+        loadouts = [(weapon, args.armor) for weapon in args.weapon] if args.weapon else [(w, args.armor) for w in ('sword', 'staff', 'bow')]
+        run_balance_report(args.fights, args.level, args.seed, args.enemy, loadouts, args.tonics)
+        return
+    if args.solve:
+        armors = [args.armor] if args.armor else [None, *armor]
+        loadouts = [(weapon, armor_name) for weapon in args.weapon or weapons for armor_name in armors]
+        run_solver_report(args.level, args.enemy, loadouts, args.tonics, args.spell)
+        return
+    if args.playthroughs:
+        agent = args.agent[0] if args.agent else 'greedy'
+        run_playthroughs(args.playthroughs, args.start, args.seed, args.workers, args.world, args.max_commands, agent=agent)
+        return
+    if args.soak:
+        passed = run_soak(args.soak, args.agent, args.start, args.seed, args.workers, args.world, args.max_commands,
+                          args.crash_dir)
+        sys.exit(0 if passed else 1)
+    if args.replay:
+        replay_file(args.replay)
+        return
+    if args.convert_save:
+        convert_save(*args.convert_save)
+        return
+    if args.bench_saves:
+        benchmark_save_formats()
+        return
+    if args.bench_inventory:
+        benchmark_inventory()
+        return
+    if args.bench:
+        passed = run_benchmarks(args.bench, args.baseline, args.bench_only, args.warmup, args.repeat, args.bench_rooms,
+                                args.tolerance)
+        sys.exit(0 if passed else 1)
+    if args.generate_world:
+        generate_world_file(args.generate_world, args.rooms, args.seed, args.layout)
+        return
+    if args.check_content:
+        sys.exit(0 if check_content_packs() else 1)
+    if args.serve:
+        server = GameServer(args.save_dir, args.stats_interval)
+        try:
+            asyncio.run(server.serve(args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
+        return
+    world = WorldState(open_world(args.world)) if args.world else None
+    session = GameSession(sink=TerminalSink(), seed=args.seed, world=world, metrics=metrics)
+    try:
+        prompt = session.advance()
+        while prompt is not None:
+            session.out.flush()
+            prompt = session.advance(input(prompt))
+        session.out.flush()
+    finally:
+        if args.record:
+            save_recording(session, args.record)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Bonfire's_Echo.py")
+
+def _load_game():
+    """Import the game script, whose file name is not a valid module name."""
+    if 'bonfires_echo' not in sys.modules:
+        spec = importlib.util.spec_from_file_location('bonfires_echo', SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['bonfires_echo'] = module
+        spec.loader.exec_module(module)
+    return sys.modules['bonfires_echo']
+
+@pytest.fixture(scope='session')
+def game():
+    return _load_game()
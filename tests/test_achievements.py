@@ -0,0 +1,49 @@
+def saving_session(game, path, seed=None, player=None):
+    return game.GameSession(player=player, save_path=str(path), sink=game.CaptureSink(), seed=seed)
+
+def play_to_victory(game, session, agent):
+    """Feed an agent's lines through session.step until the relic is claimed."""
+    turns = 0
+    while session.prompt != game.VICTORY_PROMPT:
+        if session.prompt == '> ':
+            turns = 0
+            line = agent.command(session, session.world.room(session.current_room))
+        else:
+            turns += 1
+            line = agent.answer(session, session.prompt, turns)
+        assert line is not None, session.prompt
+        session.step(line)
+
+def test_relic_bearer_is_awarded_once_across_a_reload(game, tmp_path):
+    path = tmp_path / 'save.json'
+    session = saving_session(game, path, game.run_seed(7, 0), game.new_player('Pilgrim', '1'))
+    session.start()
+    play_to_victory(game, session, game.AGENTS['relic'](7))
+    assert session.player.achievements.count('Relic Bearer') == 1
+    session.step('save')
+    resumed = saving_session(game, path)
+    resumed.start()
+    assert resumed.prompt.startswith('Load saved game?')
+    resumed.step('yes')
+    assert resumed.prompt == game.VICTORY_PROMPT  # Back in the vault with the relic, so victory again
+    assert resumed.player.achievements.count('Relic Bearer') == 1
+
+def test_explorer_of_shadows_fires_from_the_bus(game, tmp_path):
+    session = saving_session(game, tmp_path / 'save.json', player=game.new_player('Pilgrim', '1'))
+    player = session.player
+    player.explored.update(list(game.rooms)[:20])
+    game.EVENTS.emit(session, 'room_entered', room=game.START_ROOM, first=False)
+    assert 'Explorer of Shadows' not in player.achievements  # Only a first visit counts
+    game.EVENTS.emit(session, 'room_entered', room=game.VICTORY_ROOM, first=True)
+    assert player.achievements == ['Explorer of Shadows']
+    session.out.flush()
+    assert 'Achievement Unlocked: Explorer of Shadows' in session.out.sink.take()
+
+def test_counting_achievements_tally_until_they_unlock(game, tmp_path):
+    session = saving_session(game, tmp_path / 'save.json', player=game.new_player('Pilgrim', '1'))
+    for _ in range(9):
+        game.EVENTS.emit(session, 'death', room=game.START_ROOM)
+    assert session.player.tallies == {'Ember Undying': 9}
+    game.EVENTS.emit(session, 'death', room=game.START_ROOM)
+    assert session.player.achievements == ['Ember Undying']
+    assert session.player.tallies == {}
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+
+def test_agent_must_define_command(game):
+    with pytest.raises(TypeError):
+        game.Agent(1)
+
+def test_relic_runner_wins_and_covers_the_relic(game):
+    coverage = {'rooms': set(), 'commands': set(), 'items': set()}
+    session = game.autoplay_session(game.run_seed(7, 0))
+    outcome, commands, _ = game.autoplay(session, game.AGENTS['relic'](7), coverage=coverage)
+    assert outcome == 'victory'
+    assert game.VICTORY_ITEM in session.player.inventory
+    assert game.VICTORY_ITEM in coverage['items']
+    assert game.VICTORY_ROOM in coverage['rooms']
+    assert 0 < commands < game.AGENT_MAX_COMMANDS
+
+def test_agents_replay_their_own_runs(game):
+    for name in sorted(game.AGENTS):
+        session = game.autoplay_session(game.run_seed(11, 0))
+        game.autoplay(session, game.AGENTS[name](11))
+        rebuilt, _ = game.replay(session.recording)
+        assert game.session_state(rebuilt) == game.session_state(session)
+
+def test_soak_reports_no_failures(game, tmp_path):
+    assert game.run_soak(6, ['greedy', 'random'], seed=3, workers=1, crash_dir=str(tmp_path))
+    assert not list(tmp_path.iterdir())
+
+def test_runs_do_not_depend_on_the_hash_seed(game):
+    code = "from conftest import _load_game; print(_load_game().play_run(11, agent='random'))"
+    rows = {subprocess.run([sys.executable, '-c', code], cwd=TESTS, env=dict(os.environ, PYTHONHASHSEED=str(hash_seed)),
+                           capture_output=True, text=True, check=True).stdout for hash_seed in (1, 2, 3)}
+    assert len(rows) == 1
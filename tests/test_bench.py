@@ -0,0 +1,33 @@
+import itertools
+import json
+
+def test_measure_reports_median_and_p99(game, monkeypatch):
+    now = itertools.count()
+    clock = {'ms': 0.0}
+    monkeypatch.setattr(game.time, 'perf_counter', lambda: clock['ms'] / 1000)
+    durations = iter([50.0] * 3 + [float(ms) for ms in (7, 3, 20, 1, 12, 5, 18, 9, 14, 2, 16, 10, 4, 19, 6, 11, 17, 8, 13, 15)])
+
+    def work(ms):
+        next(now)
+        clock['ms'] += ms
+
+    report = game.measure(work, lambda: next(durations), warmup=3, repeat=20)
+    assert next(now) == 23  # Warmup calls run but are not reported
+    assert report == {'runs': 20, 'median_ms': 10.0, 'p99_ms': 20.0, 'min_ms': 1.0, 'mean_ms': 10.5}
+
+def test_baseline_comparison_flags_slowdowns(game):
+    results = {'fight': {'median_ms': 1.3}, 'save': {'median_ms': 0.9}, 'load': {'median_ms': 2.0}}
+    baseline = {'fight': {'median_ms': 1.0}, 'save': {'median_ms': 1.0}}
+    comparison = game.compare_bench(results, baseline, tolerance=0.25)
+    assert comparison == {'fight': {'baseline_ms': 1.0, 'change': 0.3, 'regression': True},
+                          'save': {'baseline_ms': 1.0, 'change': -0.1, 'regression': False}}
+
+def test_benchmark_run_writes_results_and_fails_on_regressions(game, tmp_path):
+    path, baseline = str(tmp_path / 'bench.json'), tmp_path / 'baseline.json'
+    assert game.run_benchmarks(path, only='combat.fight.golem', warmup=1, repeat=3, large_rooms=100)
+    with open(path) as f:
+        report = json.load(f)
+    assert list(report['results']) == ['combat.fight.golem']
+    report['results']['combat.fight.golem']['median_ms'] /= 10
+    baseline.write_text(json.dumps(report))
+    assert not game.run_benchmarks(path, str(baseline), only='combat.fight.golem', warmup=1, repeat=3, large_rooms=100)
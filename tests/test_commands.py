@@ -0,0 +1,71 @@
+import pytest
+
+@pytest.fixture
+def registry(game):
+    """A small registry: two verbs sharing a prefix, one verb with aliases, and a direction shortcut."""
+    commands, calls = game.CommandRegistry(), []
+    @commands.command('stats', aliases=('inv', 'inventory'))
+    def stats(session):
+        calls.append(('stats',))
+    @commands.command('status')
+    def status(session):
+        calls.append(('status',))
+    @commands.command('go', usage='go [direction]', parse=game.word_arg)
+    def go(session, direction):
+        calls.append(('go', direction))
+    @commands.command('goad')
+    def goad(session):
+        calls.append(('goad',))
+    commands.alias('north', 'go', 'north')
+    commands.calls = calls
+    return commands
+
+def said(session):
+    session.out.flush()
+    return session.out.sink.take()
+
+def test_exact_names_beat_prefixes(registry):
+    command, preset, _ = registry.resolve('go')
+    assert command.verb == 'go' and preset == ()
+    command, preset, _ = registry.resolve('stats')
+    assert command.verb == 'stats'
+    command, preset, _ = registry.resolve('goa')
+    assert command.verb == 'goad'
+
+def test_ambiguous_prefix_lists_candidates(game, registry):
+    command, _, candidates = registry.resolve('stat')
+    assert command is None and sorted(candidates) == ['stats', 'status']
+    assert registry.resolve('xyzzy') == (None, (), [])
+    session = game.GameSession(persist=False)
+    assert registry.dispatch(session, ['stat'])
+    assert 'many meanings: stats, status' in said(session)
+    assert registry.calls == []
+
+def test_aliases_of_one_verb_are_not_ambiguous(registry):
+    command, _, candidates = registry.resolve('in')
+    assert command.verb == 'stats' and sorted(candidates) == ['inv', 'inventory']
+    command, preset, _ = registry.resolve('nor')
+    assert command.verb == 'go' and preset == ('north',)
+    with pytest.raises(ValueError):
+        registry.alias('inv', 'status')
+
+def test_hooks_run_around_dispatch(game, registry):
+    session, seen = game.GameSession(persist=False), []
+    registry.pre_hooks.append(lambda session, command, words: command.verb != 'status')
+    registry.post_hooks.append(lambda session, command, words, elapsed: seen.append((command.verb, words, elapsed >= 0)))
+    registry.dispatch(session, ['north'])
+    registry.dispatch(session, ['status'])
+    registry.dispatch(session, ['go'])
+    assert registry.calls == [('go', 'north')]
+    assert seen == [('go', ['north'], True), ('go', [], True)]
+    assert 'The shadows await more: go [direction]' in said(session)
+
+def test_game_commands_resolve_abbreviations(game):
+    session = game.GameSession(persist=False, seed=0)
+    session.start()
+    session.step('Ash')
+    session.step('1')
+    assert "Ash's Toll" in session.step('i')
+    session.step('n')
+    assert session.current_room == 'grand_hall'
+    assert 'You take the torch' in session.step('ta torch')
@@ -0,0 +1,50 @@
+import json
+import os
+import shutil
+
+import pytest
+
+def pack_dir(game, tmp_path, **packs):
+    """A content directory holding the shipped base pack plus the given packs."""
+    shutil.copy(os.path.join(game.get_content_dir(), game.BASE_PACK), tmp_path)
+    for name, pack in packs.items():
+        (tmp_path / f"{name}.json").write_text(json.dumps(pack))
+    return str(tmp_path)
+
+def test_later_packs_override_and_extend(game, tmp_path):
+    mod = {'weapons': {'sword': {'attack': 11, 'desc': 'Honed.'}, 'pike': {'attack': 13, 'desc': 'Long.'}}}
+    content = game.load_content(pack_dir(game, tmp_path, mod=mod))
+    assert content['weapons']['sword']['attack'] == 11
+    assert content['weapons']['pike']['attack'] == 13
+    assert list(content['rooms']) == list(game.rooms)
+
+def test_compiled_cache_is_reused_until_a_pack_changes(game, tmp_path, monkeypatch):
+    directory = pack_dir(game, tmp_path, mod={'weapons': {'pike': {'attack': 13, 'desc': 'Long.'}}})
+    game.load_content(directory)
+    assert (tmp_path / game.CONTENT_CACHE).exists()
+    compiled = []
+    real_compile = game.compile_content
+    monkeypatch.setattr(game, 'compile_content', lambda packs: compiled.append(1) or real_compile(packs))
+    os.utime(tmp_path / 'mod.json')  # A touched pack is hashed, not recompiled
+    assert game.load_content(directory)['weapons']['pike']['attack'] == 13
+    assert not compiled
+    (tmp_path / 'mod.json').write_text(json.dumps({'weapons': {'pike': {'attack': 14, 'desc': 'Longer.'}}}))
+    assert game.load_content(directory)['weapons']['pike']['attack'] == 14
+    assert compiled == [1]
+
+def test_broken_packs_report_every_problem(game, tmp_path):
+    broken = {
+        'weapons': {'pike': {'attack': 'sharp', 'desc': 'Long.', 'reach': 2}},
+        'rooms': {'ruined_atrium': {'description': 'Ash.', 'exits': {'down': 'nowhere'}}},
+        'crafting_recipes': {'egg': {'ingredients': {'hen': 1}, 'souls': 1, 'desc': 'Egg.'},
+                             'hen': {'ingredients': {'egg': 1}, 'souls': 1, 'desc': 'Hen.'}}
+    }
+    with pytest.raises(game.ContentError) as error:
+        game.load_content(pack_dir(game, tmp_path, broken=broken))
+    assert "weapons.pike.attack: expected int, got str" in error.value.problems
+    assert "weapons.pike: unknown field 'reach'" in error.value.problems
+    broken['weapons']['pike'] = {'attack': 13, 'desc': 'Long.'}
+    with pytest.raises(game.ContentError) as error:
+        game.load_content(pack_dir(game, tmp_path, broken=broken))
+    assert "rooms.ruined_atrium.exits.down: no room 'nowhere'" in error.value.problems
+    assert any(problem.startswith('crafting_recipes: cycle') for problem in error.value.problems)
@@ -0,0 +1,72 @@
+import pytest
+
+RECIPES = {
+    'plank': {'ingredients': {'log': 1}, 'souls': 1, 'desc': 'A rough plank.'},
+    'wheel': {'ingredients': {'plank': 2}, 'souls': 2, 'desc': 'A wobbly wheel.'},
+    'frame': {'ingredients': {'plank': 4, 'nail': 2}, 'souls': 5, 'desc': 'A cart frame.'},
+    'cart': {'ingredients': {'frame': 1, 'wheel': 4}, 'souls': 20, 'desc': 'A cart for the long road.'},
+    'ouroboros': {'ingredients': {'tail': 1}, 'souls': 1, 'desc': 'It begins where it ends.'},
+    'tail': {'ingredients': {'ouroboros': 1}, 'souls': 1, 'desc': 'It ends where it begins.'}
+}
+CART_SOULS = 20 + 5 + 4 * 2 + 12 * 1  # Cart, frame, four wheels, twelve planks
+
+@pytest.fixture
+def recipes(game, monkeypatch):
+    monkeypatch.setattr(game, 'crafting_recipes', RECIPES)
+    monkeypatch.setattr(game, '_CRAFT_ORDERS', {})
+
+def crafter(game, items, souls):
+    """A session standing at the forge with items in the pack."""
+    session = game.GameSession(persist=False, seed=0)
+    session.player = game.new_player('Ash', '1')
+    session.player.inventory = game.Inventory(items)
+    session.player.souls = souls
+    session.current_room = 'forge_of_the_ancients'
+    return session
+
+def said(session):
+    session.out.flush()
+    return session.out.sink.take()
+
+def test_craft_order_puts_ingredients_first(game, recipes):
+    order = game.craft_order('cart')
+    assert order[-1] == 'cart'
+    assert order.index('plank') < order.index('wheel') and order.index('plank') < order.index('frame')
+    assert set(order) == {'plank', 'wheel', 'frame', 'cart'}
+
+def test_cycles_are_reported(game, recipes):
+    with pytest.raises(game.CraftingCycle):
+        game.craft_order('ouroboros')
+    session = crafter(game, ['tail'], 10)
+    game.craft_item(session, 'ouroboros')
+    assert 'devours itself' in said(session)
+    assert list(session.player.inventory) == ['tail']
+
+def test_nested_plan_uses_held_parts_first(game, recipes):
+    plan = game.plan_craft(game.Inventory(['log'] * 12 + ['nail'] * 2), 'cart')
+    assert plan['crafts'] == [('plank', 12), ('frame', 1), ('wheel', 4), ('cart', 1)]
+    assert plan['souls'] == CART_SOULS and not plan['missing']
+    plan = game.plan_craft(game.Inventory(['log'] * 12 + ['nail'] * 2 + ['wheel', 'plank']), 'cart')
+    assert plan['use'] == {'wheel': 1, 'plank': 1, 'log': 9, 'nail': 2}
+    assert plan['crafts'] == [('plank', 9), ('frame', 1), ('wheel', 3), ('cart', 1)]
+
+def test_missing_ingredients_are_reported(game, recipes):
+    plan = game.plan_craft(game.Inventory(['log'] * 5), 'cart')
+    assert plan['missing'] == {'log': 7, 'nail': 2}
+    session = crafter(game, ['log'] * 5, 100)
+    game.craft_item(session, 'cart')
+    output = said(session)
+    assert 'Missing 7 log(s).' in output and 'Missing 2 nail(s).' in output
+    assert session.player.inventory.counts() == {'log': 5} and session.player.souls == 100
+
+def test_bulk_crafting_from_a_large_pack(game, recipes):
+    logs, nails = 100_000, 1_000
+    count, plan = game.max_craftable(game.Inventory(['log'] * logs + ['nail'] * nails), 10 ** 9, 'cart')
+    assert count == nails // 2 and plan['souls'] == CART_SOULS * count
+    assert game.max_craftable(game.Inventory(['log'] * logs + ['nail'] * nails), CART_SOULS * 7 + 3, 'cart')[0] == 7
+    session = crafter(game, ['log'] * logs + ['nail'] * nails, 10 ** 9)
+    game.execute_command(session, ['craft', 'all', 'cart'])
+    assert session.player.inventory.counts() == {'log': logs - 12 * count, 'cart': count}
+    game.execute_command(session, ['craft', '3', 'plank'])
+    assert session.player.inventory.count('plank') == 3
+    assert f"You craft {count} carts" in said(session)
@@ -0,0 +1,38 @@
+def test_stacks_cap_and_drop_the_oldest(game):
+    engine, foe = game.EffectEngine(), game.Combatant.spawn('golem')
+    first = engine.apply(foe, 'bleed', 3, 2)
+    for _ in range(game.BLEED_MAX_STACKS):
+        engine.apply(foe, 'bleed', 3, 2)
+    assert len(foe.effects['bleed']) == game.BLEED_MAX_STACKS
+    assert first not in foe.effects['bleed']
+    ticking, expired = engine.advance()
+    assert len(ticking) == game.BLEED_MAX_STACKS and not expired
+    engine.advance()
+    ticking, expired = engine.advance()
+    assert len(expired) == game.BLEED_MAX_STACKS
+    assert 'bleed' not in foe.effects
+
+def test_ice_slow_stacks_lower_attack(game):
+    engine, foe = game.EffectEngine(), game.Combatant.spawn('golem')
+    for _ in range(game.SLOW_MAX_STACKS + 2):
+        engine.apply(foe, 'slow', game.SLOW_TURNS, -game.SLOW_AMOUNT)
+    assert engine.bonus(foe, 'attack') == -game.SLOW_AMOUNT * game.SLOW_MAX_STACKS
+    for _ in range(game.SLOW_TURNS):
+        engine.advance()
+    assert engine.bonus(foe, 'attack') == 0
+
+def test_single_stack_effects_refresh(game):
+    engine, player = game.EffectEngine(), game.PlayerState()
+    engine.apply(player, 'strength', 2, 5)
+    engine.advance()
+    engine.apply(player, 'strength', 2, 5)
+    assert engine.to_list(player) == [{'kind': 'strength', 'turns': 2, 'amount': 5}]
+    assert engine.bonus(player, 'attack') == 5 and engine.bonus(player, 'defense') == 0
+
+def test_effects_load_from_old_saves(game):
+    engine, player = game.EffectEngine(), game.PlayerState()
+    engine.load(player, {'strength': {'turns': 2, 'bonus': 5}, 'bleed': {'turns': 3, 'damage': 2, 'target': 'enemy'}})
+    assert engine.to_list(player) == [{'kind': 'strength', 'turns': 2, 'amount': 5}]
+    restored = game.EffectEngine()
+    restored.load(player, engine.to_list(player))
+    assert restored.to_list(player) == engine.to_list(player)
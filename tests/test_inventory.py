@@ -0,0 +1,31 @@
+import pytest
+
+def test_inventory_counts_like_a_list(game):
+    pack = game.Inventory(['herb', 'vial', 'herb'])
+    pack.append('iron_ore', 3)
+    assert list(pack) == ['herb', 'herb', 'vial', 'iron_ore', 'iron_ore', 'iron_ore']
+    assert len(pack) == 6 and pack.count('herb') == 2 and pack.count('torch') == 0
+    pack.remove('iron_ore', 2)
+    pack.remove('vial')
+    assert pack.counts() == {'herb': 2, 'iron_ore': 1}
+    assert 'vial' not in pack and len(pack) == 3
+    with pytest.raises(ValueError):
+        pack.remove('herb', 3)
+    assert pack.count('herb') == 2
+
+def test_player_inventory_round_trips_through_saves(game):
+    player = game.new_player('Ash', '1')
+    player.inventory = game.Inventory(['herb'] * 500 + ['vial'])
+    restored = game.PlayerState.from_dict(player.to_dict())
+    assert isinstance(restored.inventory, game.Inventory)
+    assert restored.inventory == player.inventory
+
+def test_crafting_spends_counted_ingredients(game):
+    session = game.GameSession(persist=False, sink=game.NullSink(), seed=0)
+    player = session.player = game.new_player('Ash', '1')
+    player.souls = 1000
+    for ingredient, count in game.crafting_recipes['healing_potion']['ingredients'].items():
+        player.inventory.append(ingredient, count + 1)
+    game.craft_item(session, 'healing_potion')
+    assert player.inventory.count('healing_potion') == 1
+    assert all(player.inventory.count(i) == 1 for i in game.crafting_recipes['healing_potion']['ingredients'])
@@ -0,0 +1,89 @@
+ROUTE = ('open dusty_chest', 'go north', 'take torch', 'take chain_vest', 'equip chain_vest', 'go south')
+
+def new_game(game, path, name='Ash', load=None):
+    """A saving session past character creation, standing at its first command prompt."""
+    session = game.GameSession(save_path=str(path), sink=game.CaptureSink())
+    session.start()
+    if session.prompt.startswith('Load saved game?'):
+        session.step(load or 'no')
+        if load == 'yes':
+            return session
+    session.step(name)
+    session.step('1')
+    assert session.prompt == '> '
+    return session
+
+def reload(game, path):
+    session = game.GameSession(save_path=str(path), sink=game.NullSink())
+    assert game.load_game(session)
+    return session
+
+def test_autosaves_journal_each_command_and_reload(game, tmp_path):
+    path = tmp_path / 'save.json'
+    session = new_game(game, path)
+    snapshot = path.read_bytes()
+    for line in ROUTE:
+        session.step(line)
+    assert path.read_bytes() == snapshot  # Autosaves only append to the journal
+    assert (tmp_path / ('save.json' + game.JOURNAL_SUFFIX)).read_text().count('\n') == len(ROUTE)
+    assert game.session_state(reload(game, path)) == game.session_state(session)
+
+def test_compaction_folds_the_journal_into_the_snapshot(game, tmp_path, monkeypatch):
+    monkeypatch.setattr(game, 'JOURNAL_COMPACT_EVERY', 2)
+    path = tmp_path / 'save.bsav'
+    session = new_game(game, path)
+    for line in ROUTE:
+        session.step(line)
+    journal = tmp_path / ('save.bsav' + game.JOURNAL_SUFFIX)
+    assert journal.read_text().count('\n') <= 2
+    assert game.session_state(reload(game, path)) == game.session_state(session)
+
+def test_torn_journal_tail_is_ignored(game, tmp_path):
+    path = tmp_path / 'save.json'
+    session = new_game(game, path)
+    session.step('go north')
+    expected = game.session_state(session)
+    journal = tmp_path / ('save.json' + game.JOURNAL_SUFFIX)
+    with open(journal, 'a') as f:
+        f.write('{"id": "torn", "ops": [["place", "relic_va')
+    assert game.session_state(reload(game, path)) == expected
+
+def test_declining_to_load_keeps_the_old_save(game, tmp_path):
+    path = tmp_path / 'save.json'
+    first = new_game(game, path, 'Ash')
+    first.step('go north')
+    game.save_game(first)
+    old = path.read_bytes()
+    second = new_game(game, path, 'Brand', load='no')
+    second.step('go north')
+    second.step('go south')
+    assert path.read_bytes() == old
+    assert reload(game, path).player.name == 'Ash'
+    second.step('save')
+    assert reload(game, path).player.name == 'Brand'
+
+def test_accepting_the_load_resumes_the_game(game, tmp_path):
+    path = tmp_path / 'save.json'
+    first = new_game(game, path)
+    first.step('go north')
+    resumed = new_game(game, path, load='yes')
+    assert resumed.current_room == first.current_room
+    assert game.session_state(resumed)['player'] == game.session_state(first)['player']
+
+def test_reload_keeps_the_respawn_generation(game, tmp_path):
+    path = tmp_path / 'save.json'
+    session = new_game(game, path)
+    session.world.remove('crystal_cavern', 'enemies', 'skeleton')
+    session.world.respawn()
+    session.world.remove('windy_tunnel', 'enemies', 'shadow_beast')
+    session.step('go north')
+    replayed = reload(game, path).world
+    assert replayed.generation == 1
+    assert replayed.roster_generation == {'crystal_cavern': 0, 'windy_tunnel': 1}
+    game.save_game(session)  # The snapshot keeps only rosters from the current generation
+    restored = reload(game, path).world
+    for world in (session.world, replayed, restored):
+        world.refresh('crystal_cavern')
+        world.refresh('windy_tunnel')
+    assert restored.to_dict() == replayed.to_dict() == session.world.to_dict()
+    assert restored.room('windy_tunnel')['enemies'] == []
@@ -0,0 +1,34 @@
+def test_disabled_metrics_record_nothing(game):
+    metrics = game.Metrics()
+    metrics.record('command.go', 0.002)
+    metrics.count('kills')
+    assert metrics.report() == {'timers': {}, 'counters': {}}
+
+def test_enabled_metrics_fill_histogram_buckets(game):
+    metrics = game.Metrics(enabled=True)
+    for seconds in (0.0002, 0.003, 0.004):
+        metrics.record('command.go', seconds)
+    metrics.count('kills', 2)
+    report = metrics.report()
+    timer = report['timers']['command.go']
+    assert timer['count'] == 3 and timer['max_ms'] == 4.0
+    assert timer['buckets_ms']['0.25'] == 1 and timer['buckets_ms']['5.0'] == 2
+    assert sum(timer['buckets_ms'].values()) == 3
+    assert timer['p50_ms'] == 4.0  # The bucket's bound, capped at the slowest sample
+    assert report['counters'] == {'kills': 2}
+    metrics.reset()
+    assert metrics.report() == {'timers': {}, 'counters': {}}
+
+def test_perf_command_times_what_follows(game):
+    session = game.GameSession(persist=False, seed=0)
+    session.start()
+    session.step('Ash')
+    session.step('1')
+    session.step('look')
+    assert not session.metrics.timers
+    assert "You begin to count" in session.step('perf on')
+    session.step('go north')
+    session.step('go south')
+    output = session.step('perf')
+    assert session.metrics.timers['command.go'].count == 2
+    assert 'command.go' in output
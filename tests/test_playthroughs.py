@@ -0,0 +1,25 @@
+import pytest
+
+TIMING = ('workers', 'seconds', 'runs_per_second')
+
+def test_run_seeds_are_a_fixed_stream(game):
+    seeds = [game.run_seed(3, i) for i in range(1000)]
+    assert len(set(seeds)) == len(seeds)
+    assert all(0 <= seed < 2 ** 64 for seed in seeds)
+    assert seeds[:5] == [game.run_seed(3, i) for i in range(5)]
+    assert game.run_seed(4, 0) not in seeds
+
+def test_same_seed_plays_the_same_run(game):
+    seed = game.run_seed(3, 0)
+    row = game.play_run(seed)
+    assert row == game.play_run(seed)
+    run = dict(zip(game.RUN_FIELDS, row))
+    assert run['seed'] == seed and run['outcome'] in game.RUN_OUTCOMES
+
+def test_results_do_not_depend_on_the_worker_count(game):
+    summaries = [game.run_playthroughs(12, seed=5, workers=workers, chunk=5) for workers in (1, 2)]
+    for summary in summaries:
+        for field in TIMING:
+            del summary[field]
+    assert summaries[0] == summaries[1]
+    assert sum(summaries[0]['outcomes'].values()) == pytest.approx(1.0)
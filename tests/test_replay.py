@@ -0,0 +1,74 @@
+"""Recorded games replayed as regression tests.
+
+Each file in recordings/ is a recording plus the state its game ended in.
+A rules change that alters what any of them does fails here; if the change
+is intended, regenerate them with: python tests/test_replay.py
+"""
+import json
+import os
+
+import pytest
+
+RECORDINGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings')
+# (file, agent, seed) for every regression recording; no agent means scripted_game's line of play
+FIXTURES = (('windy_tunnel_fight.json', None, 42), ('relic_victory.json', 'relic', 7),
+            ('greedy_explorer.json', 'greedy', 19), ('random_walk.json', 'random', 5))
+
+def summary(session):
+    """The end state a regression recording pins down."""
+    player = session.player
+    return {'room': session.current_room, 'level': player.level, 'health': player.health, 'souls': player.souls,
+            'inventory': sorted(player.inventory), 'explored': len(player.explored),
+            'achievements': player.achievements, 'finished': session.finished}
+
+def scripted_game(game, seed):
+    """A fixed line of play from a seed; returns the session and everything it printed."""
+    session = game.GameSession(persist=False, seed=seed)
+    output = [session.start()]
+    # Into the windy tunnel's fight; any attack left over once it ends is just an unknown command
+    for line in ('Ash', '3', 'open dusty_chest', 'go east') + ('attack',) * 8:
+        output.append(session.step(line))
+    return session, ''.join(output)
+
+def record(game, agent, seed):
+    if agent is None:
+        session, _ = scripted_game(game, seed)
+    else:
+        session = game.autoplay_session(seed)
+        game.autoplay(session, game.AGENTS[agent](seed))
+    return dict(session.recording, expected=summary(session))
+
+@pytest.mark.parametrize('name', [fixture[0] for fixture in FIXTURES])
+def test_recorded_games_replay_unchanged(game, name):
+    with open(os.path.join(RECORDINGS, name)) as f:
+        recording = json.load(f)
+    session, stats = game.replay(recording)
+    assert stats['inputs'] == len(recording['inputs'])
+    assert json.loads(json.dumps(summary(session))) == recording['expected']
+
+def test_same_seed_and_inputs_give_the_same_game(game):
+    games = [scripted_game(game, 99) for _ in range(2)]
+    assert games[0][1] == games[1][1]
+    assert game.session_state(games[0][0]) == game.session_state(games[1][0])
+
+def test_replay_rebuilds_state_and_output(game):
+    session, original = scripted_game(game, 42)
+    replay_sink = game.CaptureSink()
+    rebuilt, _ = game.replay(json.loads(json.dumps(session.recording)), replay_sink)
+    assert replay_sink.take() == original
+    assert game.session_state(rebuilt) == game.session_state(session)
+
+def test_changed_rules_raise_divergence(game):
+    with open(os.path.join(RECORDINGS, FIXTURES[0][0])) as f:
+        recording = json.load(f)
+    recording['inputs'].insert(3, ['Is this a prompt? ', 'no'])
+    with pytest.raises(game.ReplayDivergence):
+        game.replay(recording)
+
+if __name__ == '__main__':
+    from conftest import _load_game
+    module = _load_game()
+    for name, agent, seed in FIXTURES:
+        with open(os.path.join(RECORDINGS, name), 'w') as f:
+            json.dump(record(module, agent, seed), f, separators=(',', ':'))
+        print(f"Recorded {name}")
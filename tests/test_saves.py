@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+BASELINE_SAVE = {
+    'player': {
+        'name': 'Ashen', 'health': 80, 'max_health': 100, 'mana': 50, 'max_mana': 50,
+        'attack': 10, 'defense': 3, 'xp': 40, 'level': 1, 'spells': [], 'inventory': ['herb', 'herb'],
+        'equipped_weapon': 'sword', 'equipped_armor': None, 'trinkets': [], 'explored': ['ruined_atrium'],
+        'souls': 7, 'stealth': False, 'achievements': []
+    },
+    'current_room': 'ruined_atrium',
+    'last_bonfire': 'ruined_atrium',
+    'active_effects': {'strength': {'turns': 2, 'bonus': 5}, 'bleed': {'turns': 3, 'damage': 2, 'target': 'enemy'}}
+}
+
+def baseline_save(game):
+    """A save as the original single-file game wrote it: every room's lists in full."""
+    state = json.loads(json.dumps(BASELINE_SAVE))
+    state['rooms'] = {name: {'enemies': list(room.get('enemies', ())), 'objects': list(room.get('objects', ())),
+                             'chests': list(room.get('chests', ()))} for name, room in game.rooms.items()}
+    state['rooms']['windy_tunnel']['objects'] = []
+    return state
+
+def test_binary_round_trip_and_lazy_sections(game):
+    state = json.loads(json.dumps(game.synthetic_save_state(50)))
+    save = game.BinarySave(game.encode_binary_save(state))
+    assert save.place == (state['current_room'], state['last_bonfire'])
+    assert set(save._cache) == {b'STRS', b'PLCE'}
+    assert save.explored == set(state['player']['explored'])
+    assert save.to_state() == state
+
+def test_converting_between_formats_keeps_the_state(game, tmp_path):
+    state = json.loads(json.dumps(game.synthetic_save_state(20)))
+    source, binary, back = tmp_path / 'save.json', tmp_path / 'save.bsav', tmp_path / 'back.json'
+    source.write_text(json.dumps(state))
+    game.convert_save(str(source), str(binary))
+    assert binary.read_bytes()[:4] == game.BINARY_SAVE_MAGIC
+    assert binary.stat().st_size < source.stat().st_size
+    game.convert_save(str(binary), str(back))
+    assert json.loads(back.read_text()) == state
+
+def test_damaged_binary_saves_are_refused(game):
+    data = game.encode_binary_save(game.synthetic_save_state(5))
+    for damaged in (data[:6], b'JUNK' + data[4:], data[:-10]):
+        with pytest.raises(KeyError):
+            game.BinarySave(damaged)
+
+def test_convert_baseline_save_to_binary(game, tmp_path):
+    source, destination = tmp_path / 'old.json', tmp_path / 'new.bsav'
+    source.write_text(json.dumps(baseline_save(game), indent=2))
+    game.convert_save(str(source), str(destination))
+    state = game.read_save_state(str(destination))
+    assert state['world']['changes'] == {'windy_tunnel': {'objects': []}}
+    assert state['player']['inventory'] == ['herb', 'herb']
+    assert state['active_effects'] == [{'kind': 'strength', 'turns': 2, 'amount': 5}]
+
+def test_legacy_and_binary_saves_load_alike(game, tmp_path):
+    legacy_path, binary_path = tmp_path / 'old.json', tmp_path / 'old.bsav'
+    legacy_path.write_text(json.dumps(baseline_save(game)))
+    game.convert_save(str(legacy_path), str(binary_path))
+    loaded = []
+    for path in (legacy_path, binary_path):
+        session = game.GameSession(save_path=str(path), sink=game.NullSink())
+        assert game.load_game(session)
+        loaded.append(game.session_state(session))
+    assert loaded[0] == loaded[1]
+    player = loaded[0]['player']
+    assert (player['base_attack'], player['souls'], player['health']) == (0, 7, 80)
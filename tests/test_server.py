@@ -0,0 +1,53 @@
+import asyncio
+import json
+import threading
+
+async def _talk(game, path, exchanges, server=None):
+    """Connect to a server (a fresh one by default), send each payload and read up to the marker that answers it."""
+    server = server or game.GameServer()
+    listener = await asyncio.start_unix_server(server.handle, path=path, limit=game.MAX_LINE_BYTES)
+    async with listener:
+        reader, writer = await asyncio.open_unix_connection(path)
+        seen = (await reader.readuntil(b'Enter your name: ')).decode()
+        for payload, marker in exchanges:
+            writer.write(payload)
+            seen += (await asyncio.wait_for(reader.readuntil(marker), 5)).decode()
+        writer.write(b'/quit\n')
+        await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+    return seen
+
+def test_each_connection_plays_its_own_game(game, tmp_path):
+    exchanges = [(b'Ash\r\n', b'Enter 1, 2, or 3: '), (b'1\r\n', b'> '), (b'go north\r\n', b'> '), (b'/stats\r\n', b'}\r\n')]
+    seen = asyncio.run(_talk(game, str(tmp_path / 'echo.sock'), exchanges))
+    assert 'You stagger north into the abyss.\r\n' in seen
+    assert seen.endswith('\r\n') and '\n' not in seen.replace('\r\n', '')
+    stats = json.loads(seen.rsplit('> ', 1)[1])
+    assert stats['connection']['commands'] == 3
+    assert stats['server']['connections'] == 1
+
+def test_saving_sessions_step_off_the_event_loop(game, tmp_path, monkeypatch):
+    threads = set()
+    def autosave(session, save=game.autosave):
+        threads.add(threading.current_thread())
+        save(session)
+    monkeypatch.setattr(game, 'autosave', autosave)
+    server = game.GameServer(save_dir=str(tmp_path / 'saves'))
+    (tmp_path / 'saves').mkdir()
+    exchanges = [(b'Ash\r\n', b'Enter 1, 2, or 3: '), (b'1\r\n', b'\r\n> '), (b'go north\r\n', b'\r\n> ')]
+    seen = asyncio.run(_talk(game, str(tmp_path / 'echo.sock'), exchanges, server))
+    server.executor.shutdown()
+    assert 'You stagger north into the abyss.' in seen
+    assert threads and threading.main_thread() not in threads
+    assert game.read_save_state(str(tmp_path / 'saves' / 'session_1.json'))['player']['name'] == 'Ash'
+
+def test_oversized_line_is_dropped_whole(game, tmp_path):
+    payload = b'x' * (game.MAX_LINE_BYTES * 5 + 123) + b'\r\nAsh\r\n'
+    seen = asyncio.run(_talk(game, str(tmp_path / 'echo.sock'), [(payload, b'Enter 1, 2, or 3: ')]))
+    assert 'cannot parse such a tirade' in seen
+    assert 'Ash, pick your starting edge' in seen
+    assert 'xxxx' not in seen
+
+def test_telnet_negotiation_is_stripped(game):
+    assert game.strip_telnet(bytes([255, 251, 1]) + b'look\r\n') == 'look'
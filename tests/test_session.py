@@ -0,0 +1,92 @@
+def fresh(game, tmp_path):
+    return game.GameSession(save_path=str(tmp_path / 'save.json'))
+
+def new_game(game, tmp_path, name='Ash'):
+    session = fresh(game, tmp_path)
+    session.start()
+    session.step(name)
+    session.step('1')
+    return session
+
+def test_new_game_prompts_in_order(game, tmp_path):
+    session = fresh(game, tmp_path)
+    intro = session.start()
+    assert intro.startswith(f"Bonfire's Echo v{game.VERSION}")
+    assert session.prompt == 'Enter your name: '
+    assert 'Ash, pick your starting edge' in session.step('Ash')
+    assert session.prompt == 'Enter 1, 2, or 3: '
+    assert 'Choose, or face the dark' in session.step('4')
+    assert session.prompt == 'Enter 1, 2, or 3: '
+    output = session.step('2')
+    assert session.prompt == '> '
+    assert game.rooms[game.START_ROOM]['description'] in output
+    assert session.player.equipped_weapon == 'staff'
+
+def test_commands_change_state_and_report_it(game, tmp_path):
+    session = new_game(game, tmp_path)
+    assert 'You claim' in session.step('open dusty_chest')
+    output = session.step('go north')
+    assert session.current_room == 'grand_hall'
+    assert game.rooms['grand_hall']['description'] in output
+    assert 'You take the torch' in session.step('take torch')
+    assert 'torch' in session.player.inventory
+    assert "Ash's Toll" in session.step('stats')
+    assert 'The shadows ignore your words.' in session.step('dance wildly')
+    assert session.prompt == '> '
+
+def test_quit_saves_and_finishes_the_session(game, tmp_path):
+    session = new_game(game, tmp_path)
+    assert 'The empire waits.' in session.step('quit')
+    assert session.finished
+    assert session.advance('look') is None
+    assert (tmp_path / 'save.json').exists()
+
+def test_sessions_share_nothing_mutable(game, tmp_path):
+    first, second = new_game(game, tmp_path / 'one', 'Ash'), new_game(game, tmp_path / 'two', 'Brand')
+    first.step('go north')
+    first.step('take torch')
+    assert second.current_room == game.START_ROOM
+    assert 'torch' in second.world.room('grand_hall')['objects']
+    assert 'torch' not in first.world.room('grand_hall')['objects']
+    assert 'torch' in game.rooms['grand_hall']['objects']
+
+def test_world_overlay_holds_only_changes(game, tmp_path):
+    session = new_game(game, tmp_path)
+    session.step('go north')
+    session.step('take torch')
+    left = [item for item in game.rooms['grand_hall']['objects'] if item != 'torch']
+    assert session.world.to_dict() == {'changes': {'grand_hall': {'objects': left}}, 'solved_puzzles': [], 'emptied_chests': []}
+    assert session.world.room('library') == game.rooms['library']
+
+def test_saved_world_state_does_not_follow_the_game(game, tmp_path):
+    session = new_game(game, tmp_path)
+    session.step('go north')
+    session.step('take torch')
+    saved = session.world.to_dict()
+    kept = list(saved['changes']['grand_hall']['objects'])
+    session.step(f"take {kept[0]}")
+    assert saved['changes']['grand_hall']['objects'] == kept
+
+def test_respawn_restores_a_room_when_it_is_next_entered(game):
+    world = game.WorldState()
+    world.remove('crystal_cavern', 'enemies', 'skeleton')
+    world.remove('windy_tunnel', 'enemies', 'shadow_beast')
+    world.respawn()
+    assert world.room('crystal_cavern')['enemies'] == ['skeleton']
+    world.refresh('crystal_cavern')
+    assert list(world.room('crystal_cavern')['enemies']) == ['skeleton', 'skeleton']
+    assert world.room('windy_tunnel')['enemies'] == []
+    world.refresh('crystal_cavern')
+    world.remove('crystal_cavern', 'enemies', 'skeleton')
+    world.refresh('crystal_cavern')  # Slain since the respawn, so it stays slain
+    assert world.room('crystal_cavern')['enemies'] == ['skeleton']
+
+def test_respawn_leaves_untouched_rooms_alone(game):
+    world = game.WorldState()
+    world.remove('windy_tunnel', 'enemies', 'shadow_beast')
+    world.respawn()
+    for room_name in ('library', 'garden_of_shadows', 'grand_hall'):
+        world.refresh(room_name)
+        assert world.room(room_name) == game.rooms[room_name]
+    assert list(world.changes) == ['windy_tunnel']
+    assert list(world.roster_generation) == ['windy_tunnel']
@@ -0,0 +1,44 @@
+import math
+
+import pytest
+
+FIGHTS = 20_000
+MATCHUPS = [('shadow_beast', 'sword', None, 1, 0), ('golem', 'sword', None, 1, 0), ('golem', 'staff', None, 2, 0),
+            ('relic_warden', 'bow', 'leather_armor', 3, 0), ('relic_warden', 'sword', 'leather_armor', 4, 2),
+            ('wraith', 'bow', None, 1, 1)]
+
+def close(exact, sampled, spread):
+    """Whether a Monte Carlo estimate lies within five standard errors of the exact value."""
+    return abs(exact - sampled) <= 5 * spread + 1e-9
+
+@pytest.mark.parametrize('enemy_key, weapon, armor_name, level, tonics', MATCHUPS)
+def test_solver_agrees_with_the_simulator(game, enemy_key, weapon, armor_name, level, tonics):
+    pytest.importorskip('numpy')
+    player = game.simulation_player(weapon, armor_name, level)
+    exact = game.solve_fight(player, enemy_key, tonics)
+    sampled = game.simulate_fights(player, enemy_key, FIGHTS, seed=1, tonics=tonics)
+    p = exact['win_rate']
+    assert close(p, sampled['win_rate'], math.sqrt(p * (1 - p) / FIGHTS))
+    assert close(exact['loss_rate'], sampled['loss_rate'], math.sqrt(exact['loss_rate'] * (1 - exact['loss_rate']) / FIGHTS))
+    assert math.isclose(exact['win_rate'] + exact['loss_rate'] + exact['unresolved_rate'], 1.0, abs_tol=1e-9)
+    assert abs(exact['expected_turns'] - sampled['turns']['mean']) < 0.05 * exact['expected_turns'] + 0.1
+
+def test_solver_agrees_with_real_combat(game):
+    enemy_key, fights = 'golem', 1500
+    player = game.simulation_player('sword')
+    exact = game.solve_fight(player, enemy_key)['win_rate']
+    wins = 0
+    for seed in range(fights):
+        session = game.GameSession(player=game.simulation_player('sword'), persist=False, sink=game.NullSink(), seed=seed)
+        script = game.enhanced_combat(session, game.Combatant.spawn(enemy_key), enemy_key)
+        try:
+            next(script)
+            while True:
+                script.send('attack')
+        except StopIteration as done:
+            wins += bool(done.value)
+    assert close(exact, wins / fights, math.sqrt(exact * (1 - exact) / fights))
+
+def test_spells_need_damage(game):
+    with pytest.raises(ValueError):
+        game.solve_fight(game.simulation_player('staff'), 'golem', spell='stealth')
@@ -0,0 +1,53 @@
+def armed(game, *items):
+    """A sword-wielding new player at their first prompt, carrying items."""
+    session = game.GameSession(persist=False)
+    session.start()
+    session.step('Ash')
+    session.step('1')
+    for item in items:
+        session.player.inventory.append(item)
+    return session
+
+def test_trinkets_and_levels_survive_gear_swaps(game):
+    session = armed(game, 'ruby_ring', 'iron_sword', 'chain_vest', 'leather_armor')
+    player = session.player
+    player.xp = 100
+    game.check_level_up(session)
+    assert player.level == 2
+    session.step('equip ruby_ring')
+    assert player.attack == 10 + game.LEVEL_GAINS['attack'] + 3
+    session.step('equip iron_sword')
+    assert player.attack == 15 + game.LEVEL_GAINS['attack'] + 3
+    session.step('equip chain_vest')
+    session.step('equip leather_armor')
+    assert player.defense == player.base_defense + game.LEVEL_GAINS['defense'] + 3
+    player.equipped_armor = None
+    player.invalidate()
+    assert player.defense == player.base_defense + game.LEVEL_GAINS['defense']
+    assert player.attack == 15 + game.LEVEL_GAINS['attack'] + 3
+
+def test_armor_defense_adds_to_base_defense(game):
+    session = armed(game, 'chain_vest')
+    player = session.player
+    base = player.defense
+    assert base == player.base_defense == 3
+    session.step('equip chain_vest')
+    assert player.defense == base + game.armor['chain_vest']['defense']
+
+def test_mana_bonus_comes_and_goes_with_the_gear(game):
+    session = armed(game, 'mage_cloak', 'chain_vest')
+    player = session.player
+    session.step('equip mage_cloak')
+    assert player.max_mana == 50 + 20
+    player.mana = player.max_mana
+    session.step('equip chain_vest')
+    assert player.max_mana == 50 and player.mana == 50
+
+def test_effects_feed_the_cached_totals(game):
+    session = armed(game)
+    player = session.player
+    attack = player.attack
+    session.effects.apply(player, 'strength', 1, 5)
+    assert player.attack == attack + 5
+    session.effects.advance()
+    assert player.attack == attack
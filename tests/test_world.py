@@ -0,0 +1,156 @@
+from collections import deque
+
+import pytest
+
+def bfs_distance(world, start, goal):
+    seen, frontier = {start: 0}, deque([start])
+    while frontier:
+        room = frontier.popleft()
+        for dest in world[room]['exits'].values():
+            if dest in world and dest not in seen:
+                seen[dest] = seen[room] + 1
+                frontier.append(dest)
+    return seen.get(goal)
+
+def grid_world(side):
+    """side x side rooms joined by two-way exits, with a few one-way drops."""
+    world = {}
+    for row in range(side):
+        for col in range(side):
+            exits = {}
+            for direction, r, c in (('north', row - 1, col), ('south', row + 1, col), ('west', row, col - 1), ('east', row, col + 1)):
+                if 0 <= r < side and 0 <= c < side:
+                    exits[direction] = f"room_{r}_{c}"
+            if row == col and row + 2 < side:
+                exits['down'] = f"room_{row + 2}_{col}"
+            world[f"room_{row}_{col}"] = {'exits': exits}
+    return world
+
+def test_graph_builds_no_tables_up_front(game):
+    graph = game.WorldGraph(dict(game.generate_world(game.GRAPH_KEEP_ALL_LIMIT, 1)))
+    assert graph.keep_all and not graph._next_hops
+
+def test_routes_are_shortest_and_walkable(game):
+    world = game.rooms
+    graph = game.WorldGraph(world)
+    for goal in world:
+        steps = graph.route(game.START_ROOM, goal)
+        assert len(steps) == bfs_distance(world, game.START_ROOM, goal)
+        room = game.START_ROOM
+        for direction, dest in steps:
+            assert world[room]['exits'][direction] == dest
+            room = dest
+        assert room == goal
+    assert len(graph._next_hops) == len(world) - 1  # A route to where you stand needs no table
+
+def test_large_graphs_evict_old_tables(game, monkeypatch):
+    monkeypatch.setattr(game, 'GRAPH_KEEP_ALL_LIMIT', 10)
+    monkeypatch.setattr(game, 'ROUTE_CACHE_SIZE', 4)
+    world = grid_world(7)
+    start = next(iter(world))
+    graph = game.WorldGraph(world)
+    for goal in list(world)[::2]:
+        assert len(graph.route(start, goal)) == bfs_distance(world, start, goal)
+    assert len(graph._next_hops) == 4
+
+def test_travel_walks_to_explored_rooms_only(game):
+    session = game.GameSession(persist=False)
+    session.start()
+    for line in ('Ash', '1', 'go north', 'go south'):
+        session.step(line)
+    assert 'You know no path' in session.step('route library')
+    assert 'Route (1 steps): north to grand_hall' in session.step('route grand hall')
+    assert session.current_room == game.START_ROOM
+    output = session.step('travel grand_hall')
+    assert session.current_room == 'grand_hall'
+    assert 'You press on north toward grand_hall.' in output
+
+def test_generated_worlds_are_connected(game):
+    for layout in game.WORLD_LAYOUTS:
+        world = dict(game.generate_world(3000, 5, layout))
+        names = list(world)
+        assert names[0] == game.START_ROOM and names[-1] == game.VICTORY_ROOM
+        assert game.VICTORY_ITEM in world[game.VICTORY_ROOM]['objects']
+        graph = game.WorldGraph(world)
+        assert all(graph.route(game.START_ROOM, name) is not None for name in names[::97] + names[-1:])
+        assert all(graph.route(name, game.START_ROOM) is not None for name in names[::97])
+
+def test_generated_exits_go_both_ways(game):
+    opposite = {'north': 'south', 'south': 'north', 'east': 'west', 'west': 'east'}
+    for layout in game.WORLD_LAYOUTS:
+        world = dict(game.generate_world(777, 8, layout))
+        for name, room in world.items():
+            for direction, dest in room['exits'].items():
+                assert world[dest]['exits'][opposite[direction]] == name
+
+def test_generated_worlds_are_reproducible(game, tmp_path):
+    assert list(game.generate_world(500, 9)) == list(game.generate_world(500, 9))
+    assert list(game.generate_world(500, 9)) != list(game.generate_world(500, 10))
+    path = str(tmp_path / 'world.jsonl')
+    game.write_world(path, 500, 9)
+    assert game.read_world(path) == game.freeze_table(dict(game.generate_world(500, 9)))
+
+def test_chests_sharing_a_name_are_emptied_separately(game):
+    world = dict(game.generate_world(4000, 3))
+    holders = {}
+    for name, room in world.items():
+        for chest_name in room.get('chests', ()):
+            holders.setdefault(chest_name, []).append(name)
+    chest_name, (first, second) = next((c, rooms[:2]) for c, rooms in holders.items() if len(rooms) > 1)
+    session = game.bench_session(world=game.WorldState(world))
+    session.current_room = first
+    assert game.open_chest(session, chest_name)
+    assert session.world.chest_contents(first, chest_name) == ()
+    assert session.world.chest_contents(second, chest_name) == game.chests[chest_name]['contents']
+
+def test_saves_naming_chests_alone_still_load(game):
+    # Older saves emptied a chest by name everywhere, so every room holding it stays empty
+    chest_name = 'dusty_chest'
+    keys = {game.chest_key(name, chest_name) for name, room in game.rooms.items() if chest_name in room.get('chests', ())}
+    assert len(keys) > 1
+    world = game.WorldState()
+    world.load({'emptied_chests': [chest_name, 'ruined_atrium/no_such_chest']})
+    assert world.emptied_chests == keys
+    world = game.WorldState()
+    world.replay([['empty_chest', chest_name]])
+    assert world.to_dict()['emptied_chests'] == sorted(keys)
+
+@pytest.fixture
+def indexed(game, tmp_path):
+    """A generated world as plain rooms, and the same world written to an indexed file and opened."""
+    rooms = dict(game.generate_world(2500, 4))
+    path = str(tmp_path / ('world' + game.WORLD_INDEX_SUFFIX))
+    assert game.write_indexed_world(path, rooms.items()) == len(rooms)
+    world = game.open_world(path)
+    yield rooms, world
+    world.close()
+
+def test_indexed_world_round_trip(game, indexed):
+    rooms, world = indexed
+    assert isinstance(world, game.IndexedWorld)
+    assert world.decoded == 0  # Opening reads only the header
+    assert len(world) == len(rooms) and list(world) == list(rooms)
+    for name in list(rooms)[::37] + [game.START_ROOM, game.VICTORY_ROOM]:
+        assert name in world
+        assert world[name] == game.freeze_table(rooms[name])
+    graph, expected = world.graph(), game.WorldGraph(rooms)
+    for goal in list(rooms)[::211]:
+        assert graph.route(game.START_ROOM, goal) == expected.route(game.START_ROOM, goal)
+
+def test_indexed_world_lacks_unknown_rooms(game, indexed):
+    _, world = indexed
+    with pytest.raises(KeyError):
+        world['room_999999']
+    assert 'room_999999' not in world and 42 not in world
+    assert world.get('nowhere') is None
+
+def test_indexed_world_keeps_recent_rooms_decoded(game, indexed, monkeypatch):
+    rooms, world = indexed
+    monkeypatch.setattr(world, '_cache_size', 3)
+    names = list(rooms)[:5]
+    for name in names:
+        world[name]
+    assert list(world._cache) == names[2:] and world.decoded == 5
+    world[names[2]]  # A hit moves the room to the back of the queue
+    world[names[0]]
+    assert list(world._cache) == [names[4], names[2], names[0]] and world.decoded == 6